@@ -0,0 +1,71 @@
+"""
+Compares loading the legacy pickle cache against opening the mmap index.
+
+Usage:
+
+    python benchmarks/bench_cache_load.py [--names 700000]
+"""
+import os
+import time
+import pickle
+import random
+import string
+import argparse
+import tempfile
+
+from namecheck.index import PackageIndex, write_index
+
+
+def make_package_names(count: int, seed: int = 0) -> dict[str, int]:
+    """
+    Builds a synthetic mapping of package names to their source bitmasks.
+    """
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits + '-'
+    package_names = {}
+    for i in range(count):
+        name = ''.join(rng.choices(alphabet, k=rng.randint(3, 20))) + str(i)
+        package_names[name] = rng.choice([1, 2, 3])
+    return package_names
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--names', type=int, default=700_000, help="Number of synthetic package names.")
+    parser.add_argument('--lookups', type=int, default=1000, help="Number of exact lookups to time.")
+    args = parser.parse_args()
+
+    package_names = make_package_names(args.names)
+    queries = random.Random(1).sample(list(package_names), min(args.lookups, len(package_names)))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pickle_path = os.path.join(tmp_dir, 'package_names.pkl')
+        index_path = os.path.join(tmp_dir, 'package_names.idx')
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(package_names, f)
+        write_index(index_path, package_names, ['PyPI', 'TestPyPI'])
+
+        start = time.perf_counter()
+        with open(pickle_path, 'rb') as f:
+            loaded = pickle.load(f)
+        pickle_load = time.perf_counter() - start
+        start = time.perf_counter()
+        for name in queries:
+            loaded[name]
+        pickle_lookup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = PackageIndex(index_path)
+        index_open = time.perf_counter() - start
+        start = time.perf_counter()
+        for name in queries:
+            index[name]
+        index_lookup = time.perf_counter() - start
+
+        print(f"{args.names} names, {len(queries)} lookups")
+        print(f"pickle: {os.path.getsize(pickle_path) / 1e6:6.1f} MB, "
+              f"load {pickle_load * 1e3:8.1f} ms, lookups {pickle_lookup * 1e3:6.2f} ms")
+        print(f"  mmap: {os.path.getsize(index_path) / 1e6:6.1f} MB, "
+              f"open {index_open * 1e3:8.1f} ms, lookups {index_lookup * 1e3:6.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Compares close-match search with a full difflib scan against the n-gram
+candidate index, and times the edit distance matcher.
+
+Usage:
+
+    python benchmarks/bench_close_matches.py [--names 700000]
+"""
+import time
+import difflib
+import argparse
+
+from namecheck.matching import find_close_matches, find_edit_matches, get_ngram_index
+from bench_cache_load import make_package_names
+
+
+QUERIES = ['requests', 'reqeusts', 'flask-utils', 'numpie', 'django-rest', 'pytorch-lightning']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--names', type=int, default=700_000, help="Number of synthetic package names.")
+    parser.add_argument('--skip-difflib', action='store_true', help="Don't time the full difflib scan.")
+    args = parser.parse_args()
+
+    package_names = make_package_names(args.names)
+    package_names.update({name: 1 for name in QUERIES})
+
+    start = time.perf_counter()
+    get_ngram_index(package_names)
+    print(f"n-gram index build: {time.perf_counter() - start:.2f} s")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        matches = find_close_matches(query, package_names)
+        ngram_time = time.perf_counter() - start
+        line = f"{query:>20}: n-gram {ngram_time * 1e3:8.1f} ms"
+        if not args.skip_difflib:
+            start = time.perf_counter()
+            expected = difflib.get_close_matches(query, package_names.keys(), n=5, cutoff=0.8)
+            line += f", difflib {(time.perf_counter() - start) * 1e3:8.1f} ms"
+            line += ", same" if matches == expected else ", DIFFERENT"
+        for max_distance in (1, 2):
+            start = time.perf_counter()
+            find_edit_matches(query, package_names, max_distance=max_distance)
+            line += f", edit<={max_distance} {(time.perf_counter() - start) * 1e3:6.1f} ms"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares the streaming simple index parser against the BeautifulSoup parser.
+
+Each parser runs in its own process so the reported peak RSS is not polluted
+by the other one. Usage:
+
+    python benchmarks/bench_index_parse.py [--names 700000]
+"""
+import io
+import sys
+import time
+import random
+import string
+import argparse
+import resource
+import multiprocessing
+
+from namecheck.parse import iter_names_from_html, CHUNK_SIZE
+
+
+def make_simple_page(count: int, seed: int = 0) -> bytes:
+    """
+    Builds a synthetic `/simple/` page with `count` anchors.
+    """
+    rng = random.Random(seed)
+    alphabet = string.ascii_lowercase + string.digits
+    lines = [b'<!DOCTYPE html>\n<html><head><title>Simple index</title></head><body>\n']
+    for i in range(count):
+        name = ''.join(rng.choices(alphabet, k=rng.randint(3, 20))) + str(i)
+        lines.append(f'    <a href="/simple/{name}/">{name}</a>\n'.encode())
+    lines.append(b'</body></html>\n')
+    return b''.join(lines)
+
+def parse_with_bs4(page: bytes) -> int:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page, 'html.parser')
+    return len({link.get_text().lower() for link in soup.find_all('a')})
+
+def parse_streaming(page: bytes) -> int:
+    stream = io.BytesIO(page)
+    chunks = iter(lambda: stream.read(CHUNK_SIZE), b'')
+    return len({name.lower() for name in iter_names_from_html(chunks)})
+
+PARSERS = {
+    'bs4': parse_with_bs4,
+    'streaming': parse_streaming,
+}
+
+def run_parser(parser_name: str, page: bytes, queue):
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    count = PARSERS[parser_name](page)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((count, elapsed, peak_rss - baseline_rss))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--names', type=int, default=700_000, help="Number of anchors in the synthetic page.")
+    args = parser.parse_args()
+
+    page = make_simple_page(args.names)
+    print(f"synthetic page: {args.names} names, {len(page) / 1e6:.1f} MB")
+
+    ## ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    ctx = multiprocessing.get_context('fork')
+    for parser_name in PARSERS:
+        queue = ctx.Queue()
+        process = ctx.Process(target=run_parser, args=(parser_name, page, queue))
+        process.start()
+        count, elapsed, rss_delta = queue.get()
+        process.join()
+        print(f"{parser_name:>10}: {elapsed:6.2f} s, "
+              f"peak RSS +{rss_delta * rss_unit / 1e6:7.1f} MB, {count} names")
+
+if __name__ == "__main__":
+    main()
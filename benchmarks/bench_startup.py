@@ -0,0 +1,60 @@
+"""
+Measures the startup cost of the cli with `python -X importtime`.
+
+Reports the median import time of `namecheck.cli` over several fresh
+interpreters, the slowest imports, and the wall time of `namecheck --help`.
+Exits with status 1 if the import time is over the budget. Usage:
+
+    python benchmarks/bench_startup.py [--runs 10] [--budget-ms 150]
+"""
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Imports `module` in a fresh interpreter and returns the cumulative
+    import time of every module it loaded, in microseconds.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        ## import time: self [us] | cumulative [us] | imported package
+        _, cumulative_us, name = line.split('|')
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10, help="Number of fresh interpreters to time.")
+    parser.add_argument('--budget-ms', type=float, default=150, help="Import time budget for namecheck.cli.")
+    parser.add_argument('--top', type=int, default=10, help="Number of slowest imports to list.")
+    args = parser.parse_args()
+
+    runs = [import_times('namecheck.cli') for _ in range(args.runs)]
+    totals = [run['namecheck.cli'] / 1e3 for run in runs]
+    median = statistics.median(totals)
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'namecheck.cli', '--help'], capture_output=True, check=True)
+    help_time = (time.perf_counter() - start) * 1e3
+
+    print(f"import namecheck.cli: median {median:6.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print(f"namecheck --help:     {help_time:6.1f} ms wall time")
+    print("slowest imports (last run, cumulative):")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[:args.top]
+    for name, cumulative_us in slowest:
+        print(f"  {cumulative_us / 1e3:8.1f} ms  {name}")
+
+    if median > args.budget_ms:
+        print("over budget", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
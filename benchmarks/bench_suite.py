@@ -0,0 +1,151 @@
+"""
+Times the hot paths of namecheck against a synthetic corpus served by a local stand-in index.
+
+Covers the index fetch and parse, saving and loading the cache, exact
+lookups, the similar name check, sound-alikes, prefix and substring
+search, close-match search and the direct checks, and writes the timings
+as JSON. With --baseline the run is compared against an earlier one and
+exits with status 1 if anything got slower than the tolerance. Usage:
+
+    python benchmarks/bench_suite.py [--names 700000] [--output results.json]
+                                     [--baseline previous.json] [--tolerance 0.25]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+from unittest.mock import patch
+
+from namecheck import utils
+from namecheck.index import normalize_name
+from namecheck.matching import get_ngram_index, find_close_matches, find_edit_matches
+from corpus import make_corpus, source_names
+from stand_in import StandInIndex
+
+QUERIES = ['requests', 'reqeusts', 'flask-utils', 'numpie', 'django-rest', 'pytorch-lightning']
+
+
+def timed(results: dict, key: str, func, ops: int = 1):
+    """
+    Runs `func` once, records its wall time under `key` and returns its result.
+    """
+    start = time.perf_counter()
+    value = func()
+    seconds = time.perf_counter() - start
+    results[key] = {'seconds': seconds, 'ops': ops, 'per_op_ms': seconds * 1e3 / ops}
+    print(f"{key:>24}: {seconds * 1e3:10.1f} ms ({ops} ops, {seconds * 1e3 / ops:8.3f} ms/op)", file=sys.stderr)
+    return value
+
+def run_suite(names: int, lookups: int, direct_checks: int, seed: int = 0) -> dict:
+    corpus = make_corpus(names, seed)
+    rng = random.Random(seed)
+    ## the index holds the normalized names
+    indexed = [normalize_name(name) for name in rng.sample(list(corpus), min(lookups // 2, len(corpus)))]
+    missing = [f'{name}-not-indexed' for name in indexed]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as cache_dir, StandInIndex([('/', source_names(corpus, 1)),
+                                                                   ('/test/', source_names(corpus, 2))]) as server:
+        sources = {'PyPI': server.source_url('/'), 'TestPyPI': server.source_url('/test/')}
+        with patch('namecheck.utils.user_cache_dir', lambda *args, **kwargs: cache_dir), \
+             patch.dict('namecheck.utils.SOURCES', sources), \
+             patch('namecheck.utils._direct_check_cache', None):
+            fetched = timed(results, 'fetch_and_parse', lambda: utils.fetch_all_package_names())
+            assert len(fetched) == len(corpus), "the stand-in served a different corpus"
+
+            timed(results, 'cache_save', lambda: utils.save_package_names_to_cache(fetched))
+            index = timed(results, 'cache_load', utils.load_package_names_from_cache)
+
+            queries = indexed + missing
+            timed(results, 'exact_lookup', lambda: [name in index for name in queries], ops=len(queries))
+            ## the free names the Bloom filters answer for
+            timed(results, 'missing_lookup', lambda: [name in index for name in missing], ops=len(missing))
+
+            timed(results, 'similar_names', lambda: [utils.get_similar_names(name, index) for name in missing],
+                  ops=len(missing))
+            timed(results, 'sound_alikes', lambda: [utils.get_sound_alikes(query, index) for query in QUERIES],
+                  ops=len(QUERIES))
+            timed(results, 'prefix_search',
+                  lambda: [utils.search_package_names(query, index, prefix=True, limit=20) for query in QUERIES],
+                  ops=len(QUERIES))
+            timed(results, 'substring_search',
+                  lambda: [utils.search_package_names(query, index, limit=20) for query in QUERIES], ops=len(QUERIES))
+            timed(results, 'ngram_index_build', lambda: get_ngram_index(index))
+            timed(results, 'close_matches_ratio',
+                  lambda: [find_close_matches(query, index) for query in QUERIES], ops=len(QUERIES))
+            timed(results, 'close_matches_edit',
+                  lambda: [find_edit_matches(query, index, max_distance=2) for query in QUERIES], ops=len(QUERIES))
+
+            check_names = indexed[:direct_checks // 2] + missing[:direct_checks // 2]
+            timed(results, 'direct_checks_cold',
+                  lambda: [utils.get_direct_checks(name) for name in check_names], ops=len(check_names))
+            timed(results, 'direct_checks_cached',
+                  lambda: [utils.get_direct_checks(name) for name in check_names], ops=len(check_names))
+            taken = indexed[:direct_checks // 2]
+            timed(results, 'project_page_probe',
+                  lambda: [utils.probe_project_page(name, sources['PyPI']) for name in taken], ops=len(taken))
+    return results
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Returns the benchmarks that got slower than the baseline by more than `tolerance`.
+    """
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        change = result['per_op_ms'] / previous['per_op_ms'] - 1
+        print(f"{key:>24}: {change:+7.1%} vs baseline", file=sys.stderr)
+        if change > tolerance:
+            regressions.append(key)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--names', type=int, default=700_000, help="Number of synthetic package names.")
+    parser.add_argument('--lookups', type=int, default=10_000, help="Number of exact lookups, half of them misses.")
+    parser.add_argument('--direct-checks', type=int, default=50, help="Number of names checked directly.")
+    parser.add_argument('--output', help="File to write the results to, stdout by default.")
+    parser.add_argument('--baseline', help="Results of an earlier run to compare against.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown against the baseline.")
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'names': args.names,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'revision': git_revision(),
+            'timestamp': time.time(),
+        },
+        'results': run_suite(args.names, args.lookups, args.direct_checks),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(report['results'], baseline, args.tolerance)
+        if regressions:
+            print(f"slower than the baseline: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Synthetic package name corpus for the benchmarks, shaped like the real
+indexes: names built from common words, prefixes and suffixes joined by
+separators, most of them on PyPI, fewer on TestPyPI, some on both.
+"""
+import json
+import random
+
+from namecheck.index import normalize_name
+
+WORDS = (
+    'py', 'django', 'flask', 'data', 'api', 'client', 'async', 'json', 'http', 'test', 'tools',
+    'utils', 'core', 'cli', 'web', 'aws', 'cloud', 'db', 'sql', 'model', 'learn', 'torch', 'image',
+    'text', 'parser', 'config', 'log', 'auth', 'cache', 'queue', 'graph', 'plot', 'stream', 'file',
+    'net', 'lib', 'kit', 'sdk', 'lint', 'format', 'mock', 'redis', 'pandas', 'numpy', 'scrape',
+)
+PREFIXES = ('', '', '', 'py', 'django-', 'flask-', 'pytest-', 'sphinx-', 'types-', 'azure-')
+SUFFIXES = ('', '', '', 'py', '-utils', '-client', '-sdk', '-plugin', '2', '-cli')
+SEPARATORS = ('-', '-', '_', '', '.')
+## masks of PyPI only, TestPyPI only and both, weighted like the real indexes
+SOURCE_MASKS = (1, 2, 3)
+SOURCE_WEIGHTS = (75, 15, 10)
+
+
+def make_corpus(count: int, seed: int = 0) -> dict[str, int]:
+    """
+    Builds `count` package names mapped to source bitmasks. The names keep
+    their separators, like the indexes serve them, but are distinct once
+    PEP 503 normalized.
+    """
+    rng = random.Random(seed)
+    corpus = {}
+    normalized = set()
+    while len(corpus) < count:
+        words = rng.choices(WORDS, k=rng.choice((1, 2, 2, 3)))
+        name = rng.choice(PREFIXES) + rng.choice(SEPARATORS).join(words) + rng.choice(SUFFIXES)
+        if rng.random() < 0.3:
+            name += str(rng.randint(0, 999))
+        if normalize_name(name) not in normalized:
+            normalized.add(normalize_name(name))
+            corpus[name] = rng.choices(SOURCE_MASKS, SOURCE_WEIGHTS)[0]
+    return corpus
+
+def source_names(corpus: dict[str, int], mask: int) -> list[str]:
+    """
+    Returns the names of the corpus found on the source with the given bit.
+    """
+    return [name for name, sources in corpus.items() if sources & mask]
+
+def make_json_index(names) -> bytes:
+    """
+    Builds a PEP 691 JSON `/simple/` index.
+    """
+    return json.dumps({
+        'meta': {'api-version': '1.1', '_last-serial': 1},
+        'projects': [{'name': name, '_last-serial': 1} for name in names],
+    }).encode()
+
+def make_html_index(names) -> bytes:
+    """
+    Builds a PEP 503 HTML `/simple/` index.
+    """
+    anchors = ''.join(f'    <a href="/simple/{name}/">{name}</a>\n' for name in names)
+    return f'<!DOCTYPE html>\n<html><body>\n{anchors}</body></html>\n'.encode()
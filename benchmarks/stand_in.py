@@ -0,0 +1,109 @@
+"""
+Local HTTP stand-in for the package indexes, serving a synthetic corpus.
+
+Every source is served under its own prefix ('/' for the first, '/test/'
+for the second, ...) with the endpoints namecheck uses:
+
+    /simple/                JSON or HTML index, by the Accept header
+    /simple/<name>/         200 for indexed names, 404 otherwise, JSON or HTML
+    /project/<name>/        project page with the usual markers
+"""
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from corpus import make_json_index, make_html_index
+
+JSON_INDEX_CONTENT_TYPE = 'application/vnd.pypi.simple.v1+json'
+## project pages on the real indexes are tens of kilobytes
+PAGE_FILLER = b'<p>' + b'lorem ipsum ' * 4000 + b'</p>'
+
+
+class StandInIndex:
+    """
+    Serves the given sources, a list of (prefix, names) pairs, from a
+    background thread. Use as a context manager.
+    """
+
+    def __init__(self, sources):
+        self.sources = []
+        for prefix, names in sources:
+            names = sorted(names)
+            self.sources.append((prefix, {
+                'names': set(names),
+                'json': make_json_index(names),
+                'html': make_html_index(names),
+            }))
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionResetError:
+                    ## a client closing its kept-alive connection
+                    pass
+
+            def do_GET(self):
+                self._respond(send_body=True)
+
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def _respond(self, send_body: bool):
+                status, content_type, body = server.route(self.path, self.headers.get('Accept', ''))
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if send_body:
+                    try:
+                        self.wfile.write(body)
+                    except (BrokenPipeError, ConnectionResetError):
+                        ## the project page probe hangs up after the first marker
+                        pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/'
+
+    def route(self, path: str, accept: str):
+        ## longest prefix first, so '/test/' wins over '/'
+        for prefix, source in sorted(self.sources, key=lambda item: len(item[0]), reverse=True):
+            if not path.startswith(prefix):
+                continue
+            rest = path[len(prefix):]
+            if rest == 'simple/':
+                if JSON_INDEX_CONTENT_TYPE in accept:
+                    return 200, JSON_INDEX_CONTENT_TYPE, source['json']
+                return 200, 'text/html', source['html']
+            for endpoint in ('simple/', 'project/'):
+                if rest.startswith(endpoint):
+                    name = rest[len(endpoint):].strip('/')
+                    if name not in source['names']:
+                        return 404, 'text/html', b'<h1>Not Found</h1>'
+                    if endpoint == 'simple/':
+                        ## PEP 691, the probe only trusts a 200 with its content type
+                        if JSON_INDEX_CONTENT_TYPE in accept:
+                            project = {'meta': {'api-version': '1.0'}, 'name': name, 'files': []}
+                            return 200, JSON_INDEX_CONTENT_TYPE, json.dumps(project).encode()
+                        return 200, 'text/html', f'<a href="{name}-1.0.tar.gz">{name}-1.0.tar.gz</a>'.encode()
+                    page = f'<html><div class="package-header"><h1>{name}</h1></div>'.encode()
+                    return 200, 'text/html', page + PAGE_FILLER + b'</html>'
+        return 404, 'text/html', b'<h1>Not Found</h1>'
+
+    def source_url(self, prefix: str) -> str:
+        return self.url + prefix.lstrip('/')
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
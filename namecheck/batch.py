@@ -0,0 +1,167 @@
+import csv
+import sys
+import json
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from namecheck.utils import (SOURCES,
+                             DIRECT_CHECK_DEADLINE,
+                             get_sources_for_name,
+                             get_sources_for_names,
+                             get_similar_names,
+                             get_sound_alikes,
+                             get_direct_checks,
+                             get_close_matches)
+from namecheck.timings import timings
+
+## the output formats selectable from the cli
+OUTPUT_FORMATS = ('jsonl', 'csv')
+## names checked directly at the same time, every one of them checks all
+## sources concurrently on top of that
+DEFAULT_WORKERS = 8
+CSV_FIELDS = ('name', 'available', 'taken_sources', 'unchecked_sources', 'checked_by', 'similar_to',
+              'close_matches', 'sound_alikes')
+
+
+@dataclass
+class BatchResult:
+    """
+    Result of checking a single name in batch mode.
+    `checked_by` is 'index' if the name was found in the package index and
+    'direct' if the project urls were checked. Sources that couldn't be
+    checked directly are listed in `unchecked_sources`.
+    A name PyPI would reject as too similar to existing projects is taken
+    on their sources, and lists them in `similar_to`.
+    `close_matches` and `sound_alikes` are only looked up when asked for.
+    """
+    name: str
+    available: bool
+    taken_sources: list[str] = field(default_factory=list)
+    unchecked_sources: list[str] = field(default_factory=list)
+    checked_by: str = 'index'
+    similar_to: list[str] = field(default_factory=list)
+    close_matches: list[str] = field(default_factory=list)
+    sound_alikes: list[str] = field(default_factory=list)
+
+
+def read_names(lines) -> list[str]:
+    """
+    Reads the names to check, one per line. Blank lines and lines starting
+    with '#' are skipped, duplicates are only checked once.
+    """
+    names = {}
+    for line in lines:
+        name = line.strip()
+        if name and not name.startswith('#'):
+            names.setdefault(name, None)
+    return list(names)
+
+def check_index(name: str, all_names_with_sources):
+    """
+    Looks a name and the names too similar to it up in the package index.
+    Returns a `BatchResult` if the name is taken, None if it's not indexed.
+    """
+    with timings.phase('exact lookup'):
+        taken_sources = get_sources_for_name(name, all_names_with_sources)
+        similar_to = [] if taken_sources else get_similar_names(name, all_names_with_sources)
+    if taken_sources:
+        return BatchResult(name, available=False, taken_sources=taken_sources)
+    if similar_to:
+        return BatchResult(name, available=False, similar_to=similar_to,
+                           taken_sources=get_sources_for_names(similar_to, all_names_with_sources))
+    return None
+
+def add_close_matches(result: BatchResult, all_names_with_sources, matcher: str, max_distance: int) -> BatchResult:
+    """
+    Fills in the close matches and the sound-alikes of a result.
+    """
+    result.close_matches = get_close_matches(result.name, all_names_with_sources,
+                                             matcher=matcher, max_distance=max_distance)
+    result.sound_alikes = get_sound_alikes(result.name, all_names_with_sources,
+                                           exclude=result.similar_to + result.close_matches)
+    return result
+
+def check_name_directly(name: str, deadline: float = DIRECT_CHECK_DEADLINE) -> BatchResult:
+    """
+    Checks the project urls of a name that isn't in the package index.
+    """
+    checks = get_direct_checks(name, deadline=deadline)
+    taken_sources = sorted(source_name for source_name, check in checks.items() if check.taken)
+    unchecked_sources = [source_name for source_name in SOURCES if source_name not in checks]
+    return BatchResult(name,
+                       available=not taken_sources,
+                       taken_sources=taken_sources,
+                       unchecked_sources=unchecked_sources,
+                       checked_by='direct')
+
+def check_name(name: str, all_names_with_sources, deadline: float = DIRECT_CHECK_DEADLINE,
+               matcher: str = None, max_distance: int = 2) -> BatchResult:
+    """
+    Checks a single name: from the package index if it's in there, directly
+    on the project urls otherwise. With a `matcher` its close matches and
+    sound-alikes are looked up as well.
+    """
+    result = check_index(name, all_names_with_sources)
+    if result is None:
+        result = check_name_directly(name, deadline)
+    if matcher:
+        add_close_matches(result, all_names_with_sources, matcher, max_distance)
+    return result
+
+def check_names(names, all_names_with_sources, workers: int = DEFAULT_WORKERS,
+                deadline: float = DIRECT_CHECK_DEADLINE, matcher: str = None, max_distance: int = 2):
+    """
+    Checks many names, yielding a `BatchResult` for each as soon as it's done.
+    The names found in the package index are answered straight away, the
+    rest are checked directly on a pool of `workers` threads, so the results
+    come out in completion order rather than input order.
+    With a `matcher` the close matches and sound-alikes of every name are
+    looked up as well.
+    """
+    def with_close_matches(result: BatchResult) -> BatchResult:
+        if matcher:
+            add_close_matches(result, all_names_with_sources, matcher, max_distance)
+        return result
+
+    misses = []
+    for name in names:
+        result = check_index(name, all_names_with_sources)
+        if result is not None:
+            yield with_close_matches(result)
+        else:
+            misses.append(name)
+
+    if not misses:
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(check_name_directly, name, deadline) for name in misses]
+        try:
+            for future in as_completed(futures):
+                yield with_close_matches(future.result())
+        finally:
+            ## the consumer stopped early, don't start the remaining checks
+            for future in futures:
+                future.cancel()
+
+def write_results(results, out=sys.stdout, output_format: str = 'jsonl') -> int:
+    """
+    Writes the results as JSON Lines or CSV, flushing after every result so
+    they can be followed while the batch is still running.
+    Returns the number of results written.
+    """
+    count = 0
+    if output_format == 'csv':
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for result in results:
+            row = asdict(result)
+            for key in ('taken_sources', 'unchecked_sources', 'similar_to', 'close_matches', 'sound_alikes'):
+                row[key] = ' '.join(row[key])
+            writer.writerow(row)
+            out.flush()
+            count += 1
+    else:
+        for result in results:
+            out.write(json.dumps(asdict(result)) + '\n')
+            out.flush()
+            count += 1
+    return count
@@ -0,0 +1,132 @@
+import os
+import json
+import math
+import mmap
+import struct
+import hashlib
+
+## on-disk layout of a filter: MAGIC | u32 header size | JSON header | bits
+MAGIC = b'NCBLOOM\0'
+FORMAT_VERSION = 2
+## at 1% false positives a name costs under 10 bits
+ERROR_RATE = 0.01
+
+
+class BloomFormatError(ValueError):
+    """Raised when a filter file is not in a format we can read."""
+
+
+def _hashes(key: str, bit_count: int) -> tuple[int, int]:
+    """
+    Returns the first bit of a key and the step to its next ones, the
+    bits are derived from a single blake2b digest by double hashing.
+    """
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    ## an odd step, so the probes never get stuck on a few bits
+    return (int.from_bytes(digest[:8], 'little') % bit_count,
+            (int.from_bytes(digest[8:], 'little') | 1) % bit_count)
+
+
+class BloomFilter:
+    """
+    Compact set of strings that can only answer "definitely not in it" or
+    "maybe in it", wrong in about `ERROR_RATE` of the maybes. `meta` holds
+    whatever the writer wants to recognise the filter by later.
+    A loaded filter is memory-mapped, a lookup only reads the few pages
+    its bits are on.
+    """
+
+    def __init__(self, bits, hash_count: int, meta: dict = None, mm: mmap.mmap = None):
+        self.bits = bits
+        self.bit_count = len(bits) * 8
+        self.hash_count = hash_count
+        self.meta = meta or {}
+        self._mm = mm
+
+    @classmethod
+    def build(cls, keys, count: int, error_rate: float = ERROR_RATE, meta: dict = None) -> 'BloomFilter':
+        """
+        Builds a filter holding `keys`, sized for `count` of them.
+        """
+        count = max(count, 1)
+        bit_count = max(64, math.ceil(-count * math.log(error_rate) / math.log(2) ** 2))
+        bit_count = (bit_count + 7) // 8 * 8
+        hash_count = max(1, round(bit_count / count * math.log(2)))
+        bits = bytearray(bit_count // 8)
+        ## the hot loop of a fetch, `_hashes` is inlined
+        blake2b, from_bytes = hashlib.blake2b, int.from_bytes
+        for key in keys:
+            digest = blake2b(key.encode('utf-8'), digest_size=16).digest()
+            position = from_bytes(digest[:8], 'little') % bit_count
+            step = (from_bytes(digest[8:], 'little') | 1) % bit_count
+            for _ in range(hash_count):
+                bits[position >> 3] |= 1 << (position & 7)
+                position += step
+                if position >= bit_count:
+                    position -= bit_count
+        return cls(bytes(bits), hash_count, meta)
+
+    def __contains__(self, key: str) -> bool:
+        bits, bit_count = self.bits, self.bit_count
+        position, step = _hashes(key, bit_count)
+        for _ in range(self.hash_count):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            position = (position + step) % bit_count
+        return True
+
+    def close(self):
+        """
+        Releases the memory map of a loaded filter.
+        """
+        if self._mm is not None:
+            self.bits.release()
+            self._mm.close()
+
+    def write(self, path: str):
+        """
+        Writes the filter to a file, moved into place once it's complete.
+        """
+        header = json.dumps({'version': FORMAT_VERSION, 'bit_count': self.bit_count, 'hash_count': self.hash_count,
+                             'meta': self.meta}).encode()
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'BloomFilter':
+        """
+        Opens a filter written with `write`.
+        """
+        with open(path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise BloomFormatError(f"{path} is empty") from e
+        try:
+            if mm[:len(MAGIC)] != MAGIC:
+                raise BloomFormatError(f"{path} is not a filter file")
+            try:
+                (header_size,) = struct.unpack('<I', mm[len(MAGIC):len(MAGIC) + 4])
+                header_start = len(MAGIC) + 4
+                header = json.loads(mm[header_start:header_start + header_size])
+            except (struct.error, ValueError) as e:
+                raise BloomFormatError(f"{path} has a corrupted header") from e
+            if not isinstance(header, dict) or header.get('version') != FORMAT_VERSION:
+                raise BloomFormatError(f"{path} was written in an incompatible format")
+            ## the bits a key maps to depend on their number, a filter of
+            ## another size would rule out keys that were put in
+            bit_count = header.get('bit_count')
+            if not isinstance(bit_count, int) or bit_count <= 0 or bit_count % 8:
+                raise BloomFormatError(f"{path} has a corrupted header")
+            if len(mm) - header_start - header_size != bit_count // 8:
+                raise BloomFormatError(f"{path} is truncated or padded")
+        except Exception:
+            mm.close()
+            raise
+        bits = memoryview(mm)[header_start + header_size:]
+        return cls(bits, header['hash_count'], header.get('meta'), mm)
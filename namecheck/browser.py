@@ -0,0 +1,112 @@
+import queue
+import atexit
+import threading
+from concurrent.futures import Future
+from namecheck.timings import timings
+
+
+class BrowserSession:
+    """
+    A headless Chromium kept alive for the lifetime of the process, so only
+    the first direct check pays for starting the browser. It's started on
+    first use and the same page is reused for every subsequent check.
+    Playwright's sync API is bound to the thread that started it, so all
+    browser calls run on one dedicated thread, whichever thread asks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = queue.Queue()
+        self._thread = None
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._page = None
+
+    ## --- browser thread only ---
+    def _start(self):
+        ## playwright is slow to import, only pay for it once a browser is needed
+        from playwright.sync_api import sync_playwright
+        self._playwright = sync_playwright().start()
+        try:
+            self._browser = self._playwright.chromium.launch()
+            self._context = self._browser.new_context()
+            self._page = self._context.new_page()
+        except Exception:
+            self._stop()
+            raise
+
+    def _stop(self):
+        try:
+            if self._browser is not None:
+                self._browser.close()
+            if self._playwright is not None:
+                self._playwright.stop()
+        finally:
+            self._playwright = self._browser = self._context = self._page = None
+
+    def _get_content(self, url: str) -> str:
+        if self._browser is not None and not self._browser.is_connected():
+            ## the browser went away (crash, killed), start a fresh one
+            self._stop()
+        if self._browser is None:
+            with timings.phase('browser launch'):
+                self._start()
+        if self._page.is_closed():
+            self._page = self._context.new_page()
+        with timings.phase('browser page load'):
+            self._page.goto(url, wait_until='networkidle')
+            return self._page.content()
+
+    def _run(self):
+        while True:
+            func, args, future = self._calls.get()
+            if func is None:
+                return
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+
+    ## --- any thread ---
+    def _call(self, func, *args):
+        """
+        Runs `func` on the browser thread and waits for its result.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='namecheck-browser', daemon=True)
+                self._thread.start()
+            future = Future()
+            self._calls.put((func, args, future))
+        return future.result()
+
+    @property
+    def is_running(self) -> bool:
+        return self._browser is not None
+
+    def get_content(self, url: str) -> str:
+        """
+        Loads a url in the browser and returns the rendered page content.
+        """
+        return self._call(self._get_content, url)
+
+    def close(self):
+        """
+        Closes the browser, if it was started. A later `get_content` call
+        starts a new one.
+        """
+        if self._thread is None:
+            return
+        try:
+            self._call(self._stop)
+        finally:
+            with self._lock:
+                thread, self._thread = self._thread, None
+                self._calls.put((None, (), None))
+            thread.join()
+
+
+browser_session = BrowserSession()
+atexit.register(browser_session.close)
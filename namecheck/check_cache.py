@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import threading
+from namecheck.index import normalize_name
+
+## "available" can change any minute (someone registers the name), while a
+## taken name practically never becomes free again
+AVAILABLE_TTL = 15 * 60
+TAKEN_TTL = 7 * 24 * 60 * 60
+## oldest results are evicted beyond this, keeps the file small
+MAX_ENTRIES = 10_000
+
+
+class CheckCache:
+    """
+    Persistent cache of direct check results, keyed by normalized name and
+    source. Results expire after `available_ttl` or `taken_ttl` seconds,
+    depending on the answer. It's read on first use and only written back
+    by `save`, so a batch of checks costs a single write.
+    """
+
+    def __init__(self, path: str, available_ttl: float = AVAILABLE_TTL, taken_ttl: float = TAKEN_TTL,
+                 max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.available_ttl = available_ttl
+        self.taken_ttl = taken_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    @staticmethod
+    def _key(name: str, source_name: str) -> str:
+        return f'{source_name}:{normalize_name(name)}'
+
+    def _read_file(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except (ValueError, OSError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            self._entries = self._read_file()
+        return self._entries
+
+    def _is_fresh(self, entry, now: float) -> bool:
+        try:
+            ttl = self.taken_ttl if entry['taken'] else self.available_ttl
+            return now - entry['checked_at'] < ttl
+        except (KeyError, TypeError):
+            return False
+
+    def get(self, name: str, source_name: str):
+        """
+        Returns whether the name was found taken on the source, or None if
+        there is no fresh result for it.
+        """
+        with self._lock:
+            entry = self._load().get(self._key(name, source_name))
+            if entry is None or not self._is_fresh(entry, time.time()):
+                return None
+            return entry['taken']
+
+    def put(self, name: str, source_name: str, taken: bool):
+        """
+        Stores a check result, it's written to disk on the next `save`.
+        """
+        with self._lock:
+            self._load()[self._key(name, source_name)] = {'taken': taken, 'checked_at': time.time()}
+            self._dirty = True
+
+    def save(self):
+        """
+        Writes the cache back if anything changed. Results another process
+        saved in the meantime are merged in, the newest result wins.
+        Expired results are dropped and the oldest evicted beyond `max_entries`.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = self._read_file()
+            for key, entry in self._entries.items():
+                other = entries.get(key)
+                if not isinstance(other, dict) or other.get('checked_at', 0) <= entry['checked_at']:
+                    entries[key] = entry
+            now = time.time()
+            fresh = [(key, entry) for key, entry in entries.items() if self._is_fresh(entry, now)]
+            fresh.sort(key=lambda item: item[1]['checked_at'], reverse=True)
+            self._entries = dict(fresh[:self.max_entries])
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def clear(self):
+        """
+        Forgets all results and removes the cache file.
+        """
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -1,5 +1,6 @@
 import sys
 import argparse
+import cProfile
 from rich.style import Style
 from rich.prompt import Prompt
 from rich.console import Console
@@ -7,8 +8,25 @@ from namecheck.render.const import PINK, BLUE
 from namecheck.utils import (get_all_package_names, 
                              render_name_availability,
                              get_name_availability,
+                             get_sound_alikes,
+                             get_direct_check_cache,
+                             save_direct_check_cache,
+                             search_package_names,
+                             print_search_results,
+                             wait_for_background_refresh,
+                             keep_index_fresh,
                              clear_cache)
 from namecheck.render.utils import clear_previous_lines
+from namecheck.matching import warm_up_ngram_index, MATCHERS
+from namecheck.index import SwappableIndex
+from namecheck.browser import browser_session
+from namecheck.timings import timings
+from namecheck.check_cache import AVAILABLE_TTL, TAKEN_TTL
+from namecheck.batch import (read_names, check_names, write_results,
+                             OUTPUT_FORMATS, DEFAULT_WORKERS)
+from namecheck.suggest import suggest_names, print_suggestions, DEFAULT_COUNT, DEFAULT_VERIFY
+from namecheck.daemon import (serve, connect_to_daemon, check_names_with_daemon,
+                              get_name_availability_from_daemon, DaemonError)
 
 console = Console()
 basic_style = Style(color=BLUE, blink=False, bold=False)
@@ -17,25 +35,216 @@ def main():
     """
     Main function to run the package name checker.
     """
+    try:
+        run()
+    finally:
+        save_direct_check_cache()
+        ## the browser for the direct checks lives as long as the session
+        browser_session.close()
+
+def run():
+    """
+    Parses the arguments and runs the picked command, timed and profiled
+    if asked for.
+    """
     parser = argparse.ArgumentParser(
         description="CLI tool to check the availability of a package name on PyPI and TestPyPI."
     )
     parser.add_argument(
         "--refresh",
         action="store_true",
+        help="Update the cached package names with the changes since the last fetch."
+    )
+    parser.add_argument(
+        "--max-cache-age",
+        type=float,
+        default=24,
+        help="Hours after which the cached package names are refreshed: in the background by the prompt and "
+             "the daemon, while the stale ones are used, and before answering by the other commands. "
+             "0 refreshes on every start."
+    )
+    parser.add_argument(
+        "--clear-cache",
+        action="store_true",
         help="Clear the cached package names."
     )
+    parser.add_argument(
+        "--matcher",
+        choices=MATCHERS,
+        default="ratio",
+        help="How to find close matches: 'ratio' for similar names, 'edit' for names a few typos away."
+    )
+    parser.add_argument(
+        "--max-distance",
+        type=int,
+        default=2,
+        help="Maximum number of edits for the 'edit' matcher."
+    )
+    parser.add_argument(
+        "--available-ttl",
+        type=float,
+        default=AVAILABLE_TTL,
+        help="Seconds to trust a cached direct check that found a name available."
+    )
+    parser.add_argument(
+        "--taken-ttl",
+        type=float,
+        default=TAKEN_TTL,
+        help="Seconds to trust a cached direct check that found a name taken."
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print how long every phase took (cache load, index fetch, direct checks, ...) when done."
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Profile the main thread with cProfile and write the stats to FILE, for pstats or snakeviz."
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Don't use a running daemon, load the package names in this process."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser(
+        "serve",
+        help="Keep the package names loaded and answer the queries of other namecheck runs.",
+        description="Run a daemon that keeps the package names, close match index, direct check cache "
+                    "and browser warm, and answers the queries of other namecheck runs over a local socket."
+    )
+    check_parser = subparsers.add_parser(
+        "check",
+        help="Check many names at once, without prompting.",
+        description="Check the names from a file (one per line) and write the results as they complete."
+    )
+    check_parser.add_argument(
+        "--from",
+        dest="from_file",
+        default="-",
+        help="File with the names to check, one per line. Reads from stdin by default."
+    )
+    check_parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="jsonl",
+        help="Output format of the results."
+    )
+    check_parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of names checked directly at the same time."
+    )
+    check_parser.add_argument(
+        "--close-matches",
+        action="store_true",
+        help="Include the close matches of every name, found with --matcher."
+    )
+    suggest_parser = subparsers.add_parser(
+        "suggest",
+        help="Suggest free names around a seed.",
+        description="Generate variants of a name (prefixes, suffixes, separators, plurals, abbreviations), "
+                    "keep the ones free in the package index and check the best few directly."
+    )
+    suggest_parser.add_argument(
+        "seed",
+        help="The name to build the suggestions around."
+    )
+    suggest_parser.add_argument(
+        "--count",
+        type=int,
+        default=DEFAULT_COUNT,
+        help="Number of free names to show."
+    )
+    suggest_parser.add_argument(
+        "--verify",
+        type=int,
+        default=DEFAULT_VERIFY,
+        help="Number of the best names also checked on the project urls."
+    )
+    search_parser = subparsers.add_parser(
+        "search",
+        help="List the package names containing a string, or starting with it.",
+        description="Count and list the package names containing a string (or starting with it, with --prefix), "
+                    "e.g. to see how crowded a namespace is."
+    )
+    search_parser.add_argument(
+        "query",
+        help="The string to look for."
+    )
+    search_parser.add_argument(
+        "--prefix",
+        action="store_true",
+        help="Only match the names starting with the query."
+    )
+    search_parser.add_argument(
+        "--limit",
+        type=int,
+        default=20,
+        help="Number of names to list, the count covers all of them."
+    )
     args = parser.parse_args()
-    if args.refresh:
+
+    timings.enabled = args.timings
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        run_command(args)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"Profile written to {args.profile}", file=sys.stderr)
+        if args.timings:
+            timings.print_summary()
+
+def run_command(args):
+    """
+    Runs the interactive name checker, the batch checker for the `check`
+    command, the name generator for `suggest`, the name search for `search`
+    or the daemon for `serve`.
+    Queries are answered by the daemon if one is running.
+    """
+    if args.clear_cache:
         clear_cache()
+    direct_check_cache = get_direct_check_cache()
+    direct_check_cache.available_ttl = args.available_ttl
+    direct_check_cache.taken_ttl = args.taken_ttl
 
-        
-    console.clear()
-    all_package_names = get_all_package_names()
-    if not all_package_names:
-        print("Could not retrieve any package names. Exiting.", file=sys.stderr)
+    if args.command == "serve":
+        run_daemon(args)
         return
 
+    ## a refresh or a cleared cache is about this process' own index
+    client = None
+    if not (args.no_daemon or args.refresh or args.clear_cache):
+        client = connect_to_daemon()
+
+    if args.command == "check":
+        run_batch(args, client)
+        return
+
+    if args.command == "suggest":
+        run_suggest(args, client)
+        return
+
+    if args.command == "search":
+        run_search(args, client)
+        return
+
+    console.clear()
+    if client is None:
+        all_package_names = get_all_package_names(refresh=args.refresh, max_age=args.max_cache_age * 3600)
+        if not all_package_names:
+            print("Could not retrieve any package names. Exiting.", file=sys.stderr)
+            return
+        ## the cached index has its close match postings already, a plain
+        ## mapping gets its own built while the user is typing
+        warm_up_ngram_index(all_package_names)
+
     run_count = 0
     while True:
         try:
@@ -56,19 +265,34 @@ def main():
                 
                 ## check for the name availability
                 console.print(f"Name availability for '{user_input}'", style=basic_style)
-                is_available, taken_sources, close_matches = get_name_availability(user_input, all_package_names)
+                if client is not None:
+                    ## the daemon also sends the sources of the close matches
+                    (is_available, taken_sources, close_matches,
+                     sound_alikes, match_sources) = get_name_availability_from_daemon(
+                        user_input, client, matcher=args.matcher, max_distance=args.max_distance)
+                else:
+                    is_available, taken_sources, close_matches = get_name_availability(user_input, 
+                                                                                       all_package_names, 
+                                                                                       matcher=args.matcher, 
+                                                                                       max_distance=args.max_distance)
+                    sound_alikes = get_sound_alikes(user_input, all_package_names, exclude=close_matches)
+                    match_sources = all_package_names
                 ## now render the results
                 clear_previous_lines(2)
-                render_name_availability(user_input, 
-                                         is_available, 
-                                         taken_sources, 
-                                         close_matches, 
-                                         all_package_names, 
-                                         console=console)
+                with timings.phase('render'):
+                    render_name_availability(user_input, 
+                                             is_available, 
+                                             taken_sources, 
+                                             close_matches, 
+                                             match_sources, 
+                                             console=console,
+                                             sound_alikes=sound_alikes)
                 ## offer user to check another name
                 user_input = Prompt.ask(package_prompt_msg, console=console)
                 if user_input:
                     lines_to_clear = len(close_matches) + 5 
+                    if sound_alikes:
+                        lines_to_clear += len(sound_alikes) + 2
                     clear_previous_lines(lines_to_clear, sleep_time=0.05)
                     run_count += 1
                     continue
@@ -78,5 +302,97 @@ def main():
             console.print("\nExiting.", style=basic_style)
             break
 
+    ## a refresh killed on exit would leave the stale cache for the next start
+    if client is None and not wait_for_background_refresh(timeout=0):
+        console.print("Finishing the refresh of the package names...", style=basic_style)
+        wait_for_background_refresh()
+
+def run_daemon(args):
+    """
+    Loads the package names once and answers queries until interrupted.
+    """
+    max_age = args.max_cache_age * 3600
+    all_package_names = get_all_package_names(refresh=args.refresh, max_age=max_age)
+    if not all_package_names:
+        print("Could not retrieve any package names. Exiting.", file=sys.stderr)
+        return
+    if not isinstance(all_package_names, SwappableIndex):
+        all_package_names = SwappableIndex(all_package_names)
+    warm_up_ngram_index(all_package_names)
+    ## runs of the other commands may rewrite the cache in the meantime
+    keep_index_fresh(all_package_names, max_age)
+    try:
+        serve(all_package_names)
+    except DaemonError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+def run_batch(args, client=None):
+    """
+    Checks all names from a file or stdin and writes the results to stdout,
+    on the daemon if there is a `client` for one.
+    """
+    if args.from_file == "-":
+        names = read_names(sys.stdin)
+    else:
+        with open(args.from_file, encoding="utf-8") as f:
+            names = read_names(f)
+    if not names:
+        print("No names to check.", file=sys.stderr)
+        return
+
+    matcher = args.matcher if args.close_matches else None
+    if client is not None:
+        results = check_names_with_daemon(names,
+                                          client,
+                                          workers=args.workers,
+                                          matcher=matcher,
+                                          max_distance=args.max_distance)
+    else:
+        all_package_names = get_all_package_names(refresh=args.refresh, max_age=args.max_cache_age * 3600,
+                                                  in_background=False)
+        if not all_package_names:
+            print("Could not retrieve any package names. Exiting.", file=sys.stderr)
+            return
+        results = check_names(names,
+                              all_package_names,
+                              workers=args.workers,
+                              matcher=matcher,
+                              max_distance=args.max_distance)
+    count = write_results(results, sys.stdout, output_format=args.format)
+    print(f"Checked {count} names.", file=sys.stderr)
+
+def run_suggest(args, client=None):
+    """
+    Prints the free names around the seed, found by the daemon if there
+    is a `client` for one.
+    """
+    if client is not None:
+        suggestions = client.suggest(args.seed, count=args.count, verify=args.verify)
+    else:
+        all_package_names = get_all_package_names(refresh=args.refresh, max_age=args.max_cache_age * 3600,
+                                                  in_background=False)
+        if not all_package_names:
+            print("Could not retrieve any package names. Exiting.", file=sys.stderr)
+            return
+        suggestions = suggest_names(args.seed, all_package_names, count=args.count, verify=args.verify)
+    print_suggestions(args.seed, suggestions, console)
+
+def run_search(args, client=None):
+    """
+    Prints the names containing the query, or starting with it, searched
+    by the daemon if there is a `client` for one.
+    """
+    if client is not None:
+        count, names, sources = client.search(args.query, prefix=args.prefix, limit=args.limit)
+    else:
+        sources = get_all_package_names(refresh=args.refresh, max_age=args.max_cache_age * 3600,
+                                        in_background=False)
+        if not sources:
+            print("Could not retrieve any package names. Exiting.", file=sys.stderr)
+            return
+        count, names = search_package_names(args.query, sources, prefix=args.prefix, limit=args.limit)
+    print_search_results(args.query, args.prefix, count, names, sources, console)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
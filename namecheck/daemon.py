@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import signal
+import socket
+import threading
+import socketserver
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from platformdirs import user_cache_dir
+from namecheck.batch import BatchResult, check_name, DEFAULT_WORKERS
+from namecheck.suggest import Suggestion, suggest_names, DEFAULT_COUNT, DEFAULT_VERIFY
+from namecheck.utils import DIRECT_CHECK_DEADLINE, search_package_names
+from namecheck.render.utils import spinner
+from namecheck.timings import timings
+
+SOCKET_FILE = 'namecheck.sock'
+## a query can wait for every tier of the direct checks
+CLIENT_TIMEOUT = DIRECT_CHECK_DEADLINE + 30
+## a daemon that doesn't answer a ping within this isn't worth waiting for
+PING_TIMEOUT = 1
+
+
+class DaemonError(Exception):
+    """Raised when the daemon can't be reached or fails to answer a query."""
+
+
+def get_socket_path() -> str:
+    """
+    Returns the path of the daemon's socket, next to the cache.
+    """
+    return os.path.join(user_cache_dir('namecheck'), SOCKET_FILE)
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """
+    Answers the queries of one client connection: a JSON object per line
+    in, a JSON object per line out, until the client hangs up.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.answer(json.loads(line))
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class NameServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Keeps the package names (and with them the close match index, the
+    direct check cache and the browser) loaded, and answers availability
+    queries over a Unix socket. Every connection gets its own thread.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, all_names_with_sources):
+        self.socket_path = socket_path
+        self.all_names_with_sources = all_names_with_sources
+        super().__init__(socket_path, QueryHandler)
+
+    def answer(self, query: dict) -> dict:
+        op = query.get('op')
+        if op == 'ping':
+            return {'ok': True, 'names': len(self.all_names_with_sources)}
+        if op == 'check':
+            result = check_name(query['name'],
+                                self.all_names_with_sources,
+                                deadline=query.get('deadline', DIRECT_CHECK_DEADLINE),
+                                matcher=query.get('matcher'),
+                                max_distance=query.get('max_distance', 2))
+            ## the client has no index, send along where the matches are found
+            match_sources = {match: self.all_names_with_sources[match]
+                             for match in result.similar_to + result.close_matches + result.sound_alikes}
+            return {'ok': True, 'result': asdict(result), 'match_sources': match_sources}
+        if op == 'suggest':
+            suggestions = suggest_names(query['seed'],
+                                        self.all_names_with_sources,
+                                        count=query.get('count', DEFAULT_COUNT),
+                                        verify=query.get('verify', DEFAULT_VERIFY),
+                                        deadline=query.get('deadline', DIRECT_CHECK_DEADLINE))
+            return {'ok': True, 'suggestions': [asdict(suggestion) for suggestion in suggestions]}
+        if op == 'search':
+            count, names = search_package_names(query['query'],
+                                                self.all_names_with_sources,
+                                                prefix=query.get('prefix', False),
+                                                limit=query.get('limit'))
+            sources = {name: self.all_names_with_sources[name] for name in names}
+            return {'ok': True, 'count': count, 'names': names, 'sources': sources}
+        raise ValueError(f"unknown query {op!r}")
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class DaemonClient:
+    """
+    Sends queries to a running daemon. Every query opens its own
+    connection, so a client can be shared between threads.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = CLIENT_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def request(self, query: dict, timeout: float = None) -> dict:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout or self.timeout)
+                sock.connect(self.socket_path)
+                sock.sendall(json.dumps(query).encode('utf-8') + b'\n')
+                with sock.makefile('rb') as f:
+                    line = f.readline()
+        except OSError as e:
+            raise DaemonError(f"could not reach the daemon: {e}") from e
+        if not line:
+            raise DaemonError("the daemon hung up without answering")
+        try:
+            response = json.loads(line)
+        except ValueError as e:
+            raise DaemonError(f"the daemon sent an invalid answer: {e}") from e
+        if not response.get('ok'):
+            raise DaemonError(response.get('error', 'unknown error'))
+        return response
+
+    def ping(self) -> bool:
+        try:
+            self.request({'op': 'ping'}, timeout=PING_TIMEOUT)
+            return True
+        except DaemonError:
+            return False
+
+    def check(self, name: str, matcher: str = None, max_distance: int = 2) -> tuple[BatchResult, dict[str, int]]:
+        """
+        Checks a name on the daemon, see `check_name`.
+        Returns the result and the source bitmasks of its close matches.
+        """
+        response = self.request({'op': 'check', 'name': name, 'matcher': matcher, 'max_distance': max_distance})
+        return BatchResult(**response['result']), response['match_sources']
+
+    def search(self, query: str, prefix: bool = False, limit: int = None) -> tuple[int, list[str], dict[str, int]]:
+        """
+        Searches the names on the daemon, see `search_package_names`.
+        Also returns the source bitmasks of the names found.
+        """
+        response = self.request({'op': 'search', 'query': query, 'prefix': prefix, 'limit': limit})
+        return response['count'], response['names'], response['sources']
+
+    def suggest(self, seed: str, count: int = DEFAULT_COUNT, verify: int = DEFAULT_VERIFY) -> list[Suggestion]:
+        """
+        Suggests free names around a seed on the daemon, see `suggest_names`.
+        """
+        response = self.request({'op': 'suggest', 'seed': seed, 'count': count, 'verify': verify})
+        return [Suggestion(**suggestion) for suggestion in response['suggestions']]
+
+
+def connect_to_daemon(socket_path: str = None):
+    """
+    Returns a client for the running daemon, None if there is none.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    socket_path = socket_path or get_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+    client = DaemonClient(socket_path)
+    return client if client.ping() else None
+
+@spinner("Checking...")
+def get_name_availability_from_daemon(name: str, client: DaemonClient, matcher: str = 'ratio', max_distance: int = 2,
+                                      update_spinner=None) -> tuple[bool, list[str], list[str], list[str], dict[str, int]]:
+    """
+    Same as `get_name_availability`, answered by the daemon. Also returns
+    the sound-alikes and the source bitmasks of all matches, for rendering them.
+    """
+    with timings.phase('daemon query'):
+        result, match_sources = client.check(name, matcher=matcher, max_distance=max_distance)
+    ## the colliding names come first, like `get_name_availability` lists them
+    close_matches = result.similar_to + [match for match in result.close_matches if match not in result.similar_to]
+    return result.available, result.taken_sources, close_matches, result.sound_alikes, match_sources
+
+def check_names_with_daemon(names, client: DaemonClient, workers: int = DEFAULT_WORKERS,
+                            matcher: str = None, max_distance: int = 2):
+    """
+    Same as `check_names`, but every name is checked by the daemon.
+    Yields the results in completion order.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(client.check, name, matcher, max_distance) for name in names]
+        try:
+            for future in as_completed(futures):
+                result, _ = future.result()
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+
+def serve(all_names_with_sources, socket_path: str = None):
+    """
+    Answers queries on the daemon socket until interrupted.
+    Refuses to start if another daemon is already answering on it.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise DaemonError("the daemon needs Unix sockets, which this platform doesn't have")
+    socket_path = socket_path or get_socket_path()
+    if os.path.exists(socket_path):
+        if DaemonClient(socket_path).ping():
+            raise DaemonError(f"a daemon is already running on {socket_path}")
+        ## left behind by a daemon that didn't shut down cleanly
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+
+    server = NameServer(socket_path, all_names_with_sources)
+    if threading.current_thread() is threading.main_thread():
+        ## stopped by a service manager, shut down like on ctrl-c
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"Serving {len(all_names_with_sources)} package names on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,582 @@
+import os
+import re
+import sys
+import glob
+import json
+import mmap
+import time
+import struct
+import unicodedata
+from array import array
+from collections.abc import Mapping, ItemsView
+from namecheck.phonetic import phonetic_key
+from namecheck.matching import Q, NgramIndex, build_postings
+from namecheck.bloom import BloomFilter, BloomFormatError
+
+## on-disk layout of the package name index:
+##   MAGIC | u32 header size | JSON header | sections...
+## the header lists the sources and the (offset, size) of every section:
+##   offsets: u32[count + 1], start of every name in the names blob
+##   names:   all names, utf-8 encoded and sorted, back to back
+##   lines:   the names again, each after a newline, for the substring search
+##   sources: u8[count], bitmask of the sources every name is found on,
+##            bit i standing for the i-th source listed in the header
+## and for every kind of secondary key (see `KEY_SECTIONS`), e.g. 'similar':
+##   similar_offsets, similar_keys: the key of every name, laid out like the
+##            names and sorted by key
+##   similar_targets: u32[count], position of the name every key belongs to
+## and for the close matches (see `NgramIndex`):
+##   lengths: u16[count], length of every name in characters
+##   length_order: u32[count], positions of the names sorted by length
+##   ngram_offsets, ngram_keys: the q-grams of the names, laid out like the
+##            names and sorted
+##   ngram_starts: u32[grams + 1], start of the postings of every q-gram
+##   ngram_postings: u32[], positions of the names containing every q-gram
+## the names are PEP 503 normalized when they're fetched, see `normalize_name`
+## next to the index, every source can have a Bloom filter of the similar keys
+## of its names (see `filter_path`), tagged with the generation of the index
+## they were written with, so a filter outliving its index is never trusted
+MAGIC = b'NCINDEX\0'
+FORMAT_VERSION = 5
+ALIGNMENT = 8
+## no write takes this long, an older temporary file is left over from a killed one
+STALE_TMP_AGE = 3600
+## the secondary keys names are looked up by: the ultranormalized names PyPI
+## checks new projects against, and the sound-alike keys of the names
+KEY_SECTIONS = ('similar', 'phonetic')
+
+
+class IndexFormatError(ValueError):
+    """Raised when an index file is not in a format we can read."""
+
+
+def normalize_name(name: str) -> str:
+    """
+    PEP 503 normalized form of a name, 'My_Package' and 'my-package' are
+    the same project on the indexes.
+    """
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+def ultranormalize_name(name: str) -> str:
+    """
+    Collapses a name the way PyPI does when it looks for names that are too
+    similar to an existing project: separators are dropped and the look-alike
+    'o', 'l' and 'i' are folded into '0' and '1'. PyPI rejects a new project
+    whose ultranormalized name is taken, so 'f00bar' collides with 'foo-bar'.
+    """
+    if not name.isascii():
+        name = unicodedata.normalize('NFKC', name)
+    name = name.lower().replace('o', '0').replace('l', '1').replace('i', '1')
+    return name.replace('-', '').replace('_', '').replace('.', '')
+
+def _pack_names(raw_names) -> tuple[bytes, bytes]:
+    """
+    Lays out encoded names as an offsets section and a names blob.
+    """
+    offsets = array('I', [0])
+    for raw in raw_names:
+        offsets.append(offsets[-1] + len(raw))
+    return offsets.tobytes(), b''.join(raw_names)
+
+def _key_sections(section: str, keys) -> dict[str, bytes]:
+    """
+    Lays out the secondary keys of the names, given in name order, sorted
+    by key and pointing back to their names.
+    """
+    ordered = sorted((key.encode('utf-8'), i) for i, key in enumerate(keys))
+    offsets, blob = _pack_names([key for key, _ in ordered])
+    return {
+        f'{section}_offsets': offsets,
+        f'{section}_keys': blob,
+        f'{section}_targets': array('I', [i for _, i in ordered]).tobytes(),
+    }
+
+def _ngram_sections(names: list[str]) -> dict[str, bytes]:
+    """
+    Lays out the n-gram postings of the names, and their lengths.
+    """
+    ## no name comes near 65535 characters, the clamp only keeps the write from failing
+    lengths = array('H', [min(len(name), 0xffff) for name in names])
+    postings = sorted((key.encode('utf-8'), posting) for key, posting in build_postings(names).items())
+    offsets, blob = _pack_names([key for key, _ in postings])
+    starts = array('I', [0])
+    for _, posting in postings:
+        starts.append(starts[-1] + len(posting))
+    return {
+        'lengths': lengths.tobytes(),
+        'length_order': array('I', sorted(range(len(names)), key=lengths.__getitem__)).tobytes(),
+        'ngram_offsets': offsets,
+        'ngram_keys': blob,
+        'ngram_starts': starts.tobytes(),
+        'ngram_postings': b''.join(posting.tobytes() for _, posting in postings),
+    }
+
+def _align(position: int) -> int:
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def remove_stale_tmp_files(path: str, max_age: float = STALE_TMP_AGE) -> int:
+    """
+    Removes the temporary files of writes to `path` that were killed before
+    moving them into place, if older than `max_age` seconds.
+    Returns how many were removed.
+    """
+    removed = 0
+    now = time.time()
+    for tmp_path in glob.glob(f'{glob.escape(path)}.*.tmp'):
+        try:
+            if now - os.path.getmtime(tmp_path) >= max_age:
+                os.remove(tmp_path)
+                removed += 1
+        except OSError:
+            ## another process got to it first
+            pass
+    return removed
+
+def filter_path(path: str, source_name: str) -> str:
+    """
+    Path of the Bloom filter of a source, next to the index at `path`.
+    """
+    return f'{os.path.splitext(path)[0]}.{source_name.lower()}.bloom'
+
+def write_index(path: str, package_names, source_names: list[str], filters: bool = False):
+    """
+    Writes a mapping of package names to source bitmasks as an index file.
+    The file is written next to `path` first and then moved into place, so
+    readers never see a half written index. With `filters`, a Bloom filter
+    of every source is written next to it, see `PackageIndex`.
+    """
+    if len(source_names) > 8:
+        raise ValueError("the index can only hold up to 8 sources")
+    for written_path in (path, *(filter_path(path, source_name) for source_name in source_names)):
+        remove_stale_tmp_files(written_path)
+    encoded = sorted((name.encode('utf-8'), mask) for name, mask in package_names.items())
+    offsets, blob = _pack_names([raw for raw, _ in encoded])
+    masks = bytes(mask for _, mask in encoded)
+
+    sections = {'offsets': offsets, 'names': blob, 'sources': masks}
+    ## a search can't tell where a name ends in the blob, but a regex can't run past a newline
+    sections['lines'] = b'\n' + b''.join(raw + b'\n' for raw, _ in encoded)
+    ## the secondary keys are computed once here, looking a name up by one
+    ## is then a binary search like any other lookup
+    names = [raw.decode('utf-8') for raw, _ in encoded]
+    similar_keys = [ultranormalize_name(name) for name in names]
+    sections.update(_key_sections('similar', similar_keys))
+    ## names share most of their words, so do their word keys
+    word_keys = {}
+    sections.update(_key_sections('phonetic', (phonetic_key(name, word_keys) for name in names)))
+    ## the close matches start from the postings, building them is the
+    ## slowest part of a write but saves every launch from doing it
+    sections.update(_ngram_sections(names))
+    header = {
+        'version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'count': len(encoded),
+        'sources': list(source_names),
+        'generation': os.urandom(8).hex(),
+        'sections': {},
+    }
+    if filters:
+        ## a crash between the filters and the index leaves filters of
+        ## another generation behind, which are then ignored
+        for bit, source_name in enumerate(source_names):
+            keys = [key for key, (_, mask) in zip(similar_keys, encoded) if mask & (1 << bit)]
+            meta = {'generation': header['generation'], 'source': source_name}
+            BloomFilter.build(keys, len(keys), meta=meta).write(filter_path(path, source_name))
+    ## the section positions depend on the header size, which depends on the
+    ## positions, so reserve enough room for the header before placing them
+    header_room = _align(len(json.dumps(header)) + 64 * len(sections) + 64)
+    position = len(MAGIC) + 4 + header_room
+    for section_name, data in sections.items():
+        header['sections'][section_name] = [position, len(data)]
+        position = _align(position + len(data))
+    header_bytes = json.dumps(header).encode('utf-8').ljust(header_room)
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', header_room))
+        f.write(header_bytes)
+        for section_name, data in sections.items():
+            f.seek(header['sections'][section_name][0])
+            f.write(data)
+        ## empty sections at the end still have to lie within the file
+        f.truncate(position)
+    os.replace(tmp_path, path)
+
+
+class PackageIndex(Mapping):
+    """
+    Read-only mapping of package names to the bitmask of the sources they're
+    found on, backed by a memory-mapped index file written with `write_index`.
+    Lookups are a binary search over the sorted names, so opening the index
+    is near-instant and only the touched pages are ever read from disk.
+    When the Bloom filters of all sources were written with the index,
+    names that are in none of them are answered without a binary search:
+    missing from the index and without similar names, so the common check
+    of a free name touches a few pages of the filters only.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._filters = []
+        self._views = []
+        with open(path, 'rb') as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise IndexFormatError(f"{path} is empty") from e
+        try:
+            self._read_header()
+        except Exception:
+            self._release()
+            raise
+
+    def _read_header(self):
+        mm = self._mm
+        if mm[:len(MAGIC)] != MAGIC:
+            raise IndexFormatError(f"{self.path} is not a package name index")
+        try:
+            (header_size,) = struct.unpack('<I', mm[len(MAGIC):len(MAGIC) + 4])
+            header_start = len(MAGIC) + 4
+            header = json.loads(mm[header_start:header_start + header_size])
+        except (struct.error, ValueError) as e:
+            raise IndexFormatError(f"{self.path} has a corrupted header") from e
+        if not isinstance(header, dict):
+            raise IndexFormatError(f"{self.path} has a corrupted header")
+        if header.get('version') != FORMAT_VERSION or header.get('byteorder') != sys.byteorder:
+            raise IndexFormatError(f"{self.path} was written in an incompatible format")
+        try:
+            self._read_sections(header)
+        except IndexFormatError:
+            raise
+        except (KeyError, TypeError, ValueError) as e:
+            raise IndexFormatError(f"{self.path} has a corrupted header") from e
+
+    def _read_sections(self, header: dict):
+        sections = header['sections']
+        for offset, size in sections.values():
+            if offset + size > len(self._mm):
+                raise IndexFormatError(f"{self.path} is truncated")
+
+        self.source_names = header['sources']
+        self._count = header['count']
+        self._generation = header.get('generation')
+        self._offsets = self._section_view(sections['offsets'], 'I')
+        self._names_start = sections['names'][0]
+        self._lines = sections['lines']
+        self._sources_start = sections['sources'][0]
+        self._key_sections = {
+            section: (self._section_view(sections[f'{section}_offsets'], 'I'),
+                      sections[f'{section}_keys'][0],
+                      self._section_view(sections[f'{section}_targets'], 'I'))
+            for section in KEY_SECTIONS
+        }
+        self._lengths = self._section_view(sections['lengths'], 'H')
+        self._length_order = self._section_view(sections['length_order'], 'I')
+        self._ngram_offsets = self._section_view(sections['ngram_offsets'], 'I')
+        self._ngram_keys_start = sections['ngram_keys'][0]
+        self._ngram_starts = self._section_view(sections['ngram_starts'], 'I')
+        self._ngram_postings = self._section_view(sections['ngram_postings'], 'I')
+
+    def _section_view(self, section, fmt: str) -> memoryview:
+        offset, size = section
+        view = memoryview(self._mm)[offset:offset + size].cast(fmt)
+        self._views.append(view)
+        return view
+
+    def _release(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mm.close()
+
+    def load_filters(self) -> bool:
+        """
+        Opens the Bloom filters written with the index, returns whether
+        they're used: only when every source has one of this generation.
+        """
+        filters = []
+        for source_name in self.source_names:
+            try:
+                bloom = BloomFilter.load(filter_path(self.path, source_name))
+            except (BloomFormatError, OSError):
+                break
+            if self._generation is None or bloom.meta.get('generation') != self._generation:
+                bloom.close()
+                break
+            filters.append(bloom)
+        else:
+            self._filters = filters
+            return True
+        for bloom in filters:
+            bloom.close()
+        return False
+
+    def _may_contain(self, name: str) -> bool:
+        """
+        False when the filters rule out `name` and every name too similar
+        to it, True when the index has to be searched.
+        """
+        if not self._filters:
+            return True
+        key = ultranormalize_name(name)
+        return any(key in bloom for bloom in self._filters)
+
+    def close(self):
+        """
+        Releases the memory map, and the ones of the filters.
+        """
+        for bloom in self._filters:
+            bloom.close()
+        self._filters = []
+        self._release()
+
+    def _raw_name(self, i: int) -> bytes:
+        start = self._names_start
+        return self._mm[start + self._offsets[i]:start + self._offsets[i + 1]]
+
+    def _names_with_key(self, section: str, key: str) -> list[str]:
+        """
+        Returns the names whose secondary key of the given kind is `key`,
+        in order.
+        """
+        offsets, start, targets = self._key_sections[section]
+        def key_at(i: int) -> bytes:
+            return self._mm[start + offsets[i]:start + offsets[i + 1]]
+
+        raw = key.encode('utf-8')
+        i = self._bisect(raw, key_at)
+        names = []
+        while i < self._count and key_at(i) == raw:
+            names.append(self._raw_name(targets[i]).decode('utf-8'))
+            i += 1
+        return names
+
+    def _bisect(self, raw, key_at, count: int = None) -> int:
+        """
+        Returns the first position whose key is not below `raw`, out of
+        `count` (all names by default).
+        """
+        lo, hi = 0, self._count if count is None else count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key_at(mid) < raw:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find(self, raw: bytes) -> int:
+        """
+        Returns the position of a utf-8 encoded name, -1 if it isn't indexed.
+        """
+        i = self._bisect(raw, self._raw_name)
+        if i < self._count and self._raw_name(i) == raw:
+            return i
+        return -1
+
+    def ngram_posting(self, key: str):
+        """
+        Returns the positions of the names containing the q-gram `key`,
+        None if there are none.
+        """
+        offsets, start = self._ngram_offsets, self._ngram_keys_start
+        def key_at(i: int) -> bytes:
+            return self._mm[start + offsets[i]:start + offsets[i + 1]]
+
+        raw = key.encode('utf-8')
+        count = len(offsets) - 1
+        i = self._bisect(raw, key_at, count)
+        if i == count or key_at(i) != raw:
+            return None
+        return self._ngram_postings[self._ngram_starts[i]:self._ngram_starts[i + 1]]
+
+    def ids_with_length(self, length: int):
+        """
+        Returns the positions of the names of the given length.
+        """
+        lengths, order = self._lengths, self._length_order
+        def length_at(i: int) -> int:
+            return lengths[order[i]]
+
+        return order[self._bisect(length, length_at):self._bisect(length + 1, length_at)]
+
+    def ngram_index(self) -> 'MappedNgramIndex':
+        """
+        Returns the n-gram index of the names, read from the index file.
+        """
+        return MappedNgramIndex(self)
+
+    def similar_names(self, name: str) -> list[str]:
+        """
+        Returns the indexed names PyPI considers too similar to `name`,
+        i.e. with the same ultranormalized form. Includes `name` itself if
+        it's indexed.
+        """
+        if not self._may_contain(name):
+            return []
+        return self._names_with_key('similar', ultranormalize_name(name))
+
+    def sound_alikes(self, name: str) -> list[str]:
+        """
+        Returns the indexed names with the same sound-alike key as `name`
+        (see `phonetic_key`), including `name` itself if it's indexed.
+        """
+        key = phonetic_key(name)
+        return self._names_with_key('phonetic', key) if key else []
+
+    def starting_with(self, prefix: str, limit: int = None) -> tuple[int, list[str]]:
+        """
+        Returns how many indexed names start with `prefix`, and the first
+        `limit` of them (all with None). The names are sorted, so they're
+        the range between two binary searches.
+        """
+        raw = prefix.encode('utf-8')
+        lo = self._bisect(raw, self._raw_name)
+        ## no utf-8 encoded name contains 0xff, so this sorts after every name with the prefix
+        hi = self._bisect(raw + b'\xff', self._raw_name)
+        stop = hi if limit is None else min(hi, lo + limit)
+        return hi - lo, [self._raw_name(i).decode('utf-8') for i in range(lo, stop)]
+
+    def containing(self, substring: str, limit: int = None) -> tuple[int, list[str]]:
+        """
+        Returns how many indexed names contain `substring`, and the first
+        `limit` of them (all with None). The lines section is searched with
+        a regex, every match runs to the end of its line, so a name counts
+        once however often the substring is in it.
+        """
+        raw = substring.encode('utf-8')
+        if not raw:
+            return self.starting_with('', limit)
+        if b'\n' in raw:
+            return 0, []
+        mm = self._mm
+        offset, size = self._lines
+        ## the empty group keeps findall from copying the matches
+        pattern = re.compile(re.escape(raw) + rb'[^\n]*()')
+        count = len(pattern.findall(mm, offset, offset + size))
+        names = []
+        for match in pattern.finditer(mm, offset, offset + size):
+            if limit is not None and len(names) >= limit:
+                break
+            line_start = mm.rfind(b'\n', offset, match.start()) + 1
+            names.append(mm[line_start:match.end()].decode('utf-8'))
+        return count, names
+
+    def __getitem__(self, name: str) -> int:
+        if not isinstance(name, str) or not self._may_contain(name):
+            raise KeyError(name)
+        i = self._find(name.encode('utf-8'))
+        if i < 0:
+            raise KeyError(name)
+        return self._mm[self._sources_start + i]
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and self._may_contain(name) and self._find(name.encode('utf-8')) >= 0
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self._raw_name(i).decode('utf-8')
+
+    def items(self) -> ItemsView:
+        return PackageIndexItems(self)
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class PackageIndexItems(ItemsView):
+    """
+    The (name, sources bitmask) pairs of a `PackageIndex`, iterated in one
+    pass over the names and their masks instead of a search per name.
+    """
+
+    def __iter__(self):
+        index = self._mapping
+        mm, offsets = index._mm, index._offsets
+        names_start, sources_start = index._names_start, index._sources_start
+        for i in range(index._count):
+            yield mm[names_start + offsets[i]:names_start + offsets[i + 1]].decode('utf-8'), mm[sources_start + i]
+
+
+class MappedNgramIndex(NgramIndex):
+    """
+    `NgramIndex` over the postings written with a `PackageIndex`, nothing
+    is built or loaded, the names and postings are read where they're used.
+    """
+
+    def __init__(self, index: PackageIndex):
+        self.q = Q
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def posting(self, key: str):
+        return self._index.ngram_posting(key)
+
+    def name(self, i: int) -> str:
+        return self._index._raw_name(i).decode('utf-8')
+
+    def name_length(self, i: int) -> int:
+        return self._index._lengths[i]
+
+    def ids_with_length(self, length: int):
+        return self._index.ids_with_length(length)
+
+
+class SwappableIndex(Mapping):
+    """
+    Read-only mapping that forwards to another one, which can be replaced
+    while it's in use, e.g. by a fresher index built in the background.
+    Every lookup goes to a single mapping, the swap is a plain assignment.
+    `version` goes up with every swap, so derived data can be rebuilt.
+    """
+
+    def __init__(self, package_names):
+        self._package_names = package_names
+        self.version = 0
+
+    def swap(self, package_names):
+        """
+        Replaces the mapping. The old one is left open, lookups that are
+        still running on it finish on the old names.
+        """
+        self._package_names = package_names
+        self.version += 1
+
+    @property
+    def source_names(self) -> list[str]:
+        return self._package_names.source_names
+
+    def similar_names(self, name: str) -> list[str]:
+        return self._package_names.similar_names(name)
+
+    def sound_alikes(self, name: str) -> list[str]:
+        return self._package_names.sound_alikes(name)
+
+    def starting_with(self, prefix: str, limit: int = None) -> tuple[int, list[str]]:
+        return self._package_names.starting_with(prefix, limit)
+
+    def containing(self, substring: str, limit: int = None) -> tuple[int, list[str]]:
+        return self._package_names.containing(substring, limit)
+
+    def ngram_index(self) -> NgramIndex:
+        if hasattr(self._package_names, 'ngram_index'):
+            return self._package_names.ngram_index()
+        return NgramIndex(self._package_names.keys())
+
+    def __getitem__(self, name: str) -> int:
+        return self._package_names[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self._package_names
+
+    def __iter__(self):
+        return iter(self._package_names)
+
+    def items(self) -> ItemsView:
+        return self._package_names.items()
+
+    def __len__(self) -> int:
+        return len(self._package_names)
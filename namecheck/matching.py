@@ -0,0 +1,269 @@
+import threading
+from array import array
+from collections import Counter, defaultdict
+from namecheck.timings import timings
+
+## bigrams: unlike trigrams they still give a useful lower bound on the
+## number of shared grams for long names at difflib's default cutoffs
+Q = 2
+## pads the names so their first and last characters get grams of their own
+PAD_START = '\x02'
+PAD_END = '\x03'
+## the close match strategies selectable from the cli
+MATCHERS = ('ratio', 'edit')
+## slack for the float comparisons, the bounds must never be too strict
+EPSILON = 1e-9
+
+
+def ngram_keys(name: str, q: int = Q) -> list[str]:
+    """
+    Returns the padded q-grams of a name. Repeated grams are numbered by
+    their occurrence ('ab', 'ab1', 'ab2', ...) so shared grams are counted
+    with multiplicity.
+    """
+    padded = PAD_START * (q - 1) + name + PAD_END * (q - 1)
+    keys = [padded[i:i + q] for i in range(len(padded) - q + 1)]
+    if len(set(keys)) == len(keys):
+        return keys
+    seen = Counter()
+    for i, gram in enumerate(keys):
+        if seen[gram]:
+            keys[i] = f'{gram}{seen[gram]}'
+        seen[gram] += 1
+    return keys
+
+def min_shared_grams(len_a: int, len_b: int, max_edits: int, q: int = Q, grams_per_edit: int = Q) -> int:
+    """
+    Lower bound on the number of padded q-grams two names of the given
+    lengths share if they're at most `max_edits` edits apart, where every
+    edit can destroy at most `grams_per_edit` grams (q for insertions,
+    deletions and substitutions, q + 1 for adjacent transpositions).
+    """
+    return max(len_a, len_b) + q - 1 - grams_per_edit * max_edits
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance between two names: insertions,
+    deletions, substitutions and transpositions of adjacent characters
+    all count as one edit, so 'reqeusts' is one edit away from 'requests'.
+    Gives up early and returns max_distance + 1 once it's exceeded.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        char_a = a[i - 1]
+        for j in range(1, len(b) + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)
+            current[j] = value
+        ## no cell of a later row can get below the minimum of this one
+        if min(current) > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+def build_postings(names, q: int = Q) -> dict[str, array]:
+    """
+    Maps every q-gram to the positions of the names containing it, in order.
+    """
+    postings = defaultdict(lambda: array('I'))
+    for i, name in enumerate(names):
+        for key in ngram_keys(name, q):
+            postings[key].append(i)
+    return dict(postings)
+
+
+class NgramIndex:
+    """
+    Inverted index from q-grams to the names containing them.
+    Used to narrow the full list of names down to the few candidates that
+    can possibly be close to a query, before running the exact scoring.
+    Names are referred to by their position, subclasses can keep the
+    names and postings elsewhere (see `MappedNgramIndex`).
+    """
+
+    def __init__(self, names, q: int = Q):
+        self.q = q
+        self.names = list(names)
+        self.postings = build_postings(self.names, q)
+        self._names_by_length = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def posting(self, key: str):
+        """
+        Returns the positions of the names containing the q-gram `key`,
+        None if there are none.
+        """
+        return self.postings.get(key)
+
+    def name(self, i: int) -> str:
+        return self.names[i]
+
+    def name_length(self, i: int) -> int:
+        return len(self.names[i])
+
+    def ids_with_length(self, length: int):
+        """
+        Returns the positions of the names of the given length.
+        """
+        return self.names_by_length().get(length, ())
+
+    def count_shared(self, name: str) -> Counter:
+        """
+        Counts the q-grams every indexed name shares with `name`.
+        Names sharing none are left out.
+        """
+        counts = Counter()
+        for key in ngram_keys(name, self.q):
+            posting = self.posting(key)
+            if posting is not None:
+                counts.update(posting)
+        return counts
+
+    def ratio_candidates(self, name: str, cutoff: float):
+        """
+        Returns the names that can have a difflib ratio of at least `cutoff`
+        with `name`, or None if the q-gram bound can't rule anything out and
+        all names have to be scored.
+
+        difflib's ratio is 2*M/T with M matched characters out of T in total,
+        so ratio >= cutoff allows at most (1 - cutoff) * T insertions and
+        deletions, which bounds the number of grams the names must share.
+        """
+        len_a = len(name)
+        if cutoff <= 0:
+            return None
+        min_shared = {}
+        for len_b in range(int(len_a * (2 - cutoff) / cutoff) + 2):
+            ## even a perfect overlap can't reach the cutoff at this length
+            if 2 * min(len_a, len_b) + EPSILON < cutoff * (len_a + len_b):
+                continue
+            max_edits = int((1 - cutoff) * (len_a + len_b) + EPSILON)
+            min_shared[len_b] = min_shared_grams(len_a, len_b, max_edits, self.q)
+        if not min_shared or min(min_shared.values()) <= 0:
+            return None
+        return self._shared_enough(name, min_shared)
+
+    def _shared_enough(self, name: str, min_shared: dict[int, int]) -> list[str]:
+        """
+        Returns the names sharing at least as many q-grams with `name` as
+        `min_shared` asks for at their length.
+        """
+        name_at, name_length = self.name, self.name_length
+        candidates = []
+        for i, shared in self.count_shared(name).items():
+            threshold = min_shared.get(name_length(i))
+            if threshold is not None and shared >= threshold:
+                candidates.append(name_at(i))
+        return candidates
+
+    def names_by_length(self) -> dict[int, list[int]]:
+        """
+        Groups the name ids by name length, built on first use.
+        """
+        if self._names_by_length is None:
+            names_by_length = defaultdict(list)
+            for i, name in enumerate(self.names):
+                names_by_length[len(name)].append(i)
+            self._names_by_length = dict(names_by_length)
+        return self._names_by_length
+
+    def edit_candidates(self, name: str, max_distance: int) -> list[str]:
+        """
+        Returns the names that can be within `max_distance` edits of `name`.
+        Lengths for which the q-gram bound is useless (short names) are
+        taken in full from the length buckets.
+        """
+        len_a = len(name)
+        min_shared = {}
+        unbounded_lengths = []
+        for len_b in range(max(len_a - max_distance, 0), len_a + max_distance + 1):
+            threshold = min_shared_grams(len_a, len_b, max_distance, self.q, grams_per_edit=self.q + 1)
+            if threshold > 0:
+                min_shared[len_b] = threshold
+            else:
+                unbounded_lengths.append(len_b)
+
+        candidates = self._shared_enough(name, min_shared) if min_shared else []
+        for len_b in unbounded_lengths:
+            candidates.extend(self.name(i) for i in self.ids_with_length(len_b))
+        return candidates
+
+
+## a single slot is enough, a session only ever works on one index
+_ngram_index_cache = (None, None, None)
+_ngram_index_lock = threading.Lock()
+
+def get_ngram_index(all_names_with_sources) -> NgramIndex:
+    """
+    Returns the n-gram index over the names of the given mapping.
+    The package index has the postings written with it, for other mappings
+    it's built on first use. Either is kept around for subsequent queries,
+    until the mapping changes size or its `version` goes up (see
+    `SwappableIndex`).
+    """
+    global _ngram_index_cache
+    version = getattr(all_names_with_sources, 'version', None)
+    with _ngram_index_lock:
+        mapping, mapping_version, ngram_index = _ngram_index_cache
+        if (mapping is not all_names_with_sources or mapping_version != version
+                or len(ngram_index) != len(all_names_with_sources)):
+            with timings.phase('n-gram index build'):
+                if hasattr(all_names_with_sources, 'ngram_index'):
+                    ngram_index = all_names_with_sources.ngram_index()
+                else:
+                    ngram_index = NgramIndex(all_names_with_sources.keys())
+            _ngram_index_cache = (all_names_with_sources, version, ngram_index)
+        return ngram_index
+
+def refresh_ngram_index(all_names_with_sources):
+    """
+    Rebuilds the n-gram index after the names of the mapping changed, but
+    only if one was built for it before.
+    """
+    with _ngram_index_lock:
+        mapping = _ngram_index_cache[0]
+    if mapping is all_names_with_sources:
+        get_ngram_index(all_names_with_sources)
+
+def warm_up_ngram_index(all_names_with_sources) -> threading.Thread:
+    """
+    Builds the n-gram index in a background thread, so it's (mostly) ready
+    by the time the first close match query comes in.
+    """
+    thread = threading.Thread(target=get_ngram_index, args=(all_names_with_sources,), daemon=True)
+    thread.start()
+    return thread
+
+def find_close_matches(name: str, all_names_with_sources, n: int = 5, cutoff: float = 0.8) -> list[str]:
+    """
+    Same results as `difflib.get_close_matches` over all names, but only
+    scores the candidates the n-gram index can't rule out.
+    """
+    import difflib
+    candidates = get_ngram_index(all_names_with_sources).ratio_candidates(name, cutoff)
+    if candidates is None:
+        candidates = all_names_with_sources.keys()
+    return difflib.get_close_matches(name, candidates, n=n, cutoff=cutoff)
+
+def find_edit_matches(name: str, all_names_with_sources, max_distance: int = 2, n: int = 5) -> list[str]:
+    """
+    Returns up to `n` names within `max_distance` edits of `name` (see
+    `edit_distance`), closest first. Catches typosquat-style neighbours
+    like 'reqeusts' or 'requets' that difflib's ratio ranks poorly.
+    """
+    candidates = get_ngram_index(all_names_with_sources).edit_candidates(name, max_distance)
+    scored = []
+    for candidate in candidates:
+        distance = edit_distance(name, candidate, max_distance)
+        if distance <= max_distance:
+            scored.append((distance, candidate))
+    return [candidate for _, candidate in sorted(scored)[:n]]
@@ -0,0 +1,113 @@
+import re
+import json
+from html import unescape
+
+## size of the chunks read from a streamed index response
+CHUNK_SIZE = 64 * 1024
+## project pages are scanned in smaller chunks, the markers come early
+PAGE_CHUNK_SIZE = 8 * 1024
+
+## the simple index is a flat list of `<a href="...">name</a>` lines, so a
+## regex over the raw bytes is enough and avoids building a DOM
+ANCHOR_PATTERN = re.compile(rb'<a\b[^>]*>([^<]*)</a\s*>', re.IGNORECASE)
+
+
+def decode_name(raw: bytes) -> str:
+    """
+    Decodes a raw anchor text into a package name.
+    """
+    name = raw.decode('utf-8', errors='replace').strip()
+    if '&' in name:
+        name = unescape(name)
+    return name
+
+def iter_names_from_html(chunks):
+    """
+    Yields the package names found in the anchors of a simple index page.
+    Reads the page chunk by chunk, only keeping the unfinished tail of the
+    previous chunk around, so the page is never materialized in memory.
+    """
+    buffer = b''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        end = 0
+        for match in ANCHOR_PATTERN.finditer(buffer):
+            name = decode_name(match.group(1))
+            if name:
+                yield name
+            end = match.end()
+
+        ## an unfinished anchor can only start at the last '<a' of the tail,
+        ## everything before it has been consumed already
+        tail = buffer[end:]
+        start = tail.lower().rfind(b'<a')
+        if start == -1:
+            start = len(tail) - 1 if tail.endswith(b'<') else len(tail)
+        buffer = tail[start:]
+
+## PEP 691 JSON index: `{"meta": {...}, "projects": [{"name": "..."}, ...]}`,
+## the only "name" keys in the document are the project names
+JSON_NAME_PATTERN = re.compile(rb'"name"\s*:\s*"((?:[^"\\]|\\.)*)"')
+JSON_NAME_KEY = b'"name"'
+
+def decode_json_name(raw: bytes) -> str:
+    """
+    Decodes a raw JSON string value into a package name.
+    """
+    if b'\\' in raw:
+        return json.loads(b'"' + raw + b'"')
+    return raw.decode('utf-8', errors='replace')
+
+def iter_names_from_json(chunks):
+    """
+    Yields the project names of a PEP 691 JSON index page, chunk by chunk,
+    without loading the whole document.
+    """
+    buffer = b''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        end = 0
+        for match in JSON_NAME_PATTERN.finditer(buffer):
+            name = decode_json_name(match.group(1))
+            if name:
+                yield name
+            end = match.end()
+
+        ## keep the last (possibly unfinished) "name" member, or enough
+        ## bytes to complete a key that was cut in half
+        tail = buffer[end:]
+        start = tail.rfind(JSON_NAME_KEY)
+        if start == -1:
+            start = max(len(tail) - len(JSON_NAME_KEY) + 1, 0)
+        buffer = tail[start:]
+
+## markers on a project page: the header/description of an existing project,
+## or the text of the "not found" page, whichever comes first decides
+PROJECT_PAGE_MARKERS = re.compile(
+    rb'(?P<taken>class="[^"]*\b(?:package-header|project-description)\b)'
+    rb'|(?P<missing>couldn(?:\'|&#39;|&#x27;|&apos;|\xe2\x80\x99)t find this page|>[^<]*not found)'
+)
+## bytes carried over between chunks, so markers cut in half are still found
+MARKER_OVERLAP = 256
+
+def scan_project_page(chunks):
+    """
+    Scans the chunks of a project page for the first decisive marker and
+    stops reading as soon as one is found.
+    Returns True if the project exists, False if the page says it doesn't
+    and None if the page has neither marker.
+    """
+    tail = b''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer = tail + chunk.lower()
+        match = PROJECT_PAGE_MARKERS.search(buffer)
+        if match:
+            return match.lastgroup == 'taken'
+        tail = buffer[-MARKER_OVERLAP:]
+    return None
@@ -0,0 +1,81 @@
+import re
+
+## a simplified Metaphone: every name is reduced to the consonant sounds it
+## is spoken with, so 'numpy' and 'numpie' or 'pillow' and 'pilo' share a key.
+## the keys of the whole index are computed on a fetch, so the rules are
+## plain string replacements and a translation table rather than regexes.
+## the codes put in are uppercase, later rules only look at lowercase letters
+DIGRAPHS = (
+    ('sch', 'SK'), ('tch', 'X'),
+    ('cia', 'Xia'), ('sia', 'Xia'), ('sio', 'Xio'), ('tia', 'Xia'), ('tio', 'Xio'),
+    ('ch', 'X'), ('sh', 'X'), ('th', '0'), ('ph', 'F'), ('ck', 'K'),
+    ('kn', 'N'), ('gn', 'N'), ('pn', 'N'), ('wr', 'R'), ('wh', 'W'),
+    ('dge', 'Je'), ('dgi', 'Ji'), ('dgy', 'Jy'), ('dj', 'J'),
+    ## a soft c or g, the vowel still decides about a w, h or y in front of it
+    ('ce', 'Se'), ('ci', 'Si'), ('cy', 'Sy'), ('ge', 'Je'), ('gi', 'Ji'), ('gy', 'Jy'),
+)
+VOWELS = 'aeiou'
+## w, h and y are only spoken in front of a vowel
+SPOKEN = tuple((letter + vowel, letter.upper() + vowel) for letter in 'why' for vowel in VOWELS)
+SILENT_GH = re.compile(r'gh(?![aeiou])')
+LETTERS = str.maketrans({
+    **dict.fromkeys('cgkq', 'K'), **dict.fromkeys('sz', 'S'), **dict.fromkeys('fv', 'F'),
+    **dict.fromkeys('dt', 'T'), 'x': 'KS',
+    ## the vowels and the unspoken w, h and y are dropped
+    **dict.fromkeys(VOWELS + 'why'),
+    ## the rest sounds like it's written
+    **{letter: letter.upper() for letter in 'bjlmnpr'},
+})
+LETTER_PAIRS = tuple((letter * 2, letter) for letter in 'abcdefghijklmnopqrstuvwxyz')
+CODE_PAIRS = tuple((code * 2, code) for code in '0123456789ABFHJKLMNPRSTWXY')
+WORD_SEPARATOR = re.compile(r'[^a-z0-9]+')
+
+
+def _collapse(text: str, pairs) -> str:
+    """
+    Collapses the runs of the characters of `pairs` into one.
+    """
+    for pair, single in pairs:
+        while pair in text:
+            text = text.replace(pair, single)
+    return text
+
+def _word_key(word: str) -> str:
+    """
+    Returns the consonant codes of a lowercase word, without the
+    leading vowel.
+    """
+    word = _collapse(word, LETTER_PAIRS)
+    for digraph, code in DIGRAPHS:
+        if digraph in word:
+            word = word.replace(digraph, code)
+    if 'gh' in word:
+        word = SILENT_GH.sub('', word).replace('gh', 'K')
+    if word.endswith('mb'):
+        word = word[:-1]
+    for pair, spoken in SPOKEN:
+        if pair in word:
+            word = word.replace(pair, spoken)
+    return word.translate(LETTERS)
+
+def phonetic_key(name: str, word_keys: dict = None) -> str:
+    """
+    Returns the sound-alike key of a name: the consonant sounds of its
+    words after Metaphone-style rules, with separators, vowels and doubled
+    letters dropped. A leading vowel is kept as 'A', digits as they are.
+    Package names reuse the same words a lot, pass a `word_keys` dict to
+    remember the keys of the words across many names.
+    """
+    words = [word for word in WORD_SEPARATOR.split(name.lower()) if word]
+    if not words:
+        return ''
+    if word_keys is None:
+        word_keys = {}
+    codes = []
+    for word in words:
+        code = word_keys.get(word)
+        if code is None:
+            code = word_keys[word] = _word_key(word)
+        codes.append(code)
+    lead = 'A' if words[0][0] in VOWELS else ''
+    return _collapse(lead + ''.join(codes), CODE_PAIRS)
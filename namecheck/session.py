@@ -0,0 +1,98 @@
+import atexit
+import threading
+from functools import cache
+
+## connections kept alive per host, also the most requests in flight to a
+## single host at any time, more threads wait for a free connection
+MAX_CONNECTIONS_PER_HOST = 16
+## number of hosts (PyPI, TestPyPI, ...) whose connection pools are kept
+MAX_HOSTS = 4
+## transient failures worth another try, with exponential backoff
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+## a server asking us to come back later than this is given up on instead
+MAX_RETRY_AFTER = 30
+
+
+## requests and urllib3 take a while to import, they're only imported
+## once the first request is made, so a warm start never loads them
+@cache
+def capped_retry_class():
+    """
+    Returns the retry policy class, which honors Retry-After but never waits
+    longer than `MAX_RETRY_AFTER` seconds for it.
+    """
+    from urllib3.util.retry import Retry
+
+    class CappedRetry(Retry):
+        def get_retry_after(self, response):
+            retry_after = super().get_retry_after(response)
+            if retry_after is None:
+                return None
+            return min(retry_after, MAX_RETRY_AFTER)
+
+    return CappedRetry
+
+def make_retry():
+    return capped_retry_class()(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        ## every request we make only reads, the XML-RPC calls included
+        allowed_methods=frozenset({'GET', 'HEAD', 'POST'}),
+        respect_retry_after_header=True,
+        ## hand the last response back instead of raising, the callers
+        ## decide what a 429 or 503 means for them
+        raise_on_status=False,
+    )
+
+
+class PooledSession:
+    """
+    The HTTP session shared by every request namecheck makes, so
+    connections (and their TLS handshakes) are reused across names, sources
+    and threads. Transient failures are retried with exponential backoff.
+    The underlying `requests.Session` is created on first use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=MAX_HOSTS,
+                                      pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+                                      pool_block=True,
+                                      max_retries=make_retry())
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
+
+    def get(self, url: str, **kwargs):
+        return self._get_session().get(url, **kwargs)
+
+    def head(self, url: str, **kwargs):
+        return self._get_session().head(url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self._get_session().post(url, **kwargs)
+
+    def close(self):
+        """
+        Closes all pooled connections. The next request opens new ones.
+        """
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+
+http_session = PooledSession()
+atexit.register(http_session.close)
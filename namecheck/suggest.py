@@ -0,0 +1,159 @@
+import re
+from itertools import zip_longest
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from namecheck.index import normalize_name, ultranormalize_name
+from namecheck.render.const import GREEN, BLUE
+from namecheck.utils import DIRECT_CHECK_DEADLINE, is_name_taken_project_url, basic_style
+from namecheck.timings import timings
+
+## words put in front of and after the seed, in order of preference
+PREFIXES = ('py', 'python', 'easy', 'simple', 'fast', 'tiny', 'smart', 'open', 'pure', 'super', 'the', 'my')
+SUFFIXES = ('py', 'lib', 'cli', 'tools', 'kit', 'utils', 'core', 'io', 'x', 'plus', 'api', 'sdk', 'client',
+            'lite', 'ng', 'next', 'pro', 'dev', 'app', 'hub', 'lab', 'box', 'hq', 'ify', '2', '3')
+## the separators that survive PEP 503 normalization
+SEPARATORS = ('-', '')
+## how much every kind of variation pushes a candidate down the ranking
+STEM_PENALTY = {'seed': 0, 'plural': 1, 'abbreviation': 2}
+AFFIX_PENALTY = 2
+JOINED_PENALTY = 1
+## how many of the best free candidates are shown, and checked directly
+DEFAULT_COUNT = 10
+DEFAULT_VERIFY = 5
+VALID_NAME = re.compile(r'^[a-z0-9]([a-z0-9-]*[a-z0-9])?$')
+
+
+@dataclass
+class Suggestion:
+    """
+    A candidate name that is free in the package index.
+    `verified` is True once its project urls were checked directly as
+    well, `taken_sources` then lists the sources it turned out to be on.
+    """
+    name: str
+    penalty: int
+    verified: bool = False
+    taken_sources: list[str] = field(default_factory=list)
+
+
+def split_words(seed: str) -> list[str]:
+    """
+    Splits a seed like 'My_Package' into its lowercased words.
+    """
+    return [word for word in re.split(r'[-_.\s]+', seed.lower()) if word]
+
+def abbreviations(word: str) -> list[str]:
+    """
+    Returns shorter forms of a word: its first letters, and the word
+    without its vowels.
+    """
+    if len(word) <= 4:
+        return []
+    short = [word[:3], word[:4], word[0] + re.sub(r'[aeiou]', '', word[1:])]
+    return [abbreviation for abbreviation in dict.fromkeys(short) if abbreviation != word]
+
+def plural_forms(word: str) -> list[str]:
+    """
+    Returns the plural of a word, or its singular if it looks plural already.
+    """
+    if word.endswith('ies') and len(word) > 4:
+        return [word[:-3] + 'y']
+    if word.endswith('s') and not word.endswith('ss'):
+        return [word[:-1]]
+    if word.endswith(('s', 'x', 'ch', 'sh')):
+        return [word + 'es']
+    if word.endswith('y') and word[-2:-1] not in ('a', 'e', 'i', 'o', 'u', ''):
+        return [word[:-1] + 'ies']
+    return [word + 's']
+
+def stems(words: list[str]) -> list[tuple[list[str], int]]:
+    """
+    Returns the word lists the candidates are built around, with their
+    penalty: the seed itself, its last word in plural or singular, and
+    every word abbreviated in turn (all of them at once to initials).
+    """
+    found = [(words, STEM_PENALTY['seed'])]
+    for plural in plural_forms(words[-1]):
+        found.append((words[:-1] + [plural], STEM_PENALTY['plural']))
+    for i, word in enumerate(words):
+        for abbreviation in abbreviations(word):
+            found.append((words[:i] + [abbreviation] + words[i + 1:], STEM_PENALTY['abbreviation']))
+    if len(words) > 1:
+        found.append(([''.join(word[0] for word in words)], STEM_PENALTY['abbreviation']))
+    return found
+
+def generate_candidates(seed: str) -> list[tuple[str, int]]:
+    """
+    Generates the variants of a seed, PEP 503 normalized: the seed with its
+    words joined with and without separators, pluralized and abbreviated,
+    and all of those with the usual prefixes and suffixes. Returns (name,
+    penalty) pairs, every name once with its lowest penalty, best first:
+    by penalty, then in the order of preference of the stems and affixes.
+    """
+    words = split_words(seed)
+    if not words:
+        return []
+    candidates = {}
+    def add(name: str, penalty: int):
+        name = normalize_name(name)
+        if VALID_NAME.match(name) and penalty < candidates.get(name, penalty + 1):
+            candidates[name] = penalty
+
+    for stem_words, stem_penalty in stems(words):
+        for separator in SEPARATORS:
+            penalty = stem_penalty + (JOINED_PENALTY if not separator and len(stem_words) > 1 else 0)
+            stem = separator.join(stem_words)
+            add(stem, penalty)
+            ## a suffix and a prefix of the same rank take turns
+            for suffix, prefix in zip_longest(SUFFIXES, PREFIXES):
+                if suffix:
+                    add(stem + separator + suffix, penalty + AFFIX_PENALTY)
+                if prefix:
+                    add(prefix + separator + stem, penalty + AFFIX_PENALTY)
+            for suffix in SUFFIXES:
+                for prefix in PREFIXES:
+                    add(prefix + separator + stem + separator + suffix, penalty + 2 * AFFIX_PENALTY)
+    ## the sort is stable, so the order of generation breaks the ties
+    return sorted(candidates.items(), key=lambda item: item[1])
+
+def find_free_names(candidates, all_names_with_sources) -> list:
+    """
+    Keeps the (name, penalty) candidates that are neither indexed nor too
+    similar to an indexed name (see `get_similar_names`), in their order.
+    """
+    if hasattr(all_names_with_sources, 'similar_names'):
+        return [(name, penalty) for name, penalty in candidates if not all_names_with_sources.similar_names(name)]
+    ## a plain mapping has no precomputed keys, collect them in one pass
+    taken_keys = {ultranormalize_name(name) for name in all_names_with_sources}
+    return [(name, penalty) for name, penalty in candidates if ultranormalize_name(name) not in taken_keys]
+
+def suggest_names(seed: str, all_names_with_sources, count: int = DEFAULT_COUNT, verify: int = DEFAULT_VERIFY,
+                  deadline: float = DIRECT_CHECK_DEADLINE) -> list[Suggestion]:
+    """
+    Suggests up to `count` names around a seed that are free in the package
+    index, best first. The best `verify` of them are also checked on the
+    project urls, concurrently, and dropped if they turn out to be taken.
+    """
+    with timings.phase('suggest candidates'):
+        free = find_free_names(generate_candidates(seed), all_names_with_sources)
+    suggestions = [Suggestion(name, penalty) for name, penalty in free[:count + verify]]
+
+    to_verify = suggestions[:verify]
+    if to_verify:
+        with ThreadPoolExecutor(max_workers=len(to_verify)) as executor:
+            taken = list(executor.map(lambda suggestion: is_name_taken_project_url(suggestion.name, deadline),
+                                      to_verify))
+        for suggestion, taken_sources in zip(to_verify, taken):
+            suggestion.verified = True
+            suggestion.taken_sources = taken_sources
+    return [suggestion for suggestion in suggestions if not suggestion.taken_sources][:count]
+
+def print_suggestions(seed: str, suggestions: list[Suggestion], console: Console):
+    if not suggestions:
+        console.print(f"No free names found around '{seed}'.", style=basic_style)
+        return
+    console.print(f"Free names around '{seed}':", style=basic_style)
+    for suggestion in suggestions:
+        checked = "checked on the project urls" if suggestion.verified else "not in the index"
+        console.print(f"   - [bold {GREEN}]{suggestion.name}[/] [{BLUE}]({checked})[/]", style=basic_style)
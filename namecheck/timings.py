@@ -0,0 +1,98 @@
+import sys
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+
+class Timings:
+    """
+    Collects how long every phase of a session took (cache load, index
+    fetch, direct checks, ...), for the cli's --timings breakdown.
+    Phases can be timed from any thread. Does nothing until enabled.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._phases = {}
+
+    def record(self, phase: str, seconds: float):
+        """
+        Adds a run of `seconds` to a phase.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            count, total, longest = self._phases.get(phase, (0, 0.0, 0.0))
+            self._phases[phase] = (count + 1, total + seconds, max(longest, seconds))
+
+    @contextmanager
+    def _timed(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start)
+
+    def phase(self, phase: str):
+        """
+        Context manager timing the code it wraps as a run of `phase`.
+        """
+        return self._timed(phase) if self.enabled else nullcontext()
+
+    def timed_iter(self, iterable, phase: str, consumer_phase: str = None):
+        """
+        Yields the items of `iterable`, timing the waits for the next item
+        as `phase` and, with a `consumer_phase`, the time spent on every
+        item in between. E.g. the download and the parse of a streamed index.
+        Returns the iterable untouched when disabled.
+        """
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(iter(iterable), phase, consumer_phase)
+
+    def _timed_iter(self, iterator, phase: str, consumer_phase: str):
+        waited = consumed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    waited += time.perf_counter() - start
+                suspended = time.perf_counter()
+                yield item
+                consumed += time.perf_counter() - suspended
+        finally:
+            self.record(phase, waited)
+            if consumer_phase:
+                self.record(consumer_phase, consumed)
+
+    def summary(self) -> list[tuple[str, int, float, float]]:
+        """
+        Returns (phase, runs, total seconds, longest run) for every phase,
+        in the order they first ran.
+        """
+        with self._lock:
+            return [(phase, *values) for phase, values in self._phases.items()]
+
+    def clear(self):
+        with self._lock:
+            self._phases = {}
+
+    def print_summary(self, file=sys.stderr):
+        """
+        Prints the breakdown of all phases.
+        """
+        rows = self.summary()
+        if not rows:
+            return
+        width = max(len(phase) for phase, *_ in rows)
+        print(f"\n{'phase':<{width}}  {'runs':>5}  {'total ms':>10}  {'max ms':>10}", file=file)
+        for phase, count, total, longest in rows:
+            print(f"{phase:<{width}}  {count:>5}  {total * 1e3:>10.1f}  {longest * 1e3:>10.1f}", file=file)
+
+
+timings = Timings()
@@ -1,14 +1,25 @@
 import os
 import sys
 import time
-import pickle
-import difflib
-import requests
+import json
+import atexit
+import threading
 from rich.console import Console
-from bs4 import BeautifulSoup
+from dataclasses import dataclass
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from platformdirs import user_cache_dir
-from playwright.sync_api import sync_playwright
+from namecheck.browser import browser_session
+from namecheck.check_cache import CheckCache
+from namecheck.session import http_session
+from namecheck.timings import timings
+from namecheck.index import (PackageIndex, SwappableIndex, IndexFormatError, write_index, filter_path,
+                             remove_stale_tmp_files,
+                             normalize_name, ultranormalize_name)
+from namecheck.matching import find_close_matches, find_edit_matches, refresh_ngram_index
+from namecheck.phonetic import phonetic_key
+from namecheck.parse import (iter_names_from_html, iter_names_from_json, scan_project_page,
+                             CHUNK_SIZE, PAGE_CHUNK_SIZE)
 from namecheck.render.utils import spinner, clear_previous_lines
 from namecheck.render.const import GREEN, RED, ORANGE, BLUE
 from rich.style import Style
@@ -19,189 +30,766 @@ SOURCES = {
     'TestPyPI': 'https://test.pypi.org/'
 }
 
+## every source gets a bit, the index maps each name to the bitmask of
+## the sources it's found on instead of carrying a set per name
+SOURCE_BITS = {source_name: 1 << i for i, source_name in enumerate(SOURCES)}
+
+## PEP 691 content negotiation, JSON preferred over the HTML index
+JSON_INDEX_CONTENT_TYPE = 'application/vnd.pypi.simple.v1+json'
+INDEX_ACCEPT = f'{JSON_INDEX_CONTENT_TYPE}, text/html;q=0.1'
+## only these answer for a project, a plain text/html page can be a bot challenge
+SIMPLE_INDEX_CONTENT_TYPES = (JSON_INDEX_CONTENT_TYPE, 'application/vnd.pypi.simple.v1+html')
+
 basic_style = Style(color=BLUE, blink=False, bold=False)
 blink_style = Style(color=BLUE, blink=True, bold=False)
 
+## the most events changelog_since_serial answers with in one call
+CHANGELOG_PAGE_SIZE = 50_000
+
+## overall time budget in seconds for checking the project urls of a name
+DIRECT_CHECK_DEADLINE = 60
+
+## the package name index, and the pickle cache it replaced
+CACHE_FILE = 'package_names.idx'
+## how often (in seconds) a long-running process looks at the cache
+WATCH_INTERVAL = 60
+LEGACY_CACHE_FILE = 'package_names.pkl'
+## results of the direct project url checks, see `CheckCache`
+DIRECT_CHECK_CACHE_FILE = 'direct_checks.json'
+
+def encode_sources(source_names) -> int:
+    """
+    Encodes an iterable of source names into a source bitmask.
+    """
+    mask = 0
+    for source_name in source_names:
+        mask |= SOURCE_BITS[source_name]
+    return mask
+
+def decode_sources(mask: int) -> list[str]:
+    """
+    Decodes a source bitmask into a sorted list of source names.
+    """
+    return sorted(source_name for source_name, bit in SOURCE_BITS.items() if mask & bit)
+
 def load_package_names_from_cache():
     """
     Loads the package names from the cache.
+    Returns a memory-mapped `PackageIndex`, so nothing is read up front.
+    A pickle cache written by older versions is migrated on the way.
     """
     cache_dir = user_cache_dir('namecheck')
-    cache_file = os.path.join(cache_dir, 'package_names.pkl')
+    cache_file = os.path.join(cache_dir, CACHE_FILE)
     if os.path.exists(cache_file) and os.path.getsize(cache_file) > 0:
         try:
-            with open(cache_file, 'rb') as f:
+            index = PackageIndex(cache_file)
+            if index.source_names != list(SOURCES):
+                raise IndexFormatError(f"{cache_file} was written for other sources")
+            index.load_filters()
+            return index
+        except (IndexFormatError, OSError):
+            # Cache file is corrupted or from an incompatible version, ignore it and return None
+            print("Warning: Cache file is corrupted or outdated, will refresh from source.", file=sys.stderr)
+            return None
+
+    legacy_cache_file = os.path.join(cache_dir, LEGACY_CACHE_FILE)
+    if os.path.exists(legacy_cache_file) and os.path.getsize(legacy_cache_file) > 0:
+        import pickle
+        try:
+            with open(legacy_cache_file, 'rb') as f:
                 package_names = pickle.load(f)
-            # Convert defaultdict to regular dict to prevent auto-creation of keys
-            return dict(package_names)
         except (pickle.UnpicklingError, EOFError, ValueError) as e:
             # Cache file is corrupted, ignore it and return None
             print(f"Warning: Cache file is corrupted, will refresh from source.", file=sys.stderr)
             return None
+        ## migrate the pickle to the index format, it stored a set of source
+        ## names per lowercased name, which may collapse under PEP 503
+        migrated = defaultdict(int)
+        for name, sources in package_names.items():
+            migrated[normalize_name(name)] |= encode_sources(sources)
+        package_names = migrated
+        save_package_names_to_cache(package_names)
+        os.remove(legacy_cache_file)
+        index = PackageIndex(cache_file)
+        index.load_filters()
+        return index
     return None
 
 def save_package_names_to_cache(package_names):
     """
-    Saves the package names to the cache.
+    Saves the package names to the cache, with the Bloom filters of the
+    sources that let a check of a free name skip the index.
     """
     cache_dir = user_cache_dir('namecheck')
     os.makedirs(cache_dir, exist_ok=True)
-    cache_file = os.path.join(cache_dir, 'package_names.pkl')
-    with open(cache_file, 'wb') as f:
-        pickle.dump(package_names, f)
+    cache_file = os.path.join(cache_dir, CACHE_FILE)
+    write_index(cache_file, package_names, list(SOURCES), filters=True)
 
 def clear_cache():
     """
     Clears the package name cache.
     """
     cache_dir = user_cache_dir('namecheck')
-    cache_file = os.path.join(cache_dir, 'package_names.pkl')
-    if os.path.exists(cache_file):
-        os.remove(cache_file)
+    cleared = False
+    cache_files = [os.path.join(cache_dir, file_name)
+                   for file_name in (CACHE_FILE, LEGACY_CACHE_FILE, DIRECT_CHECK_CACHE_FILE)]
+    cache_files += [filter_path(cache_files[0], source_name) for source_name in SOURCES]
+    for cache_file in cache_files:
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+            cleared = True
+        ## left over from killed writes, whatever their age
+        remove_stale_tmp_files(cache_file, max_age=0)
+    if _direct_check_cache is not None:
+        _direct_check_cache.clear()
+    if cleared:
         print("Cache cleared successfully.", file=sys.stderr)
-        return True
     else:
         print("No cache file found to clear.", file=sys.stderr)
+    return cleared
+
+def load_index_meta() -> dict:
+    """
+    Loads the per-source index metadata (HTTP validators) stored next to the cache.
+    """
+    cache_dir = user_cache_dir('namecheck')
+    meta_file = os.path.join(cache_dir, 'index_meta.json')
+    if os.path.exists(meta_file):
+        try:
+            with open(meta_file, 'r') as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return {}
+    return {}
+
+def save_index_meta(meta: dict):
+    """
+    Saves the per-source index metadata next to the cache.
+    """
+    cache_dir = user_cache_dir('namecheck')
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_file = os.path.join(cache_dir, 'index_meta.json')
+    with open(meta_file, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+def fetch_source_index(index_url: str, validators: dict = None):
+    """
+    Fetches the package names of a single simple index.
+    Prefers the PEP 691 JSON format and falls back to HTML when the index
+    doesn't serve it. When `validators` (ETag/Last-Modified of a previous
+    fetch) are given the request is conditional.
+    Returns a tuple of (names, validators), names is None if the index
+    is unchanged since the previous fetch.
+    """
+    headers = {
+        'Accept': INDEX_ACCEPT,
+        'Accept-Encoding': 'gzip',
+    }
+    validators = validators or {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+
+    response = http_session.get(index_url, headers=headers, timeout=30, stream=True)
+    try:
+        if response.status_code == 304:
+            return None, validators
+        response.raise_for_status()
+
+        new_validators = {}
+        if response.headers.get('ETag'):
+            new_validators['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            new_validators['last_modified'] = response.headers['Last-Modified']
+        if response.headers.get('X-PyPI-Last-Serial'):
+            new_validators['last_serial'] = int(response.headers['X-PyPI-Last-Serial'])
+
+        ## stream the names straight out of the response, the page
+        ## itself is never held in memory as a whole
+        chunks = timings.timed_iter(response.iter_content(chunk_size=CHUNK_SIZE), 'index download', 'index parse')
+        content_type = response.headers.get('Content-Type', '')
+        if content_type.startswith(JSON_INDEX_CONTENT_TYPE):
+            names = [normalize_name(name) for name in iter_names_from_json(chunks)]
+        else:
+            names = [normalize_name(name) for name in iter_names_from_html(chunks)]
+        return names, new_validators
+    finally:
+        response.close()
+
+def fetch_changelog_since(url: str, serial: int) -> list:
+    """
+    Fetches the changelog of an index since the given serial.
+    Returns a list of (name, version, timestamp, action, serial) events.
+    The index answers with at most `CHANGELOG_PAGE_SIZE` events per call,
+    a full page is followed by another call from its last serial on.
+    The XML-RPC calls go over the shared session, like every other request.
+    """
+    import xmlrpc.client
+    events = []
+    while True:
+        payload = xmlrpc.client.dumps((serial,), 'changelog_since_serial')
+        response = http_session.post(url + 'pypi', data=payload.encode('utf-8'),
+                                     headers={'Content-Type': 'text/xml'}, timeout=30)
+        response.raise_for_status()
+        ## raises xmlrpc.client.Fault if the server answered with an error
+        (page,), _ = xmlrpc.client.loads(response.content)
+        events.extend(page)
+        last_serial = max((event[4] for event in page), default=serial)
+        ## a short page is the last one, a page that doesn't move on would repeat forever
+        if len(page) < CHANGELOG_PAGE_SIZE or last_serial <= serial:
+            return events
+        serial = last_serial
+
+def apply_changelog(names: set, events) -> int:
+    """
+    Applies changelog events in place to a set of normalized package names.
+    Returns the highest serial of the events, 0 if there were none.
+    """
+    last_serial = 0
+    for name, _version, _timestamp, action, serial in events:
+        name = normalize_name(name)
+        if action == 'remove project':
+            names.discard(name)
+        elif action.startswith('rename from '):
+            names.discard(normalize_name(action[len('rename from '):]))
+            names.add(name)
+        else:
+            ## any other event (create, new release, ...) means the project exists
+            names.add(name)
+        last_serial = max(last_serial, serial)
+    return last_serial
+
+def refresh_source_names(source_name: str, url: str, cached_names: set = None, source_meta: dict = None):
+    """
+    Brings the names of a single source up to date.
+    If the last seen serial of the source is known, only the changes since
+    then are applied to the cached names; otherwise (or if the changelog is
+    unavailable) the index is fetched, conditionally when possible.
+    Returns a tuple of (names, source_meta).
+    """
+    import xmlrpc.client
+    from xml.parsers.expat import ExpatError
+    source_meta = dict(source_meta or {})
+    if cached_names is not None and source_meta.get('last_serial'):
+        try:
+            events = fetch_changelog_since(url, source_meta['last_serial'])
+            names = set(cached_names)
+            last_serial = apply_changelog(names, events)
+            if last_serial:
+                source_meta['last_serial'] = last_serial
+            return names, source_meta
+        ## a 200 that isn't an XML-RPC answer (a proxy page, an empty body)
+        ## fails to parse or to unpack, the index still has the names
+        except (xmlrpc.client.Error, ExpatError, ValueError, OSError) as e:
+            print(f"Warning: Could not fetch the {source_name} changelog, refetching the index: {e}", file=sys.stderr)
+
+    names, validators = fetch_source_index(url + 'simple/', source_meta if cached_names is not None else None)
+    if names is None:
+        ## not modified, reuse what we have in the cache
+        return set(cached_names), source_meta
+    return set(names), validators
+
+def get_cache_age():
+    """
+    Returns the age of the cached index in seconds, None if there is none.
+    """
+    cache_file = os.path.join(user_cache_dir('namecheck'), CACHE_FILE)
+    try:
+        return time.time() - os.path.getmtime(cache_file)
+    except OSError:
+        return None
+
+def touch_cache() -> bool:
+    """
+    Resets the age of the cached index, returns False if there is none.
+    """
+    cache_file = os.path.join(user_cache_dir('namecheck'), CACHE_FILE)
+    try:
+        os.utime(cache_file)
+        return True
+    except OSError:
         return False
 
-@spinner("Fetching package names...")
-def get_all_package_names(update_spinner=None):
+def fetch_all_package_names(cached_names=None, report_status=None) -> dict[str, int]:
     """
-    Fetches and parses package names from the given source URLs.
-    Returns a dictionary mapping package names to a set of their sources.
+    Fetches the names of all sources concurrently and saves them to the cache.
+    With `cached_names` the sources are brought up to date incrementally (see
+    `refresh_source_names`), and a source that fails keeps its cached names.
+    `report_status(source_name, status)` is called as every source progresses.
+    When no source changed, the cached index is kept and only its age reset.
+    Returns a dictionary mapping package names to a bitmask of their sources.
     """
-    ## check if the package names are already in the cache
-    package_names = load_package_names_from_cache()
-    if package_names:
-        return dict(package_names)
+    ## only needed from here on, a warm start never touches the network
+    import requests
+    ## the serials and validators are only useful if there is cached data to update
+    meta = load_index_meta() if cached_names else {}
+    report_status = report_status or (lambda source_name, status: None)
 
-    package_names = defaultdict(set)
-    for source_name, url in SOURCES.items():
+    def fetch_source(source_name: str, url: str):
         index_url = url + 'simple/'
+        cached_source_names = None
+        if cached_names:
+            source_bit = SOURCE_BITS[source_name]
+            cached_source_names = {name for name, mask in cached_names.items() if mask & source_bit}
         try:
-            if update_spinner:
-                update_spinner(f"[{BLUE}]Fetching package list from {source_name} ({index_url})...[/]")
-            response = requests.get(index_url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all anchor tags and extract their text
-            for link in soup.find_all('a'):
-                name = link.get_text().lower()
-                package_names[name].add(source_name)
-                
+            report_status(source_name, 'fetching')
+            with timings.phase(f'index fetch: {source_name}'):
+                names, source_meta = refresh_source_names(source_name, url, cached_source_names, meta.get(source_name))
+            report_status(source_name, f"{len(names)} names")
+            return names, source_meta, names != cached_source_names
         except requests.RequestException as e:
             print(f"Error fetching data from {index_url}: {e}", file=sys.stderr)
+            report_status(source_name, 'failed')
+            return cached_source_names or set(), meta.get(source_name), cached_source_names is None
+
+    with ThreadPoolExecutor(max_workers=len(SOURCES)) as executor:
+        futures = {source_name: executor.submit(fetch_source, source_name, url)
+                   for source_name, url in SOURCES.items()}
+
+    package_names = defaultdict(int)
+    changed = False
+    for source_name, future in futures.items():
+        names, source_meta, source_changed = future.result()
+        changed = changed or source_changed
+        if source_meta is not None:
+            meta[source_name] = source_meta
+        source_bit = SOURCE_BITS[source_name]
+        for name in names:
+            package_names[name] |= source_bit
+
+    ## rewriting an unchanged index costs as much as a full fetch, the
+    ## cache only has to count as fresh again
+    if changed or not touch_cache():
+        save_package_names_to_cache(package_names)
+    save_index_meta(meta)
+    return dict(package_names)
+
+_background_refresh = None
+
+def reload_index(index: SwappableIndex):
+    """
+    Swaps the index on disk into `index`.
+    """
+    fresh_index = load_package_names_from_cache()
+    if fresh_index is not None:
+        index.swap(fresh_index)
+        ## the close match index was built from the stale names
+        refresh_ngram_index(index)
+
+def refresh_in_background(index: SwappableIndex) -> threading.Thread:
+    """
+    Brings the cached index up to date in a background thread, and swaps
+    the fresh index in once it's on disk. Lookups keep being answered from
+    the stale names in the meantime.
+    """
+    global _background_refresh
+
+    def refresh():
+        try:
+            fetch_all_package_names(index)
+            reload_index(index)
+        except Exception as e:
+            print(f"Warning: Could not refresh the package names in the background: {e}", file=sys.stderr)
+
+    _background_refresh = threading.Thread(target=refresh, name='namecheck-refresh', daemon=True)
+    _background_refresh.start()
+    return _background_refresh
+
+def wait_for_background_refresh(timeout: float = None) -> bool:
+    """
+    Waits for a running background refresh to finish.
+    Returns False if it's still running after `timeout` seconds.
+    """
+    if _background_refresh is None:
+        return True
+    _background_refresh.join(timeout)
+    return not _background_refresh.is_alive()
+
+def keep_index_fresh(index: SwappableIndex, max_age: float, interval: float = WATCH_INTERVAL,
+                     stop: threading.Event = None) -> threading.Thread:
+    """
+    Keeps the index of a long-running process up to date from a background
+    thread. Every `interval` seconds, an index older than `max_age` seconds
+    is refreshed, and one rewritten by another run is reopened.
+    """
+    cache_file = os.path.join(user_cache_dir('namecheck'), CACHE_FILE)
+    stop = stop or threading.Event()
+
+    def modified():
+        try:
+            return os.stat(cache_file).st_mtime_ns
+        except OSError:
+            return None
+
+    def watch():
+        seen = modified()
+        while not stop.wait(interval):
+            cache_age = get_cache_age()
+            if cache_age is not None and cache_age > max_age:
+                ## wait for it here, so a slow refresh isn't started twice
+                refresh_in_background(index).join()
+            elif modified() != seen:
+                try:
+                    reload_index(index)
+                except Exception as e:
+                    print(f"Warning: Could not reopen the package names: {e}", file=sys.stderr)
+            seen = modified()
+
+    thread = threading.Thread(target=watch, name='namecheck-watch', daemon=True)
+    thread.start()
+    return thread
+
+@spinner("Fetching package names...")
+def get_all_package_names(refresh: bool = False, max_age: float = None, in_background: bool = True,
+                          update_spinner=None):
+    """
+    Fetches and parses package names from the given source URLs.
+    Returns a mapping of package names to a bitmask of their sources.
+    With `refresh` the cached names are brought up to date incrementally,
+    see `refresh_source_names`.
+    With `max_age` (in seconds) an older cache is still returned straight
+    away, wrapped in a `SwappableIndex` that is refreshed in the background.
+    Commands that exit before a background refresh could finish pass
+    `in_background=False`, an older cache is then refreshed first.
+    The sources are fetched concurrently, so a cold start takes as long as
+    the slowest source rather than all of them together.
+    """
+    ## check if the package names are already in the cache
+    with timings.phase('cache load'):
+        cached_names = load_package_names_from_cache()
+    if cached_names and not refresh:
+        cache_age = get_cache_age()
+        is_stale = max_age is not None and cache_age is not None and cache_age > max_age
+        if is_stale and in_background:
+            ## serve it anyway and revalidate behind the user's back
+            index = SwappableIndex(cached_names)
+            refresh_in_background(index)
+            return index
+        if not is_stale:
+            return cached_names
+
+    ## every source reports its own progress, the spinner shows them all
+    statuses = {source_name: 'waiting' for source_name in SOURCES}
+    status_lock = threading.Lock()
+    def report_status(source_name: str, status: str):
+        with status_lock:
+            statuses[source_name] = status
+            if update_spinner:
+                status_str = ", ".join(f"{name}: {status}" for name, status in statuses.items())
+                update_spinner(f"[{BLUE}]Fetching package lists... {status_str}[/]")
+
+    package_names = fetch_all_package_names(cached_names, report_status)
+    ## continue on the index just written, it has the similar names precomputed
+    index = load_package_names_from_cache()
+    if index is not None:
+        package_names = index
 
-    ## save the package names to the cache
-    save_package_names_to_cache(package_names)
-    
     if update_spinner:
         update_spinner(f"[{BLUE}]Found {len(package_names)} unique package names across all sources.[/]")
         sleep_for_ux(3)
 
-    return dict(package_names)
+    return package_names
 
 def sleep_for_ux(sleep_time: float):
     """ Sleeps for a given time to help UX, but skips when running in a test environment """
     if 'pytest' in sys.modules:
         return
-    time.sleep(sleep_time)
+    with timings.phase('ux sleep'):
+        time.sleep(sleep_time)
 
 
 def get_sources_for_name(name, all_names_with_sources) -> str:
     """
     Returns the sources for a given name.
     """
-    normalized_name = name.lower()
-    # Use .get() with default empty set to avoid KeyError
-    sources = sorted(list(all_names_with_sources.get(normalized_name, set())))
-    # sources = sorted(list(all_names_with_sources[normalized_name]))
+    normalized_name = normalize_name(name)
+    # Use .get() with an empty mask to avoid KeyError
+    sources = decode_sources(all_names_with_sources.get(normalized_name, 0))
     return sources
 
+def search_package_names(query: str, all_names_with_sources, prefix: bool = False,
+                         limit: int = None) -> tuple[int, list[str]]:
+    """
+    Finds the names containing `query`, or starting with it with `prefix`.
+    Returns how many there are and the first `limit` of them (all with
+    None) in alphabetical order. The query is normalized like the names.
+    The package index answers from its sorted names without a scan in
+    Python, other mappings are scanned.
+    """
+    query = normalize_name(query)
+    with timings.phase('search'):
+        if hasattr(all_names_with_sources, 'starting_with'):
+            if prefix:
+                return all_names_with_sources.starting_with(query, limit)
+            return all_names_with_sources.containing(query, limit)
+        if prefix:
+            found = sorted(name for name in all_names_with_sources if name.startswith(query))
+        else:
+            found = sorted(name for name in all_names_with_sources if query in name)
+        return len(found), found[:limit]
+
+def get_sources_for_names(names, all_names_with_sources) -> list[str]:
+    """
+    Returns the sources any of the given names is found on.
+    """
+    mask = 0
+    for name in names:
+        mask |= all_names_with_sources.get(name, 0)
+    return decode_sources(mask)
+
 def is_name_taken_global_index(name, all_names_with_sources) -> bool:
     """
     Checks the global index for a given name
     Gives better overview, but might be cached and outdated.
+    The cached index rules out most free names from its Bloom filters.
     """
-    normalized_name = name.lower()
+    normalized_name = normalize_name(name)
     found = True if normalized_name in all_names_with_sources else False
     return found
 
+def get_similar_names(name, all_names_with_sources) -> list[str]:
+    """
+    Returns the indexed names that keep `name` from being registered, as
+    PyPI rejects names too similar to an existing project ('foo-bar',
+    'foobar' and 'f00bar' all collide). The name itself is left out.
+    The package index has these precomputed, other mappings are scanned.
+    """
+    normalized_name = normalize_name(name)
+    if hasattr(all_names_with_sources, 'similar_names'):
+        similar = all_names_with_sources.similar_names(normalized_name)
+    else:
+        key = ultranormalize_name(normalized_name)
+        similar = sorted(other for other in all_names_with_sources if ultranormalize_name(other) == key)
+    return [other for other in similar if other != normalized_name]
+
 def get_content_with_playwright(url: str) -> str:
     """
     Fetches the content of a URL using Playwright to handle JavaScript rendering.
+    The browser is started on first use and reused for the rest of the session.
+    """
+    return browser_session.get_content(url)
+
+@dataclass
+class DirectCheck:
+    """
+    Outcome of checking a name directly on a single source, and which tier
+    of the checker gave the answer (see `check_project_url`).
+    """
+    source: str
+    taken: bool
+    tier: str
+
+def probe_simple_index(name: str, url: str):
+    """
+    Cheapest tier: a HEAD request for the project in the simple index.
+    Returns True/False if the status settles it, None if inconclusive.
+    A 200 only counts when it comes with a PEP 691 content type, anything
+    else may be a challenge page served in place of the index.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
+    response = http_session.head(f"{url}simple/{name}/", timeout=30, allow_redirects=True,
+                                 headers={'Accept': JSON_INDEX_CONTENT_TYPE})
+    if response.status_code == 200:
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        return True if content_type in SIMPLE_INDEX_CONTENT_TYPES else None
+    if response.status_code == 404:
+        return False
+    return None
+
+def parse_project_page(html_content):
+    """
+    Looks for the markers of an existing or a missing project on a project page.
+    Returns True/False if one is found, None otherwise.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # Check if the error message is present
+    page_text = soup.get_text().lower()
+    if "couldn't find this page" in page_text or "not found" in page_text:
+        # Package doesn't exist
+        return False
+    
+    # Look for positive indicators (like package description, download buttons, etc.)
+    # PyPI has specific elements for real package pages
+    if soup.find('div', class_='package-header') or soup.find('div', class_='project-description'):
+        return True
+    return None
+
+def probe_project_page(name: str, url: str):
+    """
+    Second tier: streams the HTML project page and looks for markers.
+    Returns True/False if the page settles it, None if inconclusive
+    (e.g. a javascript challenge instead of the project page).
+    """
+    response = http_session.get(f"{url}project/{name}/", timeout=30, stream=True)
+    try:
+        if response.status_code == 404:
+            return False
+        if response.status_code != 200:
+            return None
+        # PyPI returns 200 even for non-existent packages, the markers are near
+        # the top of the page so stop reading as soon as one of them shows up
+        return scan_project_page(response.iter_content(chunk_size=PAGE_CHUNK_SIZE))
+    finally:
+        ## closing a response that wasn't read to the end drops the connection
+        response.close()
+
+def probe_project_page_in_browser(name: str, url: str) -> bool:
+    """
+    Last tier: renders the project page in a browser, for sources that
+    block plain requests. Only a positive marker counts as taken.
+    """
+    html_content = get_content_with_playwright(f"{url}project/{name}/")
+    return bool(parse_project_page(html_content))
+
+def check_project_url(name: str, source_name: str, url: str) -> DirectCheck:
+    """
+    Checks if a name is taken on a single source, cheapest probe first:
+    the simple index status, then the HTML project page, then the browser.
+    A tier only escalates to the next when it's inconclusive or fails.
+    Raises if even the last tier fails.
+    """
+    tiers = (
+        ('simple', probe_simple_index),
+        ('html', probe_project_page),
+        ('browser', probe_project_page_in_browser),
+    )
+    for i, (tier, probe) in enumerate(tiers):
         try:
-            page.goto(url, wait_until='networkidle')
-            content = page.content()
-        finally:
-            browser.close()
-    return content
+            with timings.phase(f'direct check: {source_name} ({tier})'):
+                taken = probe(name, url)
+        except Exception:
+            if i == len(tiers) - 1:
+                raise
+            continue
+        if taken is not None:
+            return DirectCheck(source=source_name, taken=taken, tier=tier)
 
-def is_name_taken_project_url(name) -> list:
+_direct_check_cache = None
+_direct_check_cache_lock = threading.Lock()
+
+def get_direct_check_cache() -> CheckCache:
     """
-    Instead of checking the global index, we check the project URL directly.
-    Only used as a secondary check to make sure the name _is_ really available, 
-    not just available in the cached global index.
-    returns a list of sources where the name is taken
+    Returns the cache of direct check results stored next to the index.
+    Created on first use, and saved when the process exits.
+    """
+    global _direct_check_cache
+    with _direct_check_cache_lock:
+        if _direct_check_cache is None:
+            cache_file = os.path.join(user_cache_dir('namecheck'), DIRECT_CHECK_CACHE_FILE)
+            _direct_check_cache = CheckCache(cache_file)
+            atexit.register(_direct_check_cache.save)
+        return _direct_check_cache
+
+def save_direct_check_cache():
+    """
+    Writes the direct check results of this session to disk, if there are any.
+    """
+    if _direct_check_cache is not None:
+        _direct_check_cache.save()
+
+def get_direct_checks(name, deadline: float = DIRECT_CHECK_DEADLINE) -> dict[str, DirectCheck]:
     """
-    sources = []
-    for source_name, url in SOURCES.items():
-        project_url = f"{url}project/{name}/"
+    Checks the name on all sources concurrently, see `check_project_url`.
+    Sources with a fresh result in the direct check cache aren't asked
+    again, their checks come back with the 'cache' tier.
+    A source that hasn't answered within `deadline` seconds, or couldn't be
+    checked at all, is left out of the returned dict.
+    """
+    cache = get_direct_check_cache()
+    checks = {}
+    for source_name in SOURCES:
+        taken = cache.get(name, source_name)
+        if taken is not None:
+            checks[source_name] = DirectCheck(source_name, taken, 'cache')
+    if len(checks) == len(SOURCES):
+        return checks
+
+    executor = ThreadPoolExecutor(max_workers=len(SOURCES))
+    futures = {source_name: executor.submit(check_project_url, name, source_name, url)
+               for source_name, url in SOURCES.items() if source_name not in checks}
+    done, _ = wait(futures.values(), timeout=deadline)
+    ## don't wait for the stragglers, they're given up on
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    for source_name, future in futures.items():
+        if future not in done:
+            print(f"Warning: Could not check {source_name} for '{name}': no answer within {deadline}s", file=sys.stderr)
+            continue
         try:
-            if source_name == 'TestPyPI':
-                html_content = get_content_with_playwright(project_url)
-                response_status_code = 200  # Assume success if Playwright returns content
-            else:
-                response = requests.get(project_url, timeout=30)
-                html_content = response.content
-                response_status_code = response.status_code
-
-            if response_status_code == 200:
-                # PyPI returns 200 even for non-existent packages
-                # Look for indicators that the package actually exists
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                # Check if the error message is present
-                page_text = soup.get_text().lower()
-                if "couldn't find this page" in page_text or "not found" in page_text:
-                    # Package doesn't exist
-                    continue
-                
-                # Look for positive indicators (like package description, download buttons, etc.)
-                # PyPI has specific elements for real package pages
-                if soup.find('div', class_='package-header') or soup.find('div', class_='project-description'):
-                    sources.append(source_name)
+            checks[source_name] = future.result()
+            cache.put(name, source_name, checks[source_name].taken)
         except Exception as e:  # Changed from requests.RequestException to Exception
             # If there's any error (network, Playwright, etc.), we can't determine if it's taken
             print(f"Warning: Could not check {source_name} for '{name}': {e}", file=sys.stderr)
-    return sources
+    return {source_name: checks[source_name] for source_name in SOURCES if source_name in checks}
+
+def is_name_taken_project_url(name, deadline: float = DIRECT_CHECK_DEADLINE) -> list:
+    """
+    Instead of checking the global index, we check the project URL directly.
+    Only used as a secondary check to make sure the name _is_ really available, 
+    not just available in the cached global index.
+    returns a list of sources where the name is taken
+    """
+    checks = get_direct_checks(name, deadline=deadline)
+    return [source_name for source_name, check in checks.items() if check.taken]
     
-def get_close_matches(name, all_names_with_sources) -> list:
+def get_close_matches(name, all_names_with_sources, matcher: str = 'ratio', max_distance: int = 2) -> list:
     """
     Returns a list of close matches for a given name.
+    The 'ratio' matcher ranks by difflib similarity, the 'edit' matcher
+    returns the names within `max_distance` edits (typos, transpositions).
     """
-    name_norm = name.lower()
-    # Find and display close matches
-    matches = difflib.get_close_matches(name_norm, 
-                                        all_names_with_sources.keys(), 
-                                        n=5, 
-                                        cutoff=0.8)
+    with timings.phase('close matches'):
+        return _get_close_matches(name, all_names_with_sources, matcher, max_distance)
+
+def _get_close_matches(name, all_names_with_sources, matcher: str, max_distance: int) -> list:
+    name_norm = normalize_name(name)
+    if matcher == 'edit':
+        ## ask for one more, the exact name itself is at distance 0
+        matches = find_edit_matches(name_norm, all_names_with_sources, max_distance=max_distance, n=6)
+    else:
+        # Find and display close matches, the n-gram index narrows
+        # the names down to the candidates worth scoring with difflib
+        matches = find_close_matches(name_norm, 
+                                     all_names_with_sources, 
+                                     n=5, 
+                                     cutoff=0.8)
     ## if the exact name was found, remove it from 
     ## the "matches" list to avoid redundancy.
     if name_norm in matches:
         matches.remove(name_norm)
-    return matches
+    return matches[:5]
+
+def get_sound_alikes(name, all_names_with_sources, exclude=(), n: int = 5) -> list[str]:
+    """
+    Returns up to `n` names that sound like `name` (see `phonetic_key`),
+    the most similarly spelled first. The name itself and the names in
+    `exclude` (e.g. the close matches already shown) are left out.
+    The package index has the sound-alike buckets precomputed, other
+    mappings are scanned.
+    """
+    import difflib
+    normalized_name = normalize_name(name)
+    with timings.phase('sound alikes'):
+        if hasattr(all_names_with_sources, 'sound_alikes'):
+            bucket = all_names_with_sources.sound_alikes(normalized_name)
+        else:
+            key = phonetic_key(normalized_name)
+            bucket = [other for other in all_names_with_sources if key and phonetic_key(other) == key]
+        excluded = set(exclude) | {normalized_name}
+        bucket = [other for other in bucket if other not in excluded]
+        ratio = lambda other: difflib.SequenceMatcher(None, normalized_name, other).ratio()
+        return sorted(bucket, key=lambda other: (-ratio(other), other))[:n]
 
 @spinner("Checking...")
-def get_name_availability(name, all_names_with_sources, update_spinner=None) -> tuple[bool, list[str], list[str]]:
+def get_name_availability(name, all_names_with_sources, matcher: str = 'ratio', max_distance: int = 2,
+                          update_spinner=None) -> tuple[bool, list[str], list[str]]:
     """
     Checks for an exact match and finds close matches, showing their sources.
+    A name too similar to an indexed one (see `get_similar_names`) is taken,
+    and the names it collides with are listed first among the matches.
     """
     sleep_for_ux(0.5)
     is_available = None
@@ -209,11 +797,17 @@ def get_name_availability(name, all_names_with_sources, update_spinner=None) ->
     close_matches = []
 
     ## check for exact match in the global index
-    exact_match = is_name_taken_global_index(name, all_names_with_sources)
+    with timings.phase('exact lookup'):
+        exact_match = is_name_taken_global_index(name, all_names_with_sources)
+        similar_names = [] if exact_match else get_similar_names(name, all_names_with_sources)
     if exact_match:
         sources = get_sources_for_name(name, all_names_with_sources)
         is_available = False
         taken_sources = sources
+    elif similar_names:
+        ## PyPI would reject the name, no need to ask the network
+        is_available = False
+        taken_sources = get_sources_for_names(similar_names, all_names_with_sources)
     else:
         ## in this case, it _could_ mean the name is available, but
         ## the cachec might be outdated, so lets do a direct url check
@@ -226,21 +820,24 @@ def get_name_availability(name, all_names_with_sources, update_spinner=None) ->
             is_available = True
             taken_sources = []
     
-    matches = get_close_matches(name, all_names_with_sources)
+    matches = get_close_matches(name, all_names_with_sources, matcher=matcher, max_distance=max_distance)
+    ## the colliding names come first, they're why the name is taken
+    matches = similar_names + [match for match in matches if match not in similar_names]
     ## if there are close matches, display them
     if matches:
         close_matches = matches
 
     return is_available, taken_sources, close_matches
 
-def render_name_availability(name, is_available, taken_sources, close_matches, all_names_with_sources, console: Console):
+def render_name_availability(name, is_available, taken_sources, close_matches, all_names_with_sources, console: Console,
+                             sound_alikes=()):
     if is_available:
         print_available(name, console)
     else:
         print_taken(name, taken_sources, console)
 
-    if close_matches:
-        print_matches(close_matches, all_names_with_sources, console)
+    if close_matches or sound_alikes:
+        print_matches(close_matches, all_names_with_sources, console, sound_alikes=sound_alikes)
 
 
 ## --- print output functions ---
@@ -252,9 +849,23 @@ def print_taken(name: str, sources: list[str], console: Console):
     sources_str = ", ".join(sorted(sources_w_color))
     console.print(f"The name [bold {RED}]'{name}'[/] is already taken on: {sources_str}", style=basic_style)
 
-def print_matches(matches: list[str], all_names_with_sources: dict[str, set[str]], console: Console):
-    console.print("\nFound closely matching package names:", style=basic_style)
-    for match in matches:
-        sources = [f"[{ORANGE}]{source}[/]" for source in sorted(list(all_names_with_sources[match]))]
-        sources = ", ".join(sources)
-        console.print(f"   - [bold {ORANGE}]{match}[/] (on: {sources})", style=basic_style)
+def print_search_results(query: str, prefix: bool, count: int, names: list[str],
+                         all_names_with_sources: dict[str, int], console: Console):
+    what = "start with" if prefix else "contain"
+    shown = f", the first {len(names)}" if len(names) < count else ""
+    console.print(f"[bold {ORANGE}]{count}[/] package names {what} '{query}'{shown}:", style=basic_style)
+    for name in names:
+        sources = ", ".join(f"[{ORANGE}]{source}[/]" for source in decode_sources(all_names_with_sources[name]))
+        console.print(f"   - [bold {ORANGE}]{name}[/] (on: {sources})", style=basic_style)
+
+def print_matches(matches: list[str], all_names_with_sources: dict[str, int], console: Console, sound_alikes=()):
+    groups = (("Found closely matching package names:", matches),
+              ("Found package names that sound alike:", sound_alikes))
+    for title, names in groups:
+        if not names:
+            continue
+        console.print(f"\n{title}", style=basic_style)
+        for match in names:
+            sources = [f"[{ORANGE}]{source}[/]" for source in decode_sources(all_names_with_sources[match])]
+            sources = ", ".join(sources)
+            console.print(f"   - [bold {ORANGE}]{match}[/] (on: {sources})", style=basic_style)
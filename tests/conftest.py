@@ -0,0 +1,96 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from namecheck import session
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keeps every test away from the real user cache directory."""
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr('namecheck.utils.user_cache_dir', lambda *args, **kwargs: str(cache_dir))
+    monkeypatch.setattr('namecheck.daemon.user_cache_dir', lambda *args, **kwargs: str(cache_dir))
+    ## the direct check cache is created on first use, inside the isolated directory
+    monkeypatch.setattr('namecheck.utils._direct_check_cache', None)
+    return cache_dir
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    """Retries without backoff, on a fresh shared session for every test."""
+    monkeypatch.setattr('namecheck.session.BACKOFF_FACTOR', 0)
+    session.http_session.close()
+    yield
+    session.http_session.close()
+
+
+class StandInServer:
+    """
+    A tiny local HTTP server standing in for PyPI/TestPyPI.
+    `routes` maps a path to a callable receiving the request headers and
+    returning a (status, headers, body) tuple, or to such a tuple directly.
+    Connections are kept alive, `connections` holds the client address of
+    every connection that sent a request.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.connections = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self._respond(send_body=True)
+
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def _respond(self, send_body: bool):
+                server.requests.append((self.command, self.path, dict(self.headers)))
+                server.connections.add(self.client_address)
+                route = server.routes.get(self.path)
+                if route is None:
+                    status, headers, body = 404, {}, b'not found'
+                elif callable(route):
+                    status, headers, body = route(self.headers)
+                else:
+                    status, headers, body = route
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if send_body and body:
+                    try:
+                        self.wfile.write(body)
+                    except (BrokenPipeError, ConnectionResetError):
+                        ## the client is allowed to hang up early
+                        pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stand_in_server():
+    server = StandInServer()
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,180 @@
+import io
+import csv
+import json
+import threading
+from unittest.mock import patch
+
+from namecheck.batch import read_names, check_names, check_name_directly, write_results, BatchResult
+from namecheck.utils import DirectCheck
+
+
+PYPI, TESTPYPI = 1, 2
+
+
+class TestReadNames:
+    """Tests for reading the names to check."""
+
+    def test_skips_blanks_comments_and_duplicates(self):
+        """Test that only the distinct names are kept, in input order."""
+        lines = ['flask\n', '\n', '# candidates\n', '  my-package  \n', 'flask\n', 'other']
+
+        assert read_names(lines) == ['flask', 'my-package', 'other']
+
+
+class TestCheckNameDirectly:
+    """Tests for the direct check of a single name."""
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_taken_and_unchecked_sources(self, mock_checks):
+        """Test that sources without an answer are reported as unchecked."""
+        mock_checks.return_value = {'TestPyPI': DirectCheck('TestPyPI', True, 'simple')}
+
+        result = check_name_directly('new-name')
+
+        assert result == BatchResult('new-name', available=False, taken_sources=['TestPyPI'],
+                                     unchecked_sources=['PyPI'], checked_by='direct')
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_available(self, mock_checks):
+        """Test a name that's free on all sources."""
+        mock_checks.return_value = {'PyPI': DirectCheck('PyPI', False, 'simple'),
+                                    'TestPyPI': DirectCheck('TestPyPI', False, 'simple')}
+
+        result = check_name_directly('new-name')
+
+        assert result.available is True
+        assert result.unchecked_sources == []
+
+
+class TestCheckNames:
+    """Tests for checking many names at once."""
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_index_hits_skip_direct_checks(self, mock_checks):
+        """Test that names in the index are answered without any request."""
+        all_names = {'flask': PYPI | TESTPYPI, 'django': PYPI}
+
+        results = list(check_names(['Flask', 'django'], all_names))
+
+        assert [(r.name, r.available, r.taken_sources, r.checked_by) for r in results] == [
+            ('Flask', False, ['PyPI', 'TestPyPI'], 'index'),
+            ('django', False, ['PyPI'], 'index'),
+        ]
+        mock_checks.assert_not_called()
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_misses_checked_directly(self, mock_checks):
+        """Test that only the names missing from the index are checked directly."""
+        mock_checks.return_value = {}
+        all_names = {'flask': PYPI}
+
+        results = {r.name: r for r in check_names(['flask', 'new-a', 'new-b'], all_names)}
+
+        assert results['flask'].checked_by == 'index'
+        assert results['new-a'].checked_by == 'direct'
+        assert results['new-b'].checked_by == 'direct'
+        assert sorted(call.args[0] for call in mock_checks.call_args_list) == ['new-a', 'new-b']
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_direct_checks_run_in_parallel(self, mock_checks):
+        """Test that the direct checks of different names overlap."""
+        barrier = threading.Barrier(4, timeout=5)
+        def wait_for_all(name, deadline):
+            ## only returns once all four checks are running at the same time
+            barrier.wait()
+            return {}
+        mock_checks.side_effect = wait_for_all
+
+        results = list(check_names(['a1', 'a2', 'a3', 'a4'], {}, workers=4))
+
+        assert len(results) == 4
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_results_in_completion_order(self, mock_checks):
+        """Test that a slow name doesn't hold back the others."""
+        release_slow = threading.Event()
+        def check(name, deadline):
+            if name == 'slow':
+                release_slow.wait(timeout=5)
+            return {}
+        mock_checks.side_effect = check
+
+        names = []
+        for result in check_names(['slow', 'fast'], {}, workers=2):
+            names.append(result.name)
+            release_slow.set()
+
+        assert names == ['fast', 'slow']
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_too_similar_names_not_checked_directly(self, mock_checks):
+        """Test that a name colliding with indexed names is answered from the index."""
+        all_names = {'foo-bar': PYPI}
+
+        results = {r.name: r for r in check_names(['Foo_Bar', 'f00bar'], all_names)}
+
+        assert results['Foo_Bar'].taken_sources == ['PyPI']
+        assert results['Foo_Bar'].similar_to == []
+        assert results['f00bar'].available is False
+        assert results['f00bar'].taken_sources == ['PyPI']
+        assert results['f00bar'].similar_to == ['foo-bar']
+        assert results['f00bar'].checked_by == 'index'
+        mock_checks.assert_not_called()
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_close_matches(self, mock_checks):
+        """Test that close matches are only looked up when asked for."""
+        mock_checks.return_value = {}
+        all_names = {'requests': PYPI}
+
+        without = list(check_names(['reqeusts'], all_names))
+        with_matches = list(check_names(['reqeusts'], all_names, matcher='edit'))
+
+        assert without[0].close_matches == []
+        assert with_matches[0].close_matches == ['requests']
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_sound_alikes(self, mock_checks):
+        """Test that sound-alikes come along with the close matches, without repeating them."""
+        mock_checks.return_value = {}
+        all_names = {'numpy': PYPI, 'numpie': TESTPYPI, 'nampy': PYPI}
+
+        result, = check_names(['numpee'], all_names, matcher='edit', max_distance=1)
+
+        assert result.close_matches == ['numpie']
+        assert result.sound_alikes == ['numpy', 'nampy']
+
+
+class TestWriteResults:
+    """Tests for the batch output formats."""
+
+    RESULTS = [
+        BatchResult('flask', available=False, taken_sources=['PyPI', 'TestPyPI']),
+        BatchResult('new-name', available=True, unchecked_sources=['TestPyPI'], checked_by='direct'),
+    ]
+
+    def test_json_lines(self):
+        """Test one JSON object per result."""
+        out = io.StringIO()
+
+        count = write_results(self.RESULTS, out, output_format='jsonl')
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert count == 2
+        assert lines[0] == {'name': 'flask', 'available': False, 'taken_sources': ['PyPI', 'TestPyPI'],
+                            'unchecked_sources': [], 'checked_by': 'index', 'similar_to': [],
+                            'close_matches': [], 'sound_alikes': []}
+        assert lines[1]['available'] is True
+
+    def test_csv(self):
+        """Test a header row and space separated source lists."""
+        out = io.StringIO()
+
+        count = write_results(self.RESULTS, out, output_format='csv')
+
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert count == 2
+        assert rows[0]['name'] == 'flask'
+        assert rows[0]['taken_sources'] == 'PyPI TestPyPI'
+        assert rows[1]['available'] == 'True'
+        assert rows[1]['unchecked_sources'] == 'TestPyPI'
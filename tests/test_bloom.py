@@ -0,0 +1,75 @@
+import pytest
+
+from namecheck.bloom import BloomFilter, BloomFormatError, MAGIC
+
+
+class TestBloomFilter:
+    """Tests for the Bloom filters of the sources."""
+
+    def test_no_false_negatives(self):
+        """Test that every key put in is found."""
+        keys = [f'package{i}' for i in range(5000)]
+
+        bloom = BloomFilter.build(keys, len(keys))
+
+        assert all(key in bloom for key in keys)
+
+    def test_false_positive_rate(self):
+        """Test that keys that were never put in are mostly ruled out."""
+        keys = [f'package{i}' for i in range(5000)]
+        bloom = BloomFilter.build(keys, len(keys), error_rate=0.01)
+
+        false_positives = sum(f'other{i}' in bloom for i in range(10000))
+
+        assert false_positives < 200
+        ## under 10 bits per key
+        assert len(bloom.bits) * 8 < 10 * len(keys)
+
+    def test_empty(self):
+        """Test that an empty filter holds nothing."""
+        bloom = BloomFilter.build([], 0)
+
+        assert 'flask' not in bloom
+
+    def test_write_and_load(self, tmp_path):
+        """Test that a loaded filter answers like the one written, with its meta."""
+        path = str(tmp_path / 'names.bloom')
+        keys = ['f1ask', 'dj4ng0', 'numpy']
+        BloomFilter.build(keys, len(keys), meta={'generation': 'abc'}).write(path)
+
+        bloom = BloomFilter.load(path)
+
+        assert all(key in bloom for key in keys)
+        assert 'requests' not in bloom
+        assert bloom.meta == {'generation': 'abc'}
+        bloom.close()
+
+    def test_not_a_filter(self, tmp_path):
+        """Test that files that aren't filters are rejected."""
+        path = tmp_path / 'names.bloom'
+        path.write_bytes(b'not a filter at all')
+        with pytest.raises(BloomFormatError):
+            BloomFilter.load(str(path))
+
+        path.write_bytes(b'')
+        with pytest.raises(BloomFormatError):
+            BloomFilter.load(str(path))
+
+    @pytest.mark.parametrize('change', [lambda data: data[:-1], lambda data: data + b'\0'])
+    def test_wrong_size(self, tmp_path, change):
+        """Test that a filter with fewer or more bits than it was written with is rejected."""
+        path = tmp_path / 'names.bloom'
+        BloomFilter.build(['flask'], 1).write(str(path))
+        path.write_bytes(change(path.read_bytes()))
+
+        with pytest.raises(BloomFormatError):
+            BloomFilter.load(str(path))
+
+    def test_incompatible_version(self, tmp_path):
+        """Test that a filter of another format version is rejected."""
+        path = tmp_path / 'names.bloom'
+        header = b'{"version": 0, "bit_count": 64, "hash_count": 3, "meta": {}}'
+        path.write_bytes(MAGIC + len(header).to_bytes(4, 'little') + header + b'\0' * 8)
+
+        with pytest.raises(BloomFormatError):
+            BloomFilter.load(str(path))
@@ -0,0 +1,120 @@
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from namecheck.browser import BrowserSession
+
+
+@pytest.fixture
+def mock_playwright():
+    with patch('playwright.sync_api.sync_playwright') as mock_sync_playwright:
+        playwright = mock_sync_playwright.return_value.start.return_value
+        browser = playwright.chromium.launch.return_value
+        browser.is_connected.return_value = True
+        page = browser.new_context.return_value.new_page.return_value
+        page.is_closed.return_value = False
+        page.content.return_value = '<html>rendered</html>'
+        yield mock_sync_playwright
+
+
+class TestBrowserSession:
+    """Tests for the long-lived Playwright browser."""
+
+    def test_lazy_start(self, mock_playwright):
+        """Test that nothing is started before the first request."""
+        session = BrowserSession()
+
+        assert not session.is_running
+        mock_playwright.assert_not_called()
+
+    def test_browser_reused(self, mock_playwright):
+        """Test that the browser and page are started once for several requests."""
+        session = BrowserSession()
+
+        first = session.get_content('https://test.pypi.org/project/a/')
+        second = session.get_content('https://test.pypi.org/project/b/')
+
+        assert first == second == '<html>rendered</html>'
+        playwright = mock_playwright.return_value.start.return_value
+        playwright.chromium.launch.assert_called_once()
+        page = playwright.chromium.launch.return_value.new_context.return_value.new_page.return_value
+        assert page.goto.call_count == 2
+        session.close()
+
+    def test_calls_from_other_threads(self, mock_playwright):
+        """Test that all browser calls run on the same thread, whoever asks."""
+        session = BrowserSession()
+        playwright = mock_playwright.return_value.start.return_value
+        page = playwright.chromium.launch.return_value.new_context.return_value.new_page.return_value
+        browser_threads = set()
+        page.goto.side_effect = lambda *args, **kwargs: browser_threads.add(threading.get_ident())
+
+        workers = [threading.Thread(target=session.get_content, args=(f'https://x/{i}',)) for i in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert len(browser_threads) == 1
+        assert threading.get_ident() not in browser_threads
+        session.close()
+
+    def test_close(self, mock_playwright):
+        """Test that closing stops the browser and a later request restarts it."""
+        session = BrowserSession()
+        session.get_content('https://test.pypi.org/project/a/')
+        playwright = mock_playwright.return_value.start.return_value
+
+        session.close()
+
+        assert not session.is_running
+        playwright.chromium.launch.return_value.close.assert_called_once()
+        playwright.stop.assert_called_once()
+
+        session.get_content('https://test.pypi.org/project/a/')
+        assert playwright.chromium.launch.call_count == 2
+        session.close()
+
+    def test_close_without_start(self, mock_playwright):
+        """Test that closing an unused session is a no-op."""
+        BrowserSession().close()
+
+        mock_playwright.assert_not_called()
+
+    def test_restart_after_disconnect(self, mock_playwright):
+        """Test that a crashed browser is replaced on the next request."""
+        session = BrowserSession()
+        session.get_content('https://x/1')
+        playwright = mock_playwright.return_value.start.return_value
+        playwright.chromium.launch.return_value.is_connected.return_value = False
+
+        session.get_content('https://x/2')
+
+        assert playwright.chromium.launch.call_count == 2
+        session.close()
+
+    def test_closed_page_replaced(self, mock_playwright):
+        """Test that a closed page is replaced by a new one in the same context."""
+        session = BrowserSession()
+        session.get_content('https://x/1')
+        context = mock_playwright.return_value.start.return_value.chromium.launch.return_value.new_context.return_value
+        context.new_page.return_value.is_closed.return_value = True
+
+        session.get_content('https://x/2')
+
+        assert context.new_page.call_count == 2
+        session.close()
+
+    def test_failed_launch_cleans_up(self, mock_playwright):
+        """Test that Playwright is stopped again when the browser fails to launch."""
+        session = BrowserSession()
+        playwright = mock_playwright.return_value.start.return_value
+        playwright.chromium.launch.side_effect = RuntimeError("Executable doesn't exist")
+
+        with pytest.raises(RuntimeError):
+            session.get_content('https://x/1')
+
+        assert not session.is_running
+        playwright.stop.assert_called_once()
+        session.close()
@@ -0,0 +1,112 @@
+import os
+import json
+from unittest.mock import patch
+
+import pytest
+
+from namecheck.check_cache import CheckCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'cache' / 'direct_checks.json')
+
+
+class TestCheckCache:
+    """Tests for the persistent direct check result cache."""
+
+    def test_round_trip(self, cache_path):
+        """Test that saved results are read back by a new cache."""
+        cache = CheckCache(cache_path)
+        cache.put('flask', 'PyPI', True)
+        cache.put('new-name', 'PyPI', False)
+        cache.save()
+
+        cache = CheckCache(cache_path)
+
+        assert cache.get('flask', 'PyPI') is True
+        assert cache.get('new-name', 'PyPI') is False
+        assert cache.get('flask', 'TestPyPI') is None
+
+    def test_keyed_by_normalized_name(self, cache_path):
+        """Test that spellings of the same project share a result."""
+        cache = CheckCache(cache_path)
+        cache.put('My_Package', 'PyPI', True)
+
+        assert cache.get('my-package', 'PyPI') is True
+
+    @patch('namecheck.check_cache.time.time')
+    def test_ttl_depends_on_result(self, mock_time, cache_path):
+        """Test that available results expire sooner than taken ones."""
+        cache = CheckCache(cache_path, available_ttl=60, taken_ttl=3600)
+        mock_time.return_value = 1000
+        cache.put('taken-name', 'PyPI', True)
+        cache.put('free-name', 'PyPI', False)
+
+        mock_time.return_value = 1000 + 120
+
+        assert cache.get('taken-name', 'PyPI') is True
+        assert cache.get('free-name', 'PyPI') is None
+
+    @patch('namecheck.check_cache.time.time')
+    def test_save_evicts_expired_and_oldest(self, mock_time, cache_path):
+        """Test that expired results are dropped and the newest are kept."""
+        cache = CheckCache(cache_path, available_ttl=60, taken_ttl=3600, max_entries=2)
+        for i, name in enumerate(['old', 'older', 'newer', 'newest']):
+            mock_time.return_value = 1000 + i
+            cache.put(name, 'PyPI', True)
+        cache.put('expired', 'PyPI', False)
+        mock_time.return_value = 1000 + 100
+
+        cache.save()
+
+        with open(cache_path) as f:
+            assert sorted(json.load(f)) == ['PyPI:newer', 'PyPI:newest']
+
+    def test_save_merges_other_processes(self, cache_path):
+        """Test that results saved by another cache in the meantime are kept."""
+        first = CheckCache(cache_path)
+        second = CheckCache(cache_path)
+        first.get('anything', 'PyPI')
+        second.put('flask', 'PyPI', True)
+        second.save()
+
+        first.put('django', 'PyPI', True)
+        first.save()
+
+        cache = CheckCache(cache_path)
+        assert cache.get('flask', 'PyPI') is True
+        assert cache.get('django', 'PyPI') is True
+
+    def test_save_without_changes(self, cache_path):
+        """Test that nothing is written if nothing was checked."""
+        cache = CheckCache(cache_path)
+        cache.get('flask', 'PyPI')
+
+        cache.save()
+
+        assert not os.path.exists(cache_path)
+
+    def test_corrupted_file(self, cache_path, tmp_path):
+        """Test that a corrupted cache file is ignored."""
+        (tmp_path / 'cache').mkdir()
+        with open(cache_path, 'w') as f:
+            f.write('{not json')
+
+        cache = CheckCache(cache_path)
+
+        assert cache.get('flask', 'PyPI') is None
+        cache.put('flask', 'PyPI', True)
+        cache.save()
+        assert CheckCache(cache_path).get('flask', 'PyPI') is True
+
+    def test_clear(self, cache_path):
+        """Test that clearing removes the results and the file."""
+        cache = CheckCache(cache_path)
+        cache.put('flask', 'PyPI', True)
+        cache.save()
+
+        cache.clear()
+
+        assert cache.get('flask', 'PyPI') is None
+        assert CheckCache(cache_path).get('flask', 'PyPI') is None
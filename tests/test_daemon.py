@@ -0,0 +1,144 @@
+import os
+import socket
+import shutil
+import tempfile
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from namecheck.daemon import (NameServer, DaemonClient, DaemonError, serve, connect_to_daemon,
+                              check_names_with_daemon, get_socket_path)
+from namecheck.utils import DirectCheck
+
+
+PYPI, TESTPYPI = 1, 2
+ALL_NAMES = {'flask': PYPI | TESTPYPI, 'requests': PYPI, 'sandbox': TESTPYPI}
+
+
+@pytest.fixture
+def socket_path():
+    ## pytest's tmp_path can be longer than a Unix socket path may be
+    tmp_dir = tempfile.mkdtemp(prefix='nc')
+    yield os.path.join(tmp_dir, 'namecheck.sock')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def daemon(socket_path):
+    server = NameServer(socket_path, ALL_NAMES)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestDaemon:
+    """Tests for answering queries from a resident daemon."""
+
+    def test_ping(self, daemon, socket_path):
+        """Test that a running daemon answers a ping."""
+        client = DaemonClient(socket_path)
+
+        assert client.ping()
+        assert client.request({'op': 'ping'})['names'] == len(ALL_NAMES)
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_index_hit(self, mock_checks, daemon, socket_path):
+        """Test that a name in the index is answered without direct checks."""
+        result, match_sources = DaemonClient(socket_path).check('Flask')
+
+        assert result.available is False
+        assert result.taken_sources == ['PyPI', 'TestPyPI']
+        assert result.checked_by == 'index'
+        assert match_sources == {}
+        mock_checks.assert_not_called()
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_direct_check_with_close_matches(self, mock_checks, daemon, socket_path):
+        """Test a name missing from the index, with the sources of its close matches."""
+        mock_checks.return_value = {'PyPI': DirectCheck('PyPI', False, 'simple'),
+                                    'TestPyPI': DirectCheck('TestPyPI', False, 'cache')}
+
+        result, match_sources = DaemonClient(socket_path).check('reqeusts', matcher='edit')
+
+        assert result.available is True
+        assert result.checked_by == 'direct'
+        assert result.close_matches == ['requests']
+        assert match_sources == {'requests': PYPI}
+
+    @patch('namecheck.suggest.is_name_taken_project_url')
+    def test_suggest(self, mock_project_url, daemon, socket_path):
+        """Test that suggestions come from the daemon's index."""
+        mock_project_url.return_value = []
+
+        suggestions = DaemonClient(socket_path).suggest('flask', count=3, verify=1)
+
+        assert [s.name for s in suggestions] == ['flasks', 'flask-py', 'py-flask']
+        assert suggestions[0].verified is True
+
+    def test_search(self, daemon, socket_path):
+        """Test that searches come with the sources of the names found."""
+        count, names, sources = DaemonClient(socket_path).search('a', limit=1)
+
+        assert count == 2
+        assert names == ['flask']
+        assert sources == {'flask': PYPI | TESTPYPI}
+
+    def test_bad_query(self, daemon, socket_path):
+        """Test that a failing query is reported and the daemon keeps running."""
+        client = DaemonClient(socket_path)
+
+        with pytest.raises(DaemonError, match='unknown query'):
+            client.request({'op': 'nonsense'})
+        assert client.ping()
+
+    @patch('namecheck.batch.get_direct_checks')
+    def test_check_names_with_daemon(self, mock_checks, daemon, socket_path):
+        """Test checking many names concurrently on the daemon."""
+        mock_checks.return_value = {}
+
+        results = list(check_names_with_daemon(['flask', 'new-a', 'new-b'], DaemonClient(socket_path), workers=3))
+
+        assert sorted(result.name for result in results) == ['flask', 'new-a', 'new-b']
+        assert {result.name: result.checked_by for result in results}['flask'] == 'index'
+
+    def test_connect_to_daemon(self, daemon, socket_path):
+        """Test that a client is only handed out for a daemon that answers."""
+        assert connect_to_daemon(socket_path) is not None
+        assert connect_to_daemon(socket_path + '.missing') is None
+
+    def test_unreachable_daemon(self, socket_path):
+        """Test that a socket nobody listens on is treated as no daemon."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(socket_path)
+
+        assert connect_to_daemon(socket_path) is None
+        with pytest.raises(DaemonError):
+            DaemonClient(socket_path).request({'op': 'ping'})
+
+    def test_default_socket_next_to_cache(self, isolated_cache_dir):
+        """Test that the socket lives in the cache directory."""
+        assert get_socket_path() == str(isolated_cache_dir / 'namecheck.sock')
+
+
+class TestServe:
+    """Tests for starting and stopping the daemon."""
+
+    def test_refuses_second_daemon(self, daemon, socket_path):
+        """Test that a second daemon doesn't take over a running one's socket."""
+        with pytest.raises(DaemonError, match='already running'):
+            serve(ALL_NAMES, socket_path)
+        assert DaemonClient(socket_path).ping()
+
+    def test_replaces_stale_socket(self, socket_path):
+        """Test that a socket left behind by a crashed daemon is cleaned up."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(socket_path)
+
+        with patch.object(NameServer, 'serve_forever', side_effect=KeyboardInterrupt):
+            serve(ALL_NAMES, socket_path)
+
+        ## removed again on the way out
+        assert not os.path.exists(socket_path)
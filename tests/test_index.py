@@ -0,0 +1,308 @@
+import os
+import json
+import struct
+from unittest.mock import patch
+
+import pytest
+
+from namecheck.index import (PackageIndex, SwappableIndex, IndexFormatError, write_index, filter_path, MAGIC,
+                             remove_stale_tmp_files,
+                             normalize_name, ultranormalize_name)
+
+
+SOURCE_NAMES = ['PyPI', 'TestPyPI']
+PYPI, TESTPYPI = 1, 2
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / 'package_names.idx')
+
+
+class TestPackageIndex:
+    """Tests for the memory-mapped package name index."""
+
+    def test_round_trip(self, index_path):
+        """Test that an index reads back the mapping it was written from."""
+        package_names = {
+            'flask': PYPI | TESTPYPI,
+            'django': PYPI,
+            'sandbox': TESTPYPI,
+        }
+        write_index(index_path, package_names, SOURCE_NAMES)
+
+        index = PackageIndex(index_path)
+
+        assert len(index) == 3
+        assert index == package_names
+        assert list(index) == ['django', 'flask', 'sandbox']
+        assert index.source_names == SOURCE_NAMES
+        index.close()
+
+    def test_lookup(self, index_path):
+        """Test binary search lookups for present and missing names."""
+        package_names = {f'pkg{i}': PYPI for i in range(1000)}
+        write_index(index_path, package_names, SOURCE_NAMES)
+
+        index = PackageIndex(index_path)
+
+        assert all(name in index for name in package_names)
+        assert 'pkg1000' not in index
+        assert 'a' not in index
+        assert 'zzz' not in index
+        assert 42 not in index
+        assert index['pkg500'] == PYPI
+        assert index.get('missing') is None
+        with pytest.raises(KeyError):
+            index['missing']
+
+    def test_non_ascii_names(self, index_path):
+        """Test that names are stored as utf-8."""
+        write_index(index_path, {'café': PYPI, 'cafe': TESTPYPI}, SOURCE_NAMES)
+
+        index = PackageIndex(index_path)
+
+        assert index['café'] == PYPI
+        assert index['cafe'] == TESTPYPI
+
+    def test_empty_index(self, index_path):
+        """Test writing and reading an index without names."""
+        write_index(index_path, {}, SOURCE_NAMES)
+
+        index = PackageIndex(index_path)
+
+        assert len(index) == 0
+        assert 'flask' not in index
+        assert list(index) == []
+
+    def test_not_an_index(self, index_path):
+        """Test that other files are rejected."""
+        with open(index_path, 'wb') as f:
+            f.write(b'\x80\x04not an index')
+
+        with pytest.raises(IndexFormatError):
+            PackageIndex(index_path)
+
+    def test_empty_file(self, index_path):
+        """Test that an empty file is rejected."""
+        open(index_path, 'wb').close()
+
+        with pytest.raises(IndexFormatError):
+            PackageIndex(index_path)
+
+    def test_incompatible_version(self, index_path):
+        """Test that an index from another format version is rejected."""
+        write_index(index_path, {'flask': PYPI}, SOURCE_NAMES)
+        with open(index_path, 'r+b') as f:
+            f.seek(len(MAGIC))
+            (header_size,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_size))
+            header['version'] = 0
+            f.seek(len(MAGIC) + 4)
+            f.write(json.dumps(header).encode().ljust(header_size))
+
+        with pytest.raises(IndexFormatError):
+            PackageIndex(index_path)
+
+    def test_short_header(self, index_path):
+        """Test that a file cut off right after the magic is rejected."""
+        with open(index_path, 'wb') as f:
+            f.write(MAGIC + b'\x01')
+
+        with pytest.raises(IndexFormatError):
+            PackageIndex(index_path)
+
+    def test_missing_section(self, index_path):
+        """Test that an index whose header lacks a section is rejected."""
+        write_index(index_path, {'flask': PYPI}, SOURCE_NAMES)
+        with open(index_path, 'r+b') as f:
+            data = f.read()
+            header_size = struct.unpack('<I', data[len(MAGIC):len(MAGIC) + 4])[0]
+            header_start = len(MAGIC) + 4
+            header = json.loads(data[header_start:header_start + header_size])
+            del header['sections']['lengths']
+            f.seek(header_start)
+            f.write(json.dumps(header).encode().ljust(header_size))
+
+        with pytest.raises(IndexFormatError):
+            PackageIndex(index_path)
+
+    def test_items(self, index_path):
+        """Test that the items are read in one pass, without a search per name."""
+        package_names = {'flask': PYPI | TESTPYPI, 'django': PYPI, 'sandbox': TESTPYPI}
+        write_index(index_path, package_names, SOURCE_NAMES)
+        index = PackageIndex(index_path)
+
+        with patch.object(PackageIndex, '_find', side_effect=AssertionError):
+            assert list(index.items()) == sorted(package_names.items())
+            assert list(SwappableIndex(index).items()) == sorted(package_names.items())
+        assert ('flask', PYPI | TESTPYPI) in index.items()
+        assert len(index.items()) == 3
+
+    def test_truncated(self, index_path):
+        """Test that a truncated index is rejected."""
+        write_index(index_path, {f'pkg{i}': PYPI for i in range(100)}, SOURCE_NAMES)
+        with open(index_path, 'r+b') as f:
+            f.truncate(200)
+
+        with pytest.raises(IndexFormatError):
+            PackageIndex(index_path)
+
+    def test_rewrite_while_open(self, index_path):
+        """Test that an open index keeps working while a new one replaces it."""
+        write_index(index_path, {'flask': PYPI}, SOURCE_NAMES)
+        index = PackageIndex(index_path)
+
+        write_index(index_path, {'django': PYPI}, SOURCE_NAMES)
+
+        assert 'flask' in index
+        assert 'django' in PackageIndex(index_path)
+
+    def test_stale_tmp_files_removed(self, index_path):
+        """Test that a write removes the files of killed writes, but not the ones of running writes."""
+        stale, running = f'{index_path}.111.tmp', f'{index_path}.222.tmp'
+        for tmp_path in (stale, running):
+            with open(tmp_path, 'wb') as f:
+                f.write(b'half written')
+        os.utime(stale, (0, 0))
+
+        write_index(index_path, {'flask': PYPI}, SOURCE_NAMES)
+
+        assert not os.path.exists(stale)
+        assert os.path.exists(running)
+        assert remove_stale_tmp_files(index_path, max_age=0) == 1
+
+    def test_similar_names(self, index_path):
+        """Test that names PyPI considers too similar are found by their ultranormalized form."""
+        write_index(index_path, {'foo-bar': PYPI, 'foobar': TESTPYPI, 'flask': PYPI}, SOURCE_NAMES)
+
+        index = PackageIndex(index_path)
+
+        assert index.similar_names('f00-bar') == ['foo-bar', 'foobar']
+        assert index.similar_names('fiask') == ['flask']
+        assert index.similar_names('django') == []
+        assert SwappableIndex(index).similar_names('FOOBAR') == ['foo-bar', 'foobar']
+
+    def test_filters(self, index_path):
+        """Test that names ruled out by the filters are answered without a binary search."""
+        package_names = {'foo-bar': PYPI, 'flask': PYPI | TESTPYPI, 'sandbox': TESTPYPI}
+        write_index(index_path, package_names, SOURCE_NAMES, filters=True)
+        index = PackageIndex(index_path)
+
+        assert index.load_filters()
+
+        with patch.object(PackageIndex, '_find', side_effect=AssertionError), \
+             patch.object(PackageIndex, '_names_with_key', side_effect=AssertionError):
+            assert 'requests' not in index
+            assert index.get('requests') is None
+            assert index.similar_names('requests') == []
+        assert index == package_names
+        assert index.similar_names('f00bar') == ['foo-bar']
+        index.close()
+
+    def test_filters_of_another_generation(self, index_path):
+        """Test that filters left over from another index are not used."""
+        write_index(index_path, {'flask': PYPI}, SOURCE_NAMES, filters=True)
+        write_index(index_path, {'django': PYPI}, SOURCE_NAMES)
+
+        index = PackageIndex(index_path)
+
+        assert not index.load_filters()
+        assert 'django' in index
+
+    def test_truncated_filter(self, index_path):
+        """Test that a filter of the right generation but the wrong size is not used."""
+        write_index(index_path, {'flask': PYPI, 'sandbox': TESTPYPI}, SOURCE_NAMES, filters=True)
+        path = filter_path(index_path, 'PyPI')
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 1)
+
+        index = PackageIndex(index_path)
+
+        assert not index.load_filters()
+        assert 'flask' in index
+
+    def test_filters_missing_for_a_source(self, index_path):
+        """Test that the filters are only used when every source has one."""
+        write_index(index_path, {'flask': PYPI, 'sandbox': TESTPYPI}, SOURCE_NAMES, filters=True)
+        os.remove(filter_path(index_path, 'TestPyPI'))
+
+        index = PackageIndex(index_path)
+
+        assert not index.load_filters()
+        assert 'sandbox' in index
+
+    def test_sound_alikes(self, index_path):
+        """Test that names are bucketed by their phonetic key."""
+        write_index(index_path, {'numpy': PYPI, 'numpie': TESTPYPI, 'numba': PYPI}, SOURCE_NAMES)
+
+        index = PackageIndex(index_path)
+
+        assert index.sound_alikes('num-pee') == ['numpie', 'numpy']
+        assert index.sound_alikes('numba') == ['numba']
+        assert index.sound_alikes('---') == []
+        assert SwappableIndex(index).sound_alikes('numpy') == ['numpie', 'numpy']
+
+    def test_starting_with(self, index_path):
+        """Test that prefix searches count and list the names in order."""
+        write_index(index_path, {'django': PYPI, 'django-rest': PYPI, 'django-cms': TESTPYPI, 'flask': PYPI},
+                    SOURCE_NAMES)
+
+        index = PackageIndex(index_path)
+
+        assert index.starting_with('django-') == (2, ['django-cms', 'django-rest'])
+        assert index.starting_with('django', limit=1) == (3, ['django'])
+        assert index.starting_with('zope') == (0, [])
+        assert index.starting_with('')[0] == 4
+
+    def test_containing(self, index_path):
+        """Test that substring searches don't count hits spanning two names."""
+        ## next to each other in the index: 'abtorch' + 'orchard' + 'torch' + 'torchtorch'
+        write_index(index_path, {'abtorch': PYPI, 'orchard': PYPI, 'torch': PYPI, 'torchtorch': PYPI},
+                    SOURCE_NAMES)
+
+        index = PackageIndex(index_path)
+
+        assert index.containing('torch') == (3, ['abtorch', 'torch', 'torchtorch'])
+        assert index.containing('torch', limit=1) == (3, ['abtorch'])
+        ## 'abtorch' + 'orchard' spells 'hor' across the boundary
+        assert index.containing('hor') == (0, [])
+        assert index.containing('chtor') == (1, ['torchtorch'])
+        assert index.containing('torch\norchard') == (0, [])
+        assert SwappableIndex(index).containing('orch')[0] == 4
+
+
+class TestNormalizeName:
+    """Tests for the name normalization rules of the indexes."""
+
+    def test_normalize_name(self):
+        """Test PEP 503 normalization."""
+        assert normalize_name('Foo.Bar') == 'foo-bar'
+        assert normalize_name('foo__bar') == 'foo-bar'
+        assert normalize_name('foo-bar') == 'foo-bar'
+
+    def test_ultranormalize_name(self):
+        """Test that separators and look-alike characters collapse."""
+        assert ultranormalize_name('foo-bar') == ultranormalize_name('f00_bar') == 'f00bar'
+        assert ultranormalize_name('Flask') == ultranormalize_name('fiask') == ultranormalize_name('f1ask')
+        assert ultranormalize_name('flask') != ultranormalize_name('flake')
+
+
+class TestSwappableIndex:
+    """Tests for the mapping that can be replaced while in use."""
+
+    def test_swap(self, index_path):
+        """Test that lookups go to the new names after a swap."""
+        write_index(index_path, {'flask': PYPI}, SOURCE_NAMES)
+        stale = PackageIndex(index_path)
+        index = SwappableIndex(stale)
+        write_index(index_path, {'flask': PYPI, 'django': TESTPYPI}, SOURCE_NAMES)
+
+        index.swap(PackageIndex(index_path))
+
+        assert index.version == 1
+        assert index == {'flask': PYPI, 'django': TESTPYPI}
+        assert index['django'] == TESTPYPI
+        assert index.source_names == SOURCE_NAMES
+        ## the old index keeps working for lookups already holding it
+        assert 'django' not in stale
@@ -0,0 +1,214 @@
+import random
+import string
+import difflib
+
+import pytest
+
+from namecheck.matching import (NgramIndex, ngram_keys, min_shared_grams, edit_distance,
+                                get_ngram_index, warm_up_ngram_index, refresh_ngram_index,
+                                find_close_matches, find_edit_matches)
+from namecheck.index import PackageIndex, SwappableIndex, MappedNgramIndex, write_index
+
+
+def make_corpus(count: int, seed: int = 0) -> dict[str, int]:
+    """
+    Builds a synthetic index of package-like names: a few base words with
+    prefixes, suffixes, separators and typos, so close matches are common.
+    """
+    rng = random.Random(seed)
+    words = ['requests', 'flask', 'django', 'numpy', 'pandas', 'torch', 'pytest', 'click',
+             'rich', 'pillow', 'scipy', 'boto', 'yaml', 'jinja', 'attrs', 'httpx']
+    affixes = ['py', 'lib', 'cli', 'tools', 'utils', 'async', 'api', 'ext', 'core', 'x']
+    names = set()
+    while len(names) < count:
+        name = rng.choice(words)
+        roll = rng.random()
+        if roll < 0.3:
+            name = rng.choice(affixes) + rng.choice(['', '-', '_']) + name
+        elif roll < 0.6:
+            name = name + rng.choice(['', '-', '_']) + rng.choice(affixes)
+        elif roll < 0.8:
+            i = rng.randrange(len(name))
+            name = name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+        else:
+            name = name + ''.join(rng.choices(string.ascii_lowercase + string.digits, k=rng.randint(1, 8)))
+        names.add(name)
+    return {name: 1 for name in names}
+
+
+class TestNgramKeys:
+    """Tests for the q-gram keys."""
+
+    def test_padded_bigrams(self):
+        assert ngram_keys('abc') == ['\x02a', 'ab', 'bc', 'c\x03']
+
+    def test_repeated_grams_numbered(self):
+        """Test that repeated grams get distinct keys."""
+        assert ngram_keys('aaa') == ['\x02a', 'aa', 'aa1', 'a\x03']
+
+    def test_min_shared_grams(self):
+        assert min_shared_grams(8, 8, 0) == 9
+        assert min_shared_grams(8, 7, 1) == 7
+
+
+class TestNgramIndex:
+    """Tests for the n-gram candidate index."""
+
+    def test_count_shared(self):
+        index = NgramIndex(['flask', 'flasks', 'django'])
+
+        counts = index.count_shared('flask')
+
+        assert counts[0] == 6
+        assert counts[1] == 5
+        assert 2 not in counts
+
+    def test_low_cutoff_falls_back(self):
+        """Test that no candidates are returned when the bound is useless."""
+        index = NgramIndex(['flask'])
+
+        assert index.ratio_candidates('flask', 0.1) is None
+        assert index.ratio_candidates('flask', 0) is None
+
+    def test_index_is_reused(self):
+        """Test that the index is only built once for the same mapping."""
+        all_names = {'flask': 1, 'django': 1}
+
+        assert get_ngram_index(all_names) is get_ngram_index(all_names)
+        assert get_ngram_index(dict(all_names)) is not get_ngram_index(all_names)
+
+    def test_rebuilt_after_swap(self):
+        """Test that swapping the names of a mapping invalidates its index."""
+        all_names = SwappableIndex({'flask': 1, 'django': 1})
+        stale = get_ngram_index(all_names)
+
+        all_names.swap({'flask': 1, 'fastapi': 1})
+        refresh_ngram_index(all_names)
+
+        assert get_ngram_index(all_names) is not stale
+        assert sorted(get_ngram_index(all_names).names) == ['fastapi', 'flask']
+
+    def test_refresh_skips_unused_mapping(self):
+        """Test that refreshing doesn't build an index nobody asked for."""
+        used = {'flask': 1}
+        ngram_index = get_ngram_index(used)
+
+        refresh_ngram_index({'django': 1})
+
+        assert get_ngram_index(used) is ngram_index
+
+    def test_warm_up(self):
+        """Test that the background build fills the cache used by queries."""
+        all_names = {'flask': 1, 'flasks': 1}
+
+        warm_up_ngram_index(all_names).join()
+
+        assert find_close_matches('flask', all_names) == ['flask', 'flasks']
+        assert get_ngram_index(all_names).names == ['flask', 'flasks']
+
+
+class TestFindCloseMatches:
+    """Equivalence tests against a full difflib scan."""
+
+    @pytest.mark.parametrize('cutoff', [0.8, 0.7, 0.6, 0.5])
+    def test_same_results_as_difflib(self, cutoff):
+        """Test that the candidate filter never changes difflib's top matches."""
+        corpus = make_corpus(2000)
+        rng = random.Random(1)
+        queries = rng.sample(sorted(corpus), 40) + list(make_corpus(40, seed=2))
+        queries += ['', 'a', 'py', 'reqeusts', 'numpie', 'a-very-long-package-name-for-testing']
+
+        for query in queries:
+            expected = difflib.get_close_matches(query, corpus.keys(), n=5, cutoff=cutoff)
+            assert find_close_matches(query, corpus, n=5, cutoff=cutoff) == expected, query
+
+    def test_candidates_are_few(self):
+        """Test that the filter actually narrows the search down."""
+        corpus = make_corpus(3000)
+        index = NgramIndex(corpus)
+
+        candidates = index.ratio_candidates('requests', 0.8)
+
+        assert 0 < len(candidates) < len(corpus) / 10
+
+
+class TestMappedNgramIndex:
+    """Tests for the n-gram postings written with the package index."""
+
+    @pytest.fixture
+    def corpus_index(self, tmp_path):
+        corpus = make_corpus(2000)
+        path = str(tmp_path / 'package_names.idx')
+        write_index(path, corpus, ['PyPI'])
+        index = PackageIndex(path)
+        yield corpus, index
+        index.close()
+
+    def test_read_from_the_index(self, corpus_index):
+        """Test that the package index hands out its postings instead of a built index."""
+        corpus, index = corpus_index
+
+        ngram_index = get_ngram_index(index)
+
+        assert isinstance(ngram_index, MappedNgramIndex)
+        assert len(ngram_index) == len(corpus)
+        assert isinstance(get_ngram_index(SwappableIndex(index)), MappedNgramIndex)
+
+    def test_same_results_as_built(self, corpus_index):
+        """Test that the written postings find the same matches as a built index."""
+        corpus, index = corpus_index
+        queries = random.Random(1).sample(sorted(corpus), 20) + ['', 'py', 'reqeusts', 'numpie', 'x']
+
+        for query in queries:
+            assert find_close_matches(query, index) == find_close_matches(query, corpus), query
+            assert find_edit_matches(query, index) == find_edit_matches(query, corpus), query
+
+    def test_missing_gram(self, corpus_index):
+        """Test that a q-gram no name contains has no postings."""
+        _, index = corpus_index
+
+        assert index.ngram_posting('\x02\u00e9') is None
+        assert list(index.ids_with_length(1000)) == []
+
+
+class TestEditDistance:
+    """Tests for the optimal string alignment distance."""
+
+    @pytest.mark.parametrize('a, b, distance', [
+        ('requests', 'requests', 0),
+        ('requests', 'requets', 1),
+        ('requests', 'reqeusts', 1),
+        ('requests', 'requestss', 1),
+        ('requests', 'rekwests', 2),
+        ('', 'ab', 2),
+        ('abc', 'ca', 3),
+    ])
+    def test_distances(self, a, b, distance):
+        assert edit_distance(a, b, 5) == distance
+        assert edit_distance(b, a, 5) == distance
+
+    def test_gives_up_past_max_distance(self):
+        assert edit_distance('requests', 'flask', 2) == 3
+        assert edit_distance('abcdef', 'ghijkl', 1) == 2
+
+
+class TestFindEditMatches:
+    """Tests for the edit distance matcher."""
+
+    def test_typosquats(self):
+        all_names = {'requests': 1, 'request': 1, 'flask': 1, 'requests-oauth': 1}
+
+        assert find_edit_matches('reqeusts', all_names, max_distance=1) == ['requests']
+        assert find_edit_matches('requets', all_names, max_distance=2) == ['request', 'requests']
+
+    @pytest.mark.parametrize('max_distance', [1, 2])
+    def test_same_results_as_brute_force(self, max_distance):
+        """Test that the candidate filter never drops a name within reach."""
+        corpus = make_corpus(2000)
+        queries = random.Random(3).sample(sorted(corpus), 30) + list(make_corpus(30, seed=4))
+        queries += ['', 'a', 'py', 'reqeusts', 'numpie']
+
+        for query in queries:
+            scored = sorted((edit_distance(query, name, max_distance), name) for name in corpus)
+            expected = [name for distance, name in scored if distance <= max_distance][:5]
+            assert find_edit_matches(query, corpus, max_distance=max_distance) == expected, query
@@ -0,0 +1,140 @@
+import json
+
+from namecheck.parse import iter_names_from_html, iter_names_from_json, decode_name, scan_project_page
+
+
+SIMPLE_PAGE = b'''<!DOCTYPE html>
+<html>
+  <head>
+    <meta name="pypi:repository-version" content="1.1">
+    <title>Simple index</title>
+  </head>
+  <body>
+    <a href="/simple/flask/">Flask</a>
+    <a href="/simple/django-rest/">django-rest</a>
+    <A HREF="/simple/numpy/">numpy</A>
+    <a href="/simple/amp/">a&amp;b</a>
+  </body>
+</html>
+'''
+
+
+def split_into_chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestIterNamesFromHtml:
+    """Tests for the streaming simple index parser."""
+
+    def test_single_chunk(self):
+        """Test extracting all names from a page in one chunk."""
+        result = list(iter_names_from_html([SIMPLE_PAGE]))
+
+        assert result == ['Flask', 'django-rest', 'numpy', 'a&b']
+
+    def test_every_chunk_size(self):
+        """Test that anchors split across chunk boundaries are not lost."""
+        expected = list(iter_names_from_html([SIMPLE_PAGE]))
+
+        for size in range(1, 40):
+            chunks = split_into_chunks(SIMPLE_PAGE, size)
+            assert list(iter_names_from_html(chunks)) == expected
+
+    def test_empty_chunks_ignored(self):
+        """Test that empty keep-alive chunks are skipped."""
+        chunks = [b'', b'<a>one</a>', b'', b'<a>two</a>']
+
+        assert list(iter_names_from_html(chunks)) == ['one', 'two']
+
+    def test_no_anchors(self):
+        """Test a page without anchors yields nothing."""
+        assert list(iter_names_from_html([b'<html><body>nothing</body></html>'])) == []
+
+    def test_buffer_stays_small(self):
+        """Test that the parser does not hold on to consumed chunks."""
+        chunks = (b'<a href="/simple/p%d/">p%d</a>\n' % (i, i) for i in range(10000))
+
+        count = sum(1 for _ in iter_names_from_html(chunks))
+
+        assert count == 10000
+
+
+class TestDecodeName:
+    """Tests for decoding raw anchor texts."""
+
+    def test_strips_whitespace(self):
+        assert decode_name(b'  flask\n') == 'flask'
+
+    def test_unescapes_entities(self):
+        assert decode_name(b'a&amp;b') == 'a&b'
+
+
+JSON_PAGE = json.dumps({
+    'meta': {'api-version': '1.1', '_last-serial': 123},
+    'projects': [
+        {'name': 'Flask', '_last-serial': 1},
+        {'name': 'django-rest', '_last-serial': 2},
+        {'_last-serial': 3, 'name': 'caf\u00e9'},
+    ],
+}, indent=1).encode()
+
+
+class TestIterNamesFromJson:
+    """Tests for the streaming PEP 691 JSON index parser."""
+
+    def test_single_chunk(self):
+        """Test extracting all project names from a JSON page."""
+        result = list(iter_names_from_json([JSON_PAGE]))
+
+        assert result == ['Flask', 'django-rest', 'caf\u00e9']
+
+    def test_every_chunk_size(self):
+        """Test that members split across chunk boundaries are not lost."""
+        expected = list(iter_names_from_json([JSON_PAGE]))
+
+        for size in range(1, 40):
+            chunks = split_into_chunks(JSON_PAGE, size)
+            assert list(iter_names_from_json(chunks)) == expected
+
+
+class TestScanProjectPage:
+    """Tests for the early-abort project page scanner."""
+
+    def test_taken_markers(self):
+        """Test that a project header or description means the name is taken."""
+        assert scan_project_page([b'<div class="package-header">']) is True
+        assert scan_project_page([b'<div class="x project-description">']) is True
+
+    def test_missing_markers(self):
+        """Test the 'not found' variants of the page."""
+        assert scan_project_page([b"<h1>We couldn't find this page</h1>"]) is False
+        assert scan_project_page([b'<h1>We couldn&#39;t find this page</h1>']) is False
+        assert scan_project_page([b'<title>404 Not Found</title>']) is False
+
+    def test_no_markers(self):
+        """Test that a page without markers is undecided."""
+        assert scan_project_page([b'<html><script>challenge()</script></html>']) is None
+        assert scan_project_page([]) is None
+
+    def test_marker_split_across_chunks(self):
+        """Test that markers cut at every possible position are still found."""
+        page = b'<html>' + b' ' * 100 + b'<div class="package-header"></div></html>'
+        for size in range(1, 40):
+            assert scan_project_page(split_into_chunks(page, size)) is True
+
+    def test_first_marker_wins(self):
+        """Test that the first decisive marker on the page decides."""
+        page = b'<div class="package-header"></div><p>Not found</p>'
+        assert scan_project_page([page]) is True
+
+    def test_stops_reading_early(self):
+        """Test that no chunks are consumed past the first marker."""
+        consumed = []
+
+        def chunks():
+            for chunk in [b'<body>', b'<div class="package-header">', b'filler', b'filler']:
+                consumed.append(chunk)
+                yield chunk
+
+        assert scan_project_page(chunks()) is True
+        assert len(consumed) == 2
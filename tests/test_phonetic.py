@@ -0,0 +1,47 @@
+import pytest
+
+from namecheck.phonetic import phonetic_key
+
+
+class TestPhoneticKey:
+    """Tests for the sound-alike keys of names."""
+
+    @pytest.mark.parametrize('name, sound_alike', [
+        ('numpy', 'numpie'),
+        ('pillow', 'pilo'),
+        ('phoenix', 'fenix'),
+        ('knight', 'nite'),
+        ('django', 'jango'),
+        ('scikit-learn', 'sci_kit.lern'),
+        ('image', 'imaje'),
+        ('ghost', 'gost'),
+        ('whale', 'wale'),
+    ])
+    def test_sound_alikes_share_a_key(self, name, sound_alike):
+        """Test that names spoken the same get the same key."""
+        assert phonetic_key(name) == phonetic_key(sound_alike)
+
+    @pytest.mark.parametrize('name, other', [
+        ('numpy', 'numba'),
+        ('flask', 'flake'),
+        ('py2', 'py3'),
+    ])
+    def test_different_sounds(self, name, other):
+        """Test that names spoken differently get different keys."""
+        assert phonetic_key(name) != phonetic_key(other)
+
+    def test_keys(self):
+        """Test the keys themselves, a leading vowel is kept."""
+        assert phonetic_key('numpy') == 'NMP'
+        assert phonetic_key('image') == 'AMJ'
+        assert phonetic_key('Thread-Pool') == '0RTPL'
+        assert phonetic_key('') == ''
+        assert phonetic_key('-_.') == ''
+
+    def test_word_keys_reused(self):
+        """Test that remembering the word keys gives the same keys."""
+        word_keys = {}
+        names = ['django-rest', 'django-cms', 'rest-client']
+
+        assert [phonetic_key(name, word_keys) for name in names] == [phonetic_key(name) for name in names]
+        assert set(word_keys) == {'django', 'rest', 'cms', 'client'}
@@ -0,0 +1,113 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from namecheck.session import http_session, MAX_RETRIES
+
+
+def flaky(statuses, headers=None):
+    """Returns a route answering with the given statuses in turn, then 200."""
+    remaining = list(statuses)
+    def route(request_headers):
+        if remaining:
+            return remaining.pop(0), headers or {}, b'try again'
+        return 200, {}, b'ok'
+    return route
+
+
+class TestPooledSession:
+    """Tests for the shared HTTP session."""
+
+    def test_reuses_connections(self, stand_in_server):
+        """Test that consecutive requests share one keep-alive connection."""
+        stand_in_server.routes['/simple/flask/'] = (200, {}, b'flask')
+
+        for _ in range(5):
+            http_session.get(stand_in_server.url + 'simple/flask/', timeout=5)
+        http_session.head(stand_in_server.url + 'simple/flask/', timeout=5)
+
+        assert len(stand_in_server.requests) == 6
+        assert len(stand_in_server.connections) == 1
+
+    def test_retries_transient_errors(self, stand_in_server):
+        """Test that 5xx answers are retried until the request succeeds."""
+        stand_in_server.routes['/simple/'] = flaky([503, 502])
+
+        response = http_session.get(stand_in_server.url + 'simple/', timeout=5)
+
+        assert response.status_code == 200
+        assert len(stand_in_server.requests) == 3
+
+    def test_gives_up_with_last_response(self, stand_in_server):
+        """Test that the last error response is returned once the retries run out."""
+        stand_in_server.routes['/simple/'] = (503, {}, b'unavailable')
+
+        response = http_session.get(stand_in_server.url + 'simple/', timeout=5)
+
+        assert response.status_code == 503
+        assert len(stand_in_server.requests) == MAX_RETRIES + 1
+
+    def test_not_found_not_retried(self, stand_in_server):
+        """Test that a definite answer like a 404 is returned straight away."""
+        response = http_session.head(stand_in_server.url + 'simple/not-a-project/', timeout=5)
+
+        assert response.status_code == 404
+        assert len(stand_in_server.requests) == 1
+
+    def test_honors_retry_after(self, stand_in_server):
+        """Test that a 429 is retried after the time the server asks for."""
+        stand_in_server.routes['/simple/'] = flaky([429], {'Retry-After': '1'})
+
+        start = time.perf_counter()
+        response = http_session.get(stand_in_server.url + 'simple/', timeout=5)
+        elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200
+        assert 1 <= elapsed < 3
+
+    @patch('namecheck.session.MAX_RETRY_AFTER', 0.1)
+    def test_retry_after_is_capped(self, stand_in_server):
+        """Test that a very long Retry-After doesn't stall the session."""
+        stand_in_server.routes['/simple/'] = flaky([429], {'Retry-After': '3600'})
+
+        start = time.perf_counter()
+        response = http_session.get(stand_in_server.url + 'simple/', timeout=5)
+
+        assert response.status_code == 200
+        assert time.perf_counter() - start < 2
+
+    @patch('namecheck.session.MAX_CONNECTIONS_PER_HOST', 2)
+    def test_connections_per_host_are_limited(self, stand_in_server):
+        """Test that concurrent requests to a host share a bounded pool."""
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+        def slow(headers):
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.1)
+            with lock:
+                in_flight.pop()
+            return 200, {}, b'ok'
+        stand_in_server.routes['/simple/'] = slow
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            responses = list(executor.map(
+                lambda _: http_session.get(stand_in_server.url + 'simple/', timeout=5), range(6)))
+
+        assert all(response.status_code == 200 for response in responses)
+        assert max(peak) <= 2
+        assert len(stand_in_server.connections) <= 2
+
+    def test_close_and_reopen(self, stand_in_server):
+        """Test that the session can still be used after closing it."""
+        stand_in_server.routes['/simple/'] = (200, {}, b'ok')
+        http_session.get(stand_in_server.url + 'simple/', timeout=5)
+
+        http_session.close()
+        response = http_session.get(stand_in_server.url + 'simple/', timeout=5)
+
+        assert response.status_code == 200
+        assert len(stand_in_server.connections) == 2
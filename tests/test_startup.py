@@ -0,0 +1,43 @@
+import os
+import sys
+import json
+import subprocess
+
+from namecheck.index import write_index
+
+
+## only needed once the network, the browser or a legacy cache come into play
+DEFERRED_MODULES = ('requests', 'urllib3', 'bs4', 'playwright', 'xmlrpc.client', 'difflib')
+
+
+def imported_modules(code: str, env: dict = None) -> list[str]:
+    """Runs `code` in a fresh interpreter and returns the deferred modules it imported."""
+    script = f'{code}\nimport sys, json\nprint(json.dumps(sorted(sys.modules)))'
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            env={**os.environ, **(env or {})}, check=True)
+    modules = set(json.loads(result.stdout.splitlines()[-1]))
+    return [module for module in DEFERRED_MODULES if module in modules]
+
+
+class TestStartup:
+    """Tests for keeping the heavy dependencies off the startup path."""
+
+    def test_cli_import_defers_heavy_modules(self):
+        """Test that importing the cli (e.g. for --help) loads none of the heavy modules."""
+        assert imported_modules('import namecheck.cli') == []
+
+    def test_warm_start_defers_heavy_modules(self, tmp_path):
+        """Test that loading a cached index and warming up the matcher loads none of them."""
+        cache_dir = tmp_path / 'namecheck'
+        cache_dir.mkdir()
+        write_index(str(cache_dir / 'package_names.idx'), {'flask': 1, 'django': 3}, ['PyPI', 'TestPyPI'])
+        code = (
+            'import namecheck.cli\n'
+            'from namecheck.utils import get_all_package_names\n'
+            'from namecheck.matching import warm_up_ngram_index\n'
+            'names = get_all_package_names()\n'
+            'assert "flask" in names\n'
+            'warm_up_ngram_index(names).join()\n'
+        )
+
+        assert imported_modules(code, env={'XDG_CACHE_HOME': str(tmp_path)}) == []
@@ -0,0 +1,113 @@
+from unittest.mock import patch
+
+from rich.console import Console
+
+from namecheck.index import PackageIndex, write_index
+from namecheck.suggest import (generate_candidates, find_free_names, suggest_names, print_suggestions,
+                               plural_forms, abbreviations, Suggestion)
+
+
+PYPI, TESTPYPI = 1, 2
+
+
+class TestGenerateCandidates:
+    """Tests for generating the variants of a seed."""
+
+    def test_variants(self):
+        """Test that separators, plurals, abbreviations and affixes are all covered."""
+        names = dict(generate_candidates('Data_Loader'))
+
+        for name in ('data-loader', 'dataloader', 'data-loaders', 'data-ldr', 'dl',
+                     'data-loader-cli', 'py-data-loader', 'pydataloader', 'py-data-loader-lib'):
+            assert name in names
+        assert len(names) > 1000
+
+    def test_ranking(self):
+        """Test that the seed comes first and small changes rank above affixes."""
+        candidates = generate_candidates('data-loader')
+        names = [name for name, _ in candidates]
+
+        assert names[0] == 'data-loader'
+        assert names.index('data-loaders') < names.index('data-loader-py') < names.index('py-data-loader-lib')
+        assert [penalty for _, penalty in candidates] == sorted(penalty for _, penalty in candidates)
+
+    def test_normalized_and_unique(self):
+        """Test that every candidate is a distinct PEP 503 normalized name."""
+        names = [name for name, _ in generate_candidates('my.tool')]
+
+        assert len(names) == len(set(names))
+        assert all(name == name.lower() and '_' not in name and '.' not in name for name in names)
+
+    def test_empty_seed(self):
+        """Test that a seed without words has no candidates."""
+        assert generate_candidates(' -_ ') == []
+
+    def test_plural_forms(self):
+        """Test pluralizing and singularizing a word."""
+        assert plural_forms('tool') == ['tools']
+        assert plural_forms('tools') == ['tool']
+        assert plural_forms('library') == ['libraries']
+        assert plural_forms('libraries') == ['library']
+        assert plural_forms('box') == ['boxes']
+
+    def test_abbreviations(self):
+        """Test that only longer words are abbreviated."""
+        assert abbreviations('loader') == ['loa', 'load', 'ldr']
+        assert abbreviations('data') == []
+
+
+class TestFindFreeNames:
+    """Tests for filtering the candidates against the index."""
+
+    def test_mapping(self):
+        """Test that indexed and too similar names are dropped from a plain mapping."""
+        candidates = [('data-loader', 0), ('dataloader', 1), ('data-loaders', 1), ('data-io', 2)]
+
+        free = find_free_names(candidates, {'data-loader': PYPI, 'data-i0': TESTPYPI})
+
+        assert free == [('data-loaders', 1)]
+
+    def test_index(self, tmp_path):
+        """Test the same filter on the package index, from its precomputed keys."""
+        path = str(tmp_path / 'package_names.idx')
+        write_index(path, {'data-loader': PYPI, 'data-i0': TESTPYPI}, ['PyPI', 'TestPyPI'])
+        candidates = [('data-loader', 0), ('dataloader', 1), ('data-loaders', 1), ('data-io', 2)]
+
+        assert find_free_names(candidates, PackageIndex(path)) == [('data-loaders', 1)]
+
+
+class TestSuggestNames:
+    """Tests for suggesting free names."""
+
+    @patch('namecheck.suggest.is_name_taken_project_url')
+    def test_only_best_verified(self, mock_project_url):
+        """Test that only the best names are checked directly."""
+        mock_project_url.return_value = []
+
+        suggestions = suggest_names('data-loader', {'data-loader': PYPI}, count=4, verify=2)
+
+        ## 'dataloader' collides with 'data-loader'
+        assert [s.name for s in suggestions] == ['data-loaders', 'data-loader-py', 'py-data-loader', 'data-loader-lib']
+        assert [s.verified for s in suggestions] == [True, True, False, False]
+        assert mock_project_url.call_count == 2
+
+    @patch('namecheck.suggest.is_name_taken_project_url')
+    def test_taken_after_direct_check(self, mock_project_url):
+        """Test that a name found taken on the project urls is dropped."""
+        mock_project_url.side_effect = lambda name, deadline: ['PyPI'] if name == 'data-loaders' else []
+
+        suggestions = suggest_names('data-loader', {'data-loader': PYPI}, count=3, verify=2)
+
+        assert [s.name for s in suggestions] == ['data-loader-py', 'py-data-loader', 'data-loader-lib']
+
+    def test_print_suggestions(self):
+        """Test that the suggestions are listed with how they were checked."""
+        console = Console(record=True, width=120)
+
+        print_suggestions('data', [Suggestion('data-py', 2, verified=True), Suggestion('py-data', 2)], console)
+        print_suggestions('data', [], console)
+
+        output = console.export_text()
+        assert 'data-py (checked on the project urls)' in output
+        assert 'py-data (not in the index)' in output
+        assert "No free names found around 'data'" in output
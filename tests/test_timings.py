@@ -0,0 +1,100 @@
+import io
+import time
+import threading
+
+import pytest
+
+from namecheck.timings import Timings
+
+
+@pytest.fixture
+def timings():
+    timings = Timings()
+    timings.enabled = True
+    return timings
+
+
+class TestTimings:
+    """Tests for the per-phase timings."""
+
+    def test_disabled_records_nothing(self):
+        """Test that nothing is collected unless enabled."""
+        timings = Timings()
+
+        with timings.phase('cache load'):
+            pass
+        timings.record('render', 1.0)
+        items = list(timings.timed_iter([1, 2], 'download'))
+
+        assert items == [1, 2]
+        assert timings.summary() == []
+
+    def test_phase(self, timings):
+        """Test that runs of a phase are counted, summed and their maximum kept."""
+        timings.record('direct check: PyPI (simple)', 0.2)
+        timings.record('direct check: PyPI (simple)', 0.5)
+        with timings.phase('render'):
+            time.sleep(0.01)
+
+        summary = {phase: values for phase, *values in timings.summary()}
+
+        assert summary['direct check: PyPI (simple)'] == [2, pytest.approx(0.7), 0.5]
+        assert summary['render'][0] == 1
+        assert summary['render'][1] >= 0.01
+        assert list(summary) == ['direct check: PyPI (simple)', 'render']
+
+    def test_phase_recorded_on_error(self, timings):
+        """Test that a phase that raised still shows up."""
+        with pytest.raises(ValueError):
+            with timings.phase('index fetch: PyPI'):
+                raise ValueError
+
+        assert timings.summary()[0][:2] == ('index fetch: PyPI', 1)
+
+    def test_timed_iter_splits_wait_and_work(self, timings):
+        """Test that waiting for items and working on them are timed apart."""
+        def slow_source():
+            for i in range(3):
+                time.sleep(0.02)
+                yield i
+
+        for _ in timings.timed_iter(slow_source(), 'download', 'parse'):
+            time.sleep(0.01)
+
+        summary = {phase: total for phase, _, total, _ in timings.summary()}
+        assert summary['download'] >= 0.06
+        assert 0.03 <= summary['parse'] < summary['download']
+
+    def test_timed_iter_closed_early(self, timings):
+        """Test that a consumer stopping early still records the wait."""
+        items = timings.timed_iter(iter(range(10)), 'download')
+        next(items)
+        items.close()
+
+        assert timings.summary()[0][:2] == ('download', 1)
+
+    def test_threads(self, timings):
+        """Test recording the same phase from many threads."""
+        def record():
+            for _ in range(1000):
+                timings.record('direct check: PyPI (simple)', 0.001)
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert timings.summary()[0][1] == 4000
+
+    def test_print_summary(self, timings):
+        """Test the printed breakdown."""
+        timings.record('cache load', 0.0012)
+        timings.record('close matches', 0.25)
+        out = io.StringIO()
+
+        timings.print_summary(out)
+
+        lines = out.getvalue().strip().splitlines()
+        assert lines[0].split() == ['phase', 'runs', 'total', 'ms', 'max', 'ms']
+        assert lines[1].split() == ['cache', 'load', '1', '1.2', '1.2']
+        assert lines[2].split() == ['close', 'matches', '1', '250.0', '250.0']
@@ -1,7 +1,13 @@
 import os
 import sys
+import time
+import gzip
+import json
 import pickle
 import difflib
+import threading
+import xmlrpc.client
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
 import requests
 import pytest
 from io import StringIO
@@ -10,45 +16,61 @@ from collections import defaultdict
 from bs4 import BeautifulSoup
 from rich.console import Console
 
+from namecheck.index import PackageIndex, SwappableIndex, write_index
+
 from namecheck.utils import (
+    JSON_INDEX_CONTENT_TYPE,
     load_package_names_from_cache,
     save_package_names_to_cache,
     clear_cache,
     get_all_package_names,
+    wait_for_background_refresh,
+    keep_index_fresh,
+    fetch_source_index,
+    fetch_changelog_since,
+    apply_changelog,
+    load_index_meta,
+    save_index_meta,
     get_sources_for_name,
+    get_similar_names,
+    get_sound_alikes,
+    search_package_names,
     is_name_taken_global_index,
     is_name_taken_project_url,
+    check_project_url,
+    get_direct_checks,
+    get_direct_check_cache,
+    save_direct_check_cache,
+    probe_simple_index,
+    probe_project_page,
+    DirectCheck,
     get_close_matches,
     get_name_availability,
     render_name_availability,
     print_available,
     print_taken,
     print_matches,
-    SOURCES
+    encode_sources,
+    decode_sources,
+    SOURCES,
+    SOURCE_BITS
 )
 
+PYPI = SOURCE_BITS['PyPI']
+TESTPYPI = SOURCE_BITS['TestPyPI']
+
 
 class TestCacheFunctions:
     """Tests for cache loading and saving functions."""
 
-    @patch('namecheck.utils.user_cache_dir')
-    @patch('os.path.exists')
-    @patch('os.path.getsize')
-    @patch('builtins.open', create=True)
-    @patch('pickle.load')
-    def test_load_package_names_from_cache_success(self, mock_pickle_load, mock_open, mock_getsize, mock_exists, mock_cache_dir):
+    def test_load_package_names_from_cache_success(self):
         """Test successfully loading package names from cache."""
-        mock_cache_dir.return_value = '/fake/cache/dir'
-        mock_exists.return_value = True
-        mock_getsize.return_value = 100
-        
-        expected_data = {'package1': {'PyPI'}, 'package2': {'TestPyPI'}}
-        mock_pickle_load.return_value = expected_data
+        save_package_names_to_cache({'package1': PYPI, 'package2': TESTPYPI})
         
         result = load_package_names_from_cache()
         
-        assert result == {'package1': {'PyPI'}, 'package2': {'TestPyPI'}}
-        mock_open.assert_called_once_with('/fake/cache/dir/package_names.pkl', 'rb')
+        assert isinstance(result, PackageIndex)
+        assert result == {'package1': PYPI, 'package2': TESTPYPI}
 
     @patch('namecheck.utils.user_cache_dir')
     @patch('os.path.exists')
@@ -74,17 +96,10 @@ class TestCacheFunctions:
         
         assert result is None
 
-    @patch('namecheck.utils.user_cache_dir')
-    @patch('os.path.exists')
-    @patch('os.path.getsize')
-    @patch('builtins.open', create=True)
-    @patch('pickle.load')
-    def test_load_package_names_corrupted_cache(self, mock_pickle_load, mock_open, mock_getsize, mock_exists, mock_cache_dir, capsys):
+    def test_load_package_names_corrupted_cache(self, isolated_cache_dir, capsys):
         """Test loading when cache file is corrupted."""
-        mock_cache_dir.return_value = '/fake/cache/dir'
-        mock_exists.return_value = True
-        mock_getsize.return_value = 100
-        mock_pickle_load.side_effect = pickle.UnpicklingError("Corrupted data")
+        isolated_cache_dir.mkdir()
+        (isolated_cache_dir / 'package_names.idx').write_bytes(b'definitely not an index')
         
         result = load_package_names_from_cache()
         
@@ -92,20 +107,59 @@ class TestCacheFunctions:
         captured = capsys.readouterr()
         assert "corrupted" in captured.err.lower()
 
-    @patch('namecheck.utils.user_cache_dir')
-    @patch('os.makedirs')
-    @patch('builtins.open', create=True)
-    @patch('pickle.dump')
-    def test_save_package_names_to_cache(self, mock_pickle_dump, mock_open, mock_makedirs, mock_cache_dir):
+    def test_load_package_names_corrupted_legacy_cache(self, isolated_cache_dir, capsys):
+        """Test loading when the legacy pickle cache is corrupted."""
+        isolated_cache_dir.mkdir()
+        (isolated_cache_dir / 'package_names.pkl').write_bytes(b'definitely not a pickle')
+        
+        result = load_package_names_from_cache()
+        
+        assert result is None
+        captured = capsys.readouterr()
+        assert "corrupted" in captured.err.lower()
+
+    def test_load_package_names_migrates_legacy_cache(self, isolated_cache_dir):
+        """Test that a pickle cache is converted to the index format."""
+        isolated_cache_dir.mkdir()
+        legacy_data = defaultdict(set, {'package1': {'PyPI'}, 'package2': {'PyPI', 'TestPyPI'}})
+        with open(isolated_cache_dir / 'package_names.pkl', 'wb') as f:
+            pickle.dump(legacy_data, f)
+        
+        result = load_package_names_from_cache()
+        
+        assert isinstance(result, PackageIndex)
+        assert result == {'package1': PYPI, 'package2': PYPI | TESTPYPI}
+        assert not (isolated_cache_dir / 'package_names.pkl').exists()
+        assert (isolated_cache_dir / 'package_names.idx').exists()
+
+    def test_save_package_names_to_cache(self, isolated_cache_dir):
         """Test saving package names to cache."""
-        mock_cache_dir.return_value = '/fake/cache/dir'
-        test_data = {'package1': {'PyPI'}}
+        test_data = {'package1': PYPI}
         
         save_package_names_to_cache(test_data)
         
-        mock_makedirs.assert_called_once_with('/fake/cache/dir', exist_ok=True)
-        mock_open.assert_called_once_with('/fake/cache/dir/package_names.pkl', 'wb')
-        mock_pickle_dump.assert_called_once()
+        assert (isolated_cache_dir / 'package_names.idx').exists()
+        assert load_package_names_from_cache() == test_data
+
+    def test_clear_cache_removes_tmp_files(self, isolated_cache_dir):
+        """Test that the files of killed writes are cleared with the cache."""
+        save_package_names_to_cache({'package1': PYPI})
+        (isolated_cache_dir / 'package_names.idx.12345.tmp').write_bytes(b'half written')
+
+        clear_cache()
+
+        assert list(isolated_cache_dir.iterdir()) == []
+
+    def test_save_package_names_writes_filters(self, isolated_cache_dir):
+        """Test that the cache is saved with a Bloom filter per source, used once loaded."""
+        save_package_names_to_cache({'package1': PYPI, 'package2': TESTPYPI})
+
+        assert (isolated_cache_dir / 'package_names.pypi.bloom').exists()
+        assert (isolated_cache_dir / 'package_names.testpypi.bloom').exists()
+        index = load_package_names_from_cache()
+        with patch.object(PackageIndex, '_find', side_effect=AssertionError):
+            assert not is_name_taken_global_index('requests', index)
+        assert is_name_taken_global_index('Package1', index)
 
     @patch('namecheck.utils.user_cache_dir')
     @patch('os.path.exists')
@@ -113,13 +167,12 @@ class TestCacheFunctions:
     def test_clear_cache_success(self, mock_remove, mock_exists, mock_cache_dir, capsys):
         """Test successfully clearing the cache when cache file exists."""
         mock_cache_dir.return_value = '/fake/cache/dir'
-        mock_exists.return_value = True
+        mock_exists.side_effect = lambda path: path.endswith('.idx')
         
         result = clear_cache()
         
         assert result is True
-        mock_exists.assert_called_once_with('/fake/cache/dir/package_names.pkl')
-        mock_remove.assert_called_once_with('/fake/cache/dir/package_names.pkl')
+        mock_remove.assert_called_once_with('/fake/cache/dir/package_names.idx')
         
         captured = capsys.readouterr()
         assert "Cache cleared successfully" in captured.err
@@ -135,7 +188,6 @@ class TestCacheFunctions:
         result = clear_cache()
         
         assert result is False
-        mock_exists.assert_called_once_with('/fake/cache/dir/package_names.pkl')
         mock_remove.assert_not_called()
         
         captured = capsys.readouterr()
@@ -153,21 +205,25 @@ class TestCacheFunctions:
         with pytest.raises(OSError):
             clear_cache()
         
-        mock_remove.assert_called_once_with('/fake/cache/dir/package_names.pkl')
+        mock_remove.assert_called_once_with('/fake/cache/dir/package_names.idx')
 
     @patch('namecheck.utils.user_cache_dir')
     @patch('os.path.exists')
     @patch('os.remove')
     def test_clear_cache_correct_path_construction(self, mock_remove, mock_exists, mock_cache_dir):
-        """Test that the cache file path is correctly constructed."""
+        """Test that the cache file paths are correctly constructed."""
         mock_cache_dir.return_value = '/custom/cache/location'
         mock_exists.return_value = True
         
         clear_cache()
         
-        expected_path = '/custom/cache/location/package_names.pkl'
-        mock_exists.assert_called_once_with(expected_path)
-        mock_remove.assert_called_once_with(expected_path)
+        expected_paths = ['/custom/cache/location/package_names.idx',
+                          '/custom/cache/location/package_names.pkl',
+                          '/custom/cache/location/direct_checks.json',
+                          '/custom/cache/location/package_names.pypi.bloom',
+                          '/custom/cache/location/package_names.testpypi.bloom']
+        assert mock_exists.call_args_list == [call(path) for path in expected_paths]
+        assert mock_remove.call_args_list == [call(path) for path in expected_paths]
 
 
 class TestGetAllPackageNames:
@@ -176,7 +232,7 @@ class TestGetAllPackageNames:
     @patch('namecheck.utils.load_package_names_from_cache')
     def test_get_all_package_names_from_cache(self, mock_load_cache):
         """Test that cached data is returned when available."""
-        cached_data = {'package1': {'PyPI'}, 'package2': {'TestPyPI'}}
+        cached_data = {'package1': PYPI, 'package2': TESTPYPI}
         mock_load_cache.return_value = cached_data
         
         result = get_all_package_names()
@@ -185,7 +241,7 @@ class TestGetAllPackageNames:
 
     @patch('namecheck.utils.load_package_names_from_cache')
     @patch('namecheck.utils.save_package_names_to_cache')
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     def test_get_all_package_names_fetch_success(self, mock_get, mock_save, mock_load_cache, capsys):
         """Test fetching packages from sources when cache is empty."""
         mock_load_cache.return_value = None
@@ -200,6 +256,9 @@ class TestGetAllPackageNames:
         </html>
         '''
         mock_response.raise_for_status = Mock()
+        mock_response.iter_content.return_value = [mock_response.content]
+        mock_response.status_code = 200
+        mock_response.headers = {'Content-Type': 'text/html'}
         mock_get.return_value = mock_response
         
         result = get_all_package_names()
@@ -207,13 +266,13 @@ class TestGetAllPackageNames:
         assert 'package1' in result
         assert 'package2' in result
         # Both PyPI and TestPyPI will have these packages since we return the same mock for both
-        assert result['package1'] == {'PyPI', 'TestPyPI'}
-        assert result['package2'] == {'PyPI', 'TestPyPI'}
+        assert result['package1'] == PYPI | TESTPYPI
+        assert result['package2'] == PYPI | TESTPYPI
         mock_save.assert_called_once()
 
     @patch('namecheck.utils.load_package_names_from_cache')
     @patch('namecheck.utils.save_package_names_to_cache')
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     def test_get_all_package_names_multiple_sources(self, mock_get, mock_save, mock_load_cache):
         """Test fetching from multiple sources with overlapping packages."""
         mock_load_cache.return_value = None
@@ -221,23 +280,31 @@ class TestGetAllPackageNames:
         pypi_response = Mock()
         pypi_response.content = b'<html><body><a>shared</a><a>pypi-only</a></body></html>'
         pypi_response.raise_for_status = Mock()
+        pypi_response.iter_content.return_value = [pypi_response.content]
+        pypi_response.status_code = 200
+        pypi_response.headers = {'Content-Type': 'text/html'}
         
         testpypi_response = Mock()
         testpypi_response.content = b'<html><body><a>shared</a><a>testpypi-only</a></body></html>'
         testpypi_response.raise_for_status = Mock()
+        testpypi_response.iter_content.return_value = [testpypi_response.content]
+        testpypi_response.status_code = 200
+        testpypi_response.headers = {'Content-Type': 'text/html'}
         
-        mock_get.side_effect = [pypi_response, testpypi_response]
+        ## the sources are fetched concurrently, so answer by url rather than by call order
+        responses = {SOURCES['PyPI'] + 'simple/': pypi_response, SOURCES['TestPyPI'] + 'simple/': testpypi_response}
+        mock_get.side_effect = lambda url, **kwargs: responses[url]
         
         result = get_all_package_names()
         
         assert 'shared' in result
-        assert result['shared'] == {'PyPI', 'TestPyPI'}
-        assert result['pypi-only'] == {'PyPI'}
-        assert result['testpypi-only'] == {'TestPyPI'}
+        assert result['shared'] == PYPI | TESTPYPI
+        assert result['pypi-only'] == PYPI
+        assert result['testpypi-only'] == TESTPYPI
 
     @patch('namecheck.utils.load_package_names_from_cache')
     @patch('namecheck.utils.save_package_names_to_cache')
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     def test_get_all_package_names_request_exception(self, mock_get, mock_save, mock_load_cache, capsys):
         """Test handling of request exceptions."""
         mock_load_cache.return_value = None
@@ -250,7 +317,7 @@ class TestGetAllPackageNames:
         assert "Error fetching data" in captured.err
 
     @patch('namecheck.utils.load_package_names_from_cache')
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     def test_get_all_package_names_case_normalization(self, mock_get, mock_load_cache):
         """Test that package names are normalized to lowercase."""
         mock_load_cache.return_value = None
@@ -258,6 +325,9 @@ class TestGetAllPackageNames:
         mock_response = Mock()
         mock_response.content = b'<html><body><a>MyPackage</a><a>UPPERCASE</a></body></html>'
         mock_response.raise_for_status = Mock()
+        mock_response.iter_content.return_value = [mock_response.content]
+        mock_response.status_code = 200
+        mock_response.headers = {'Content-Type': 'text/html'}
         mock_get.return_value = mock_response
         
         with patch('namecheck.utils.save_package_names_to_cache'):
@@ -267,12 +337,474 @@ class TestGetAllPackageNames:
         assert 'uppercase' in result
 
 
+def json_index(*names) -> bytes:
+    return json.dumps({
+        'meta': {'api-version': '1.1', '_last-serial': 42},
+        'projects': [{'name': name, '_last-serial': 1} for name in names],
+    }).encode()
+
+
+class TestConcurrentFetch:
+    """Tests for fetching the sources concurrently."""
+
+    @patch('namecheck.utils.refresh_source_names')
+    def test_sources_fetched_concurrently(self, mock_refresh):
+        """Test that every source is in flight at the same time."""
+        barrier = threading.Barrier(len(SOURCES), timeout=5)
+        def refresh(source_name, url, cached_names, source_meta):
+            ## only passes if all sources wait here together
+            barrier.wait()
+            return {f'{source_name.lower()}-only'}, {}
+        mock_refresh.side_effect = refresh
+
+        result = get_all_package_names()
+
+        assert result == {'pypi-only': PYPI, 'testpypi-only': TESTPYPI}
+
+    @patch('namecheck.utils.refresh_source_names')
+    def test_failing_source_does_not_affect_others(self, mock_refresh, capsys):
+        """Test that per-source errors are still reported and isolated."""
+        def refresh(source_name, url, cached_names, source_meta):
+            if source_name == 'TestPyPI':
+                raise requests.RequestException("Connection error")
+            return {'flask'}, {'last_serial': 1}
+        mock_refresh.side_effect = refresh
+
+        result = get_all_package_names()
+
+        assert result == {'flask': PYPI}
+        assert load_index_meta() == {'PyPI': {'last_serial': 1}}
+        assert "Error fetching data from https://test.pypi.org/simple/" in capsys.readouterr().err
+
+    @patch('namecheck.utils.refresh_source_names')
+    def test_progress_reported_per_source(self, mock_refresh):
+        """Test that the spinner shows the status of every source."""
+        mock_refresh.side_effect = lambda source_name, *args: ({'flask', 'django'}, {})
+        update_spinner = Mock()
+
+        get_all_package_names.__wrapped__(update_spinner=update_spinner)
+
+        messages = [c.args[0] for c in update_spinner.call_args_list]
+        assert any('PyPI: 2 names' in m and 'TestPyPI: 2 names' in m for m in messages)
+        assert any('fetching' in m for m in messages)
+
+
+class TestFetchSourceIndex:
+    """Tests for fetching a single index against a local stand-in server."""
+
+    def test_fetch_json_index(self, stand_in_server):
+        """Test that the JSON index is negotiated, gzipped and parsed."""
+        stand_in_server.routes['/simple/'] = (200, {
+            'Content-Type': 'application/vnd.pypi.simple.v1+json',
+            'Content-Encoding': 'gzip',
+            'ETag': '"abc"',
+            'Last-Modified': 'Wed, 12 Nov 2025 10:00:00 GMT',
+            'X-PyPI-Last-Serial': '42',
+        }, gzip.compress(json_index('Flask', 'django')))
+
+        names, validators = fetch_source_index(stand_in_server.url + 'simple/')
+
+        assert names == ['flask', 'django']
+        assert validators == {'etag': '"abc"', 'last_modified': 'Wed, 12 Nov 2025 10:00:00 GMT', 'last_serial': 42}
+        _, _, headers = stand_in_server.requests[0]
+        assert 'application/vnd.pypi.simple.v1+json' in headers['Accept']
+        assert 'gzip' in headers['Accept-Encoding']
+
+    def test_fetch_html_fallback(self, stand_in_server):
+        """Test falling back to the HTML index when JSON isn't served."""
+        stand_in_server.routes['/simple/'] = (200, {'Content-Type': 'text/html'},
+                                              b'<html><body><a>Flask</a><a>django</a></body></html>')
+
+        names, validators = fetch_source_index(stand_in_server.url + 'simple/')
+
+        assert names == ['flask', 'django']
+        assert validators == {}
+
+    def test_fetch_not_modified(self, stand_in_server):
+        """Test that a conditional request returns None on a 304."""
+        def index(headers):
+            if headers.get('If-None-Match') == '"abc"':
+                return 304, {}, b''
+            return 200, {'Content-Type': 'application/vnd.pypi.simple.v1+json'}, json_index('flask')
+        stand_in_server.routes['/simple/'] = index
+
+        names, validators = fetch_source_index(stand_in_server.url + 'simple/', {'etag': '"abc"'})
+
+        assert names is None
+        assert validators == {'etag': '"abc"'}
+
+    def test_fetch_error_status(self, stand_in_server):
+        """Test that error statuses raise a request exception."""
+        stand_in_server.routes['/simple/'] = (503, {}, b'unavailable')
+
+        with pytest.raises(requests.RequestException):
+            fetch_source_index(stand_in_server.url + 'simple/')
+
+
+class TestRefreshPackageNames:
+    """Tests for revalidating the cached index."""
+
+    def test_refresh_only_downloads_changed_sources(self, stand_in_server):
+        """Test that an unchanged source is answered by a 304 and reused from the cache."""
+        def pypi_index(headers):
+            if headers.get('If-None-Match') == '"pypi-1"':
+                return 304, {}, b''
+            return 200, {'Content-Type': 'application/vnd.pypi.simple.v1+json', 'ETag': '"pypi-1"'}, json_index('flask')
+        stand_in_server.routes['/simple/'] = pypi_index
+        stand_in_server.routes['/test/simple/'] = (200, {'Content-Type': 'application/vnd.pypi.simple.v1+json',
+                                                         'ETag': '"test-1"'}, json_index('flask', 'sandbox'))
+        sources = {'PyPI': stand_in_server.url, 'TestPyPI': stand_in_server.url + 'test/'}
+
+        with patch.dict('namecheck.utils.SOURCES', sources, clear=True):
+            first = get_all_package_names()
+            stand_in_server.routes['/test/simple/'] = (200, {'Content-Type': 'application/vnd.pypi.simple.v1+json',
+                                                             'ETag': '"test-2"'}, json_index('sandbox', 'newcomer'))
+            second = get_all_package_names(refresh=True)
+
+        assert first == {'flask': PYPI | TESTPYPI, 'sandbox': TESTPYPI}
+        assert second == {'flask': PYPI, 'sandbox': TESTPYPI, 'newcomer': TESTPYPI}
+        assert load_index_meta() == {'PyPI': {'etag': '"pypi-1"'}, 'TestPyPI': {'etag': '"test-2"'}}
+        pypi_requests = [headers for _, path, headers in stand_in_server.requests if path == '/simple/']
+        assert 'If-None-Match' not in pypi_requests[0]
+        assert pypi_requests[1]['If-None-Match'] == '"pypi-1"'
+
+    def test_refresh_keeps_cached_source_on_error(self, stand_in_server):
+        """Test that a failing source keeps its cached names during a refresh."""
+        stand_in_server.routes['/simple/'] = (200, {'Content-Type': 'text/html'}, b'<a>flask</a>')
+        stand_in_server.routes['/test/simple/'] = (200, {'Content-Type': 'text/html'}, b'<a>sandbox</a>')
+        sources = {'PyPI': stand_in_server.url, 'TestPyPI': stand_in_server.url + 'test/'}
+
+        with patch.dict('namecheck.utils.SOURCES', sources, clear=True):
+            get_all_package_names()
+            stand_in_server.routes['/test/simple/'] = (500, {}, b'oops')
+            result = get_all_package_names(refresh=True)
+
+        assert result == {'flask': PYPI, 'sandbox': TESTPYPI}
+
+
+class TestStaleWhileRevalidate:
+    """Tests for serving a stale cache while it's refreshed in the background."""
+
+    def make_stale_cache(self, cache_dir, package_names, age: float):
+        save_package_names_to_cache(package_names)
+        cache_file = cache_dir / 'package_names.idx'
+        stale_time = time.time() - age
+        os.utime(cache_file, (stale_time, stale_time))
+
+    @patch('namecheck.utils.fetch_all_package_names')
+    def test_fresh_cache_not_refreshed(self, mock_fetch, isolated_cache_dir):
+        """Test that a cache younger than max_age is used as is."""
+        self.make_stale_cache(isolated_cache_dir, {'flask': PYPI}, age=60)
+
+        result = get_all_package_names(max_age=3600)
+
+        assert isinstance(result, PackageIndex)
+        mock_fetch.assert_not_called()
+
+    @patch('namecheck.utils.fetch_all_package_names')
+    def test_no_max_age_never_refreshes(self, mock_fetch, isolated_cache_dir):
+        """Test that without max_age an old cache is used until --refresh."""
+        self.make_stale_cache(isolated_cache_dir, {'flask': PYPI}, age=10 ** 6)
+
+        get_all_package_names()
+
+        mock_fetch.assert_not_called()
+
+    def test_stale_cache_served_then_swapped(self, stand_in_server, isolated_cache_dir):
+        """Test that a stale cache is returned at once and swapped for the fresh index."""
+        self.make_stale_cache(isolated_cache_dir, {'flask': PYPI}, age=7200)
+        release = threading.Event()
+        def index(headers):
+            release.wait(5)
+            return 200, {'Content-Type': 'application/vnd.pypi.simple.v1+json'}, json_index('flask', 'django')
+        stand_in_server.routes['/simple/'] = index
+        stand_in_server.routes['/test/simple/'] = (200, {'Content-Type': 'application/vnd.pypi.simple.v1+json'},
+                                                   json_index('sandbox'))
+        sources = {'PyPI': stand_in_server.url, 'TestPyPI': stand_in_server.url + 'test/'}
+
+        with patch.dict('namecheck.utils.SOURCES', sources, clear=True):
+            result = get_all_package_names(max_age=3600)
+            ## answered from the stale names while the refresh is held up
+            assert isinstance(result, SwappableIndex)
+            assert result == {'flask': PYPI}
+            release.set()
+            assert wait_for_background_refresh(timeout=5)
+
+        assert result.version == 1
+        assert result == {'flask': PYPI, 'django': PYPI, 'sandbox': TESTPYPI}
+        assert load_package_names_from_cache() == {'flask': PYPI, 'django': PYPI, 'sandbox': TESTPYPI}
+
+    @patch('namecheck.utils.fetch_all_package_names')
+    def test_stale_cache_refreshed_first(self, mock_fetch, isolated_cache_dir):
+        """Test that without a background refresh a stale cache is refreshed before it's returned."""
+        self.make_stale_cache(isolated_cache_dir, {'flask': PYPI}, age=7200)
+        mock_fetch.side_effect = lambda cached_names, report_status: save_package_names_to_cache(
+            {'flask': PYPI, 'django': PYPI})
+
+        result = get_all_package_names(max_age=3600, in_background=False)
+
+        assert isinstance(result, PackageIndex)
+        assert result == {'flask': PYPI, 'django': PYPI}
+        assert mock_fetch.call_args.args[0] == {'flask': PYPI}
+
+    @patch('namecheck.utils.fetch_all_package_names')
+    def test_failed_refresh_keeps_stale_names(self, mock_fetch, capsys, isolated_cache_dir):
+        """Test that a failing background refresh leaves the stale names in place."""
+        self.make_stale_cache(isolated_cache_dir, {'flask': PYPI}, age=7200)
+        mock_fetch.side_effect = OSError("disk full")
+
+        result = get_all_package_names(max_age=3600)
+        assert wait_for_background_refresh(timeout=5)
+
+        assert result == {'flask': PYPI}
+        assert result.version == 0
+        assert "Could not refresh" in capsys.readouterr().err
+
+
+class TestKeepIndexFresh:
+    """Tests for keeping the index of a long-running process up to date."""
+
+    def wait_for(self, condition, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_rewritten_cache_reopened(self, isolated_cache_dir):
+        """Test that an index rewritten by another run is swapped in."""
+        save_package_names_to_cache({'flask': PYPI})
+        index = SwappableIndex(load_package_names_from_cache())
+        stop = threading.Event()
+        watch = keep_index_fresh(index, max_age=3600, interval=0.01, stop=stop)
+
+        save_package_names_to_cache({'flask': PYPI, 'django': PYPI})
+        ## a different mtime, even on coarse clocks
+        rewritten = time.time() - 60
+        os.utime(isolated_cache_dir / 'package_names.idx', (rewritten, rewritten))
+
+        try:
+            assert self.wait_for(lambda: index.version == 1)
+        finally:
+            stop.set()
+            watch.join(5)
+        assert index == {'flask': PYPI, 'django': PYPI}
+
+    @patch('namecheck.utils.fetch_all_package_names')
+    def test_stale_cache_refreshed(self, mock_fetch, isolated_cache_dir):
+        """Test that an index older than max_age is refreshed."""
+        save_package_names_to_cache({'flask': PYPI})
+        index = SwappableIndex(load_package_names_from_cache())
+        mock_fetch.side_effect = lambda cached_names: save_package_names_to_cache(
+            {'flask': PYPI, 'django': PYPI})
+        stop = threading.Event()
+        watch = keep_index_fresh(index, max_age=3600, interval=0.01, stop=stop)
+
+        stale_time = time.time() - 7200
+        os.utime(isolated_cache_dir / 'package_names.idx', (stale_time, stale_time))
+
+        try:
+            assert self.wait_for(lambda: index.version == 1)
+        finally:
+            stop.set()
+            watch.join(5)
+        assert index == {'flask': PYPI, 'django': PYPI}
+        assert mock_fetch.call_args.args[0] is index
+
+    @patch('namecheck.utils.fetch_all_package_names')
+    def test_fresh_cache_left_alone(self, mock_fetch, isolated_cache_dir):
+        """Test that an untouched fresh index is neither refreshed nor reopened."""
+        save_package_names_to_cache({'flask': PYPI})
+        index = SwappableIndex(load_package_names_from_cache())
+        stop = threading.Event()
+        watch = keep_index_fresh(index, max_age=3600, interval=0.01, stop=stop)
+
+        time.sleep(0.1)
+        stop.set()
+        watch.join(5)
+
+        mock_fetch.assert_not_called()
+        assert index.version == 0
+
+
+class TestIncrementalRefresh:
+    """Tests for the changelog based incremental refresh."""
+
+    def test_apply_changelog(self):
+        """Test applying creations, removals and renames."""
+        names = {'flask', 'old-name', 'doomed'}
+        events = [
+            ['NewPkg', None, 1700000000, 'create', 101],
+            ['Flask', '3.0.0', 1700000001, 'new release', 102],
+            ['doomed', None, 1700000002, 'remove project', 103],
+            ['renamed', None, 1700000003, 'rename from Old-Name', 104],
+        ]
+
+        last_serial = apply_changelog(names, events)
+
+        assert names == {'flask', 'newpkg', 'renamed'}
+        assert last_serial == 104
+
+    def test_apply_changelog_no_events(self):
+        """Test that an empty changelog changes nothing."""
+        names = {'flask'}
+
+        assert apply_changelog(names, []) == 0
+        assert names == {'flask'}
+
+    def test_fetch_changelog_since(self):
+        """Test calling changelog_since_serial on a local XML-RPC stand-in."""
+        class PyPIHandler(SimpleXMLRPCRequestHandler):
+            rpc_paths = ('/pypi',)
+        server = SimpleXMLRPCServer(('127.0.0.1', 0), requestHandler=PyPIHandler, logRequests=False)
+        seen = []
+        def changelog_since_serial(serial):
+            seen.append(serial)
+            return [['flask', '3.0.0', 1700000000, 'new release', serial + 1]]
+        server.register_function(changelog_since_serial)
+        thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/'
+            result = fetch_changelog_since(url, 41)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert seen == [41]
+        assert result == [['flask', '3.0.0', 1700000000, 'new release', 42]]
+
+    @patch('namecheck.utils.CHANGELOG_PAGE_SIZE', 2)
+    def test_fetch_changelog_pages(self):
+        """Test that full changelog pages are followed until a short one."""
+        class PyPIHandler(SimpleXMLRPCRequestHandler):
+            rpc_paths = ('/pypi',)
+        server = SimpleXMLRPCServer(('127.0.0.1', 0), requestHandler=PyPIHandler, logRequests=False)
+        changelog = [[f'pkg{serial}', '1.0', 0, 'create', serial] for serial in range(42, 47)]
+        seen = []
+        def changelog_since_serial(serial):
+            seen.append(serial)
+            return [event for event in changelog if event[4] > serial][:2]
+        server.register_function(changelog_since_serial)
+        thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        try:
+            url = f'http://127.0.0.1:{server.server_address[1]}/'
+            result = fetch_changelog_since(url, 41)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert seen == [41, 43, 45]
+        assert result == changelog
+
+    @patch('namecheck.utils.fetch_source_index')
+    @patch('namecheck.utils.fetch_changelog_since')
+    def test_refresh_applies_changelog(self, mock_changelog, mock_fetch):
+        """Test that a refresh with known serials only applies the changelog."""
+        save_package_names_to_cache({'flask': PYPI | TESTPYPI, 'django': PYPI})
+        save_index_meta({'PyPI': {'last_serial': 10}, 'TestPyPI': {'last_serial': 20}})
+        mock_changelog.side_effect = lambda url, serial: {
+            10: [['requests', '2.0', 0, 'create', 11], ['django', None, 0, 'remove project', 12]],
+            20: [],
+        }[serial]
+
+        result = get_all_package_names(refresh=True)
+
+        assert result == {'flask': PYPI | TESTPYPI, 'requests': PYPI}
+        assert load_index_meta() == {'PyPI': {'last_serial': 12}, 'TestPyPI': {'last_serial': 20}}
+        mock_fetch.assert_not_called()
+
+    @patch('namecheck.utils.fetch_source_index')
+    @patch('namecheck.utils.fetch_changelog_since')
+    def test_unchanged_refresh_keeps_index(self, mock_changelog, mock_fetch, isolated_cache_dir):
+        """Test that a refresh without changes only resets the age of the cached index."""
+        save_package_names_to_cache({'flask': PYPI | TESTPYPI})
+        cache_file = isolated_cache_dir / 'package_names.idx'
+        os.utime(cache_file, (0, 0))
+        save_index_meta({'PyPI': {'last_serial': 10}, 'TestPyPI': {'etag': '"b"'}})
+        mock_changelog.return_value = []
+        mock_fetch.return_value = (None, {'etag': '"b"'})
+
+        with patch('namecheck.utils.save_package_names_to_cache') as mock_save:
+            result = get_all_package_names(refresh=True)
+
+        assert result == {'flask': PYPI | TESTPYPI}
+        mock_save.assert_not_called()
+        assert time.time() - cache_file.stat().st_mtime < 60
+
+    @patch('namecheck.utils.fetch_source_index')
+    @patch('namecheck.utils.fetch_changelog_since')
+    def test_refresh_falls_back_to_index(self, mock_changelog, mock_fetch, capsys):
+        """Test that an unavailable changelog falls back to a conditional index fetch."""
+        save_package_names_to_cache({'flask': PYPI | TESTPYPI})
+        save_index_meta({'PyPI': {'last_serial': 10, 'etag': '"a"'}, 'TestPyPI': {'last_serial': 20}})
+        mock_changelog.side_effect = xmlrpc.client.Fault(-32500, 'changelog disabled')
+        mock_fetch.return_value = (['flask', 'numpy'], {'last_serial': 30})
+
+        result = get_all_package_names(refresh=True)
+
+        assert result == {'flask': PYPI | TESTPYPI, 'numpy': PYPI | TESTPYPI}
+        pypi_call, = [c for c in mock_fetch.call_args_list if c.args[0] == SOURCES['PyPI'] + 'simple/']
+        assert pypi_call.args[1] == {'last_serial': 10, 'etag': '"a"'}
+        assert "changelog" in capsys.readouterr().err
+
+    @pytest.mark.parametrize('body', [b'', b'{"serial": 1}', b'<?xml version="1.0"?><methodResponse/>'])
+    @patch('namecheck.utils.fetch_source_index')
+    @patch('namecheck.utils.http_session.post')
+    def test_refresh_non_xml_changelog(self, mock_post, mock_fetch, body, capsys):
+        """Test that a changelog answer that isn't XML-RPC falls back to the index fetch."""
+        save_package_names_to_cache({'flask': PYPI | TESTPYPI})
+        save_index_meta({'PyPI': {'last_serial': 10}, 'TestPyPI': {'last_serial': 20}})
+        mock_post.return_value = Mock(status_code=200, content=body)
+        mock_fetch.return_value = (['flask', 'numpy'], {'last_serial': 30})
+
+        result = get_all_package_names(refresh=True)
+
+        assert result == {'flask': PYPI | TESTPYPI, 'numpy': PYPI | TESTPYPI}
+        assert "changelog" in capsys.readouterr().err
+
+    @patch('namecheck.utils.fetch_source_index')
+    def test_fetch_records_last_serial(self, mock_fetch):
+        """Test that the serial reported by a full fetch is stored for the next refresh."""
+        mock_fetch.return_value = (['flask'], {'last_serial': 99})
+
+        get_all_package_names()
+
+        assert load_index_meta() == {'PyPI': {'last_serial': 99}, 'TestPyPI': {'last_serial': 99}}
+
+
+class TestSourceBitmask:
+    """Tests for the source bitmask encoding."""
+
+    def test_every_source_has_its_own_bit(self):
+        """Test that the source bits don't overlap."""
+        bits = list(SOURCE_BITS.values())
+        assert len(set(bits)) == len(SOURCES)
+        assert all(bit & (bit - 1) == 0 for bit in bits)
+
+    def test_encode_decode_round_trip(self):
+        """Test encoding and decoding source names."""
+        assert encode_sources(['TestPyPI', 'PyPI']) == PYPI | TESTPYPI
+        assert decode_sources(PYPI | TESTPYPI) == ['PyPI', 'TestPyPI']
+        assert decode_sources(TESTPYPI) == ['TestPyPI']
+        assert encode_sources([]) == 0
+        assert decode_sources(0) == []
+
+    def test_cache_for_other_sources_is_outdated(self, isolated_cache_dir, capsys):
+        """Test that an index written for another list of sources isn't used."""
+        isolated_cache_dir.mkdir()
+        write_index(str(isolated_cache_dir / 'package_names.idx'), {'flask': 1}, ['TestPyPI', 'PyPI'])
+
+        assert load_package_names_from_cache() is None
+        assert "outdated" in capsys.readouterr().err
+
+
 class TestGetSourcesForName:
     """Tests for the get_sources_for_name function."""
 
     def test_get_sources_for_name_single_source(self):
         """Test getting sources for a name with one source."""
-        all_names = {'package1': {'PyPI'}}
+        all_names = {'package1': PYPI}
         
         result = get_sources_for_name('package1', all_names)
         
@@ -280,7 +812,7 @@ class TestGetSourcesForName:
 
     def test_get_sources_for_name_multiple_sources(self):
         """Test getting sources for a name with multiple sources."""
-        all_names = {'package1': {'TestPyPI', 'PyPI'}}
+        all_names = {'package1': PYPI | TESTPYPI}
         
         result = get_sources_for_name('package1', all_names)
         
@@ -288,15 +820,22 @@ class TestGetSourcesForName:
 
     def test_get_sources_for_name_case_insensitive(self):
         """Test that name lookup is case-insensitive."""
-        all_names = {'mypackage': {'PyPI'}}
+        all_names = {'mypackage': PYPI}
         
         result = get_sources_for_name('MyPackage', all_names)
         
         assert result == ['PyPI']
 
+    def test_get_sources_for_name_normalized(self):
+        """Test that separators don't matter, like on the indexes."""
+        all_names = {'foo-bar': PYPI}
+
+        assert get_sources_for_name('Foo_Bar', all_names) == ['PyPI']
+        assert get_sources_for_name('foo.bar', all_names) == ['PyPI']
+
     def test_get_sources_for_name_not_found(self):
         """Test getting sources for a non-existent name."""
-        all_names = {'package1': {'PyPI'}}
+        all_names = {'package1': PYPI}
         
         result = get_sources_for_name('nonexistent', all_names)
         
@@ -308,7 +847,7 @@ class TestIsNameTakenGlobalIndex:
 
     def test_is_name_taken_global_index_found(self):
         """Test when name is found in global index."""
-        all_names = {'existing-package': {'PyPI'}}
+        all_names = {'existing-package': PYPI}
         
         result = is_name_taken_global_index('existing-package', all_names)
         
@@ -316,7 +855,7 @@ class TestIsNameTakenGlobalIndex:
 
     def test_is_name_taken_global_index_not_found(self):
         """Test when name is not found in global index."""
-        all_names = {'existing-package': {'PyPI'}}
+        all_names = {'existing-package': PYPI}
         
         result = is_name_taken_global_index('new-package', all_names)
         
@@ -324,17 +863,103 @@ class TestIsNameTakenGlobalIndex:
 
     def test_is_name_taken_global_index_case_insensitive(self):
         """Test case-insensitive matching."""
-        all_names = {'mypackage': {'PyPI'}}
+        all_names = {'mypackage': PYPI}
         
         result = is_name_taken_global_index('MyPackage', all_names)
         
         assert result is True
 
 
+class TestGetSimilarNames:
+    """Tests for finding the names PyPI rejects a name for."""
+
+    def test_similar_names_in_mapping(self):
+        """Test the collision check on a plain mapping."""
+        all_names = {'foo-bar': PYPI, 'foobar': TESTPYPI, 'flask': PYPI}
+
+        assert get_similar_names('f00bar', all_names) == ['foo-bar', 'foobar']
+        assert get_similar_names('Foo_Bar', all_names) == ['foobar']
+        assert get_similar_names('django', all_names) == []
+
+    def test_similar_names_in_index(self):
+        """Test that the cached index answers from its precomputed keys."""
+        save_package_names_to_cache({'foo-bar': PYPI, 'flask': PYPI})
+
+        index = load_package_names_from_cache()
+
+        assert get_similar_names('FooBar', index) == ['foo-bar']
+        assert get_similar_names('fiask', index) == ['flask']
+
+    def test_fetched_names_normalized(self, stand_in_server):
+        """Test that names are PEP 503 normalized when they're fetched."""
+        stand_in_server.routes['/simple/'] = (200, {'Content-Type': 'text/html'}, b'<a>Foo_Bar</a><a>zope.interface</a>')
+        stand_in_server.routes['/test/simple/'] = (200, {'Content-Type': 'text/html'}, b'<a>foo-bar</a>')
+        sources = {'PyPI': stand_in_server.url, 'TestPyPI': stand_in_server.url + 'test/'}
+
+        with patch.dict('namecheck.utils.SOURCES', sources, clear=True):
+            result = get_all_package_names()
+
+        assert result == {'foo-bar': PYPI | TESTPYPI, 'zope-interface': PYPI}
+        assert get_similar_names('foobar', result) == ['foo-bar']
+
+
+class TestSearchPackageNames:
+    """Tests for the substring and prefix search."""
+
+    ALL_NAMES = {'django': PYPI, 'django-rest': PYPI, 'pytorch': PYPI, 'torch': TESTPYPI, 'torchvision': PYPI}
+
+    def test_substring_and_prefix(self):
+        """Test both kinds of search on a plain mapping."""
+        assert search_package_names('torch', self.ALL_NAMES) == (3, ['pytorch', 'torch', 'torchvision'])
+        assert search_package_names('torch', self.ALL_NAMES, prefix=True) == (2, ['torch', 'torchvision'])
+        assert search_package_names('Django_', self.ALL_NAMES, prefix=True, limit=5) == (1, ['django-rest'])
+
+    def test_index_agrees_with_mapping(self):
+        """Test that the cached index gives the same answers without a scan."""
+        save_package_names_to_cache(self.ALL_NAMES)
+        index = load_package_names_from_cache()
+
+        for query in ('torch', 'o', 'django-', 'missing'):
+            for prefix in (False, True):
+                assert (search_package_names(query, index, prefix=prefix, limit=2)
+                        == search_package_names(query, self.ALL_NAMES, prefix=prefix, limit=2))
+
+
+class TestGetSoundAlikes:
+    """Tests for finding the names that sound like a name."""
+
+    ALL_NAMES = {'numpy': PYPI, 'nampy': PYPI, 'numba': PYPI, 'pillow': TESTPYPI, 'pilo': PYPI}
+
+    def test_sound_alikes(self):
+        """Test that names with the same phonetic key are found, best spelled first."""
+        assert get_sound_alikes('numpie', self.ALL_NAMES) == ['numpy', 'nampy']
+        assert get_sound_alikes('pillow', self.ALL_NAMES) == ['pilo']
+        assert get_sound_alikes('flask', self.ALL_NAMES) == []
+
+    def test_exclude(self):
+        """Test that names shown elsewhere are left out."""
+        assert get_sound_alikes('numpie', self.ALL_NAMES, exclude=['numpy']) == ['nampy']
+
+    def test_index_agrees_with_mapping(self):
+        """Test that the cached index answers from its precomputed buckets."""
+        save_package_names_to_cache(self.ALL_NAMES)
+        index = load_package_names_from_cache()
+
+        for name in ('numpie', 'Pillow', 'flask'):
+            assert get_sound_alikes(name, index) == get_sound_alikes(name, self.ALL_NAMES)
+
+
 class TestIsNameTakenProjectUrl:
     """Tests for the is_name_taken_project_url function."""
 
-    @patch('namecheck.utils.requests.get')
+    @pytest.fixture(autouse=True)
+    def mock_head(self):
+        """Makes the simple index tier inconclusive, so the project page is checked."""
+        with patch('namecheck.utils.http_session.head') as mock_head:
+            mock_head.return_value = Mock(status_code=403)
+            yield mock_head
+
+    @patch('namecheck.utils.http_session.get')
     def test_is_name_taken_project_url_exists(self, mock_get):
         """Test when package exists on PyPI."""
         mock_response = Mock()
@@ -346,13 +971,14 @@ class TestIsNameTakenProjectUrl:
             </div>
         </html>
         '''
+        mock_response.iter_content.return_value = [mock_response.content]
         mock_get.return_value = mock_response
         
         result = is_name_taken_project_url('test-package')
         
         assert 'PyPI' in result
 
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     def test_is_name_taken_project_url_not_found(self, mock_get):
         """Test when package doesn't exist."""
         mock_response = Mock()
@@ -364,16 +990,18 @@ class TestIsNameTakenProjectUrl:
             </body>
         </html>
         '''
+        mock_response.iter_content.return_value = [mock_response.content]
         mock_get.return_value = mock_response
         
         result = is_name_taken_project_url('nonexistent-package')
         
         assert result == []
 
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     @patch('namecheck.utils.get_content_with_playwright')
-    def test_is_name_taken_project_url_request_exception(self, mock_get, mock_playwright, capsys):
+    def test_is_name_taken_project_url_request_exception(self, mock_get, mock_playwright, mock_head, capsys):
         """Test handling of request exceptions."""
+        mock_head.side_effect = requests.RequestException("Connection error")
         mock_get.side_effect = requests.RequestException("Connection error")
         mock_playwright.side_effect = Exception("Playwright connection error")
         
@@ -383,7 +1011,7 @@ class TestIsNameTakenProjectUrl:
         captured = capsys.readouterr()
         assert "Warning" in captured.err
 
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     def test_is_name_taken_project_url_project_description(self, mock_get):
         """Test detection using project-description class."""
         mock_response = Mock()
@@ -395,6 +1023,7 @@ class TestIsNameTakenProjectUrl:
             </div>
         </html>
         '''
+        mock_response.iter_content.return_value = [mock_response.content]
         mock_get.return_value = mock_response
         
         result = is_name_taken_project_url('test-package')
@@ -402,16 +1031,267 @@ class TestIsNameTakenProjectUrl:
         assert 'PyPI' in result
 
 
+class TestConcurrentDirectChecks:
+    """Tests for checking the project urls of all sources concurrently."""
+
+    @patch('namecheck.utils.check_project_url')
+    def test_sources_checked_concurrently(self, mock_check):
+        """Test that every source is checked at the same time."""
+        barrier = threading.Barrier(len(SOURCES), timeout=5)
+        def check(name, source_name, url):
+            barrier.wait()
+            return DirectCheck(source_name, source_name == 'TestPyPI', 'simple')
+        mock_check.side_effect = check
+
+        result = is_name_taken_project_url('test-package')
+
+        assert result == ['TestPyPI']
+
+    @patch('namecheck.utils.check_project_url')
+    def test_sources_keep_their_order(self, mock_check):
+        """Test that the taken sources are listed in SOURCES order."""
+        def check(name, source_name, url):
+            if source_name == 'PyPI':
+                time.sleep(0.1)
+            return DirectCheck(source_name, True, 'simple')
+        mock_check.side_effect = check
+
+        result = is_name_taken_project_url('test-package')
+
+        assert result == ['PyPI', 'TestPyPI']
+
+    @patch('namecheck.utils.check_project_url')
+    def test_deadline(self, mock_check, capsys):
+        """Test that a slow source is given up on after the deadline."""
+        release = threading.Event()
+        def check(name, source_name, url):
+            if source_name == 'TestPyPI':
+                release.wait(5)
+            return DirectCheck(source_name, True, 'simple')
+        mock_check.side_effect = check
+
+        start = time.perf_counter()
+        result = is_name_taken_project_url('test-package', deadline=0.2)
+        elapsed = time.perf_counter() - start
+        release.set()
+
+        assert result == ['PyPI']
+        assert elapsed < 2
+        assert "TestPyPI" in capsys.readouterr().err
+
+
+class TestDirectCheckCache:
+    """Tests for reusing earlier direct check results."""
+
+    @patch('namecheck.utils.check_project_url')
+    def test_repeat_check_skips_network(self, mock_check):
+        """Test that a name checked before is answered from the cache."""
+        mock_check.side_effect = lambda name, source_name, url: DirectCheck(source_name, source_name == 'PyPI', 'simple')
+
+        first = get_direct_checks('test-package')
+        second = get_direct_checks('Test_Package')
+
+        assert mock_check.call_count == len(SOURCES)
+        assert first['PyPI'] == DirectCheck('PyPI', True, 'simple')
+        assert second == {'PyPI': DirectCheck('PyPI', True, 'cache'),
+                          'TestPyPI': DirectCheck('TestPyPI', False, 'cache')}
+
+    @patch('namecheck.utils.check_project_url')
+    def test_only_uncached_sources_checked(self, mock_check):
+        """Test that a source without a fresh result is still checked."""
+        get_direct_check_cache().put('test-package', 'TestPyPI', True)
+        mock_check.side_effect = lambda name, source_name, url: DirectCheck(source_name, False, 'simple')
+
+        checks = get_direct_checks('test-package')
+
+        mock_check.assert_called_once_with('test-package', 'PyPI', SOURCES['PyPI'])
+        assert list(checks) == ['PyPI', 'TestPyPI']
+        assert checks['TestPyPI'].tier == 'cache'
+
+    @patch('namecheck.utils.check_project_url')
+    def test_failures_not_cached(self, mock_check, capsys):
+        """Test that a source that couldn't be checked is asked again next time."""
+        mock_check.side_effect = requests.ConnectionError("offline")
+
+        get_direct_checks('test-package')
+        get_direct_checks('test-package')
+
+        assert mock_check.call_count == 2 * len(SOURCES)
+
+    @patch('namecheck.utils.check_project_url')
+    def test_saved_next_to_the_index(self, mock_check, isolated_cache_dir):
+        """Test that the results are persisted in the cache directory."""
+        mock_check.side_effect = lambda name, source_name, url: DirectCheck(source_name, True, 'simple')
+        get_direct_checks('test-package')
+
+        save_direct_check_cache()
+
+        with open(isolated_cache_dir / 'direct_checks.json') as f:
+            assert sorted(json.load(f)) == ['PyPI:test-package', 'TestPyPI:test-package']
+
+    def test_clear_cache_forgets_results(self):
+        """Test that clearing the cache also drops the direct check results."""
+        get_direct_check_cache().put('test-package', 'PyPI', True)
+        save_direct_check_cache()
+
+        clear_cache()
+
+        assert get_direct_check_cache().get('test-package', 'PyPI') is None
+
+
+class TestTieredDirectChecks:
+    """Tests for the cheapest-first direct availability checker."""
+
+    @patch('namecheck.utils.get_content_with_playwright')
+    @patch('namecheck.utils.http_session.get')
+    @patch('namecheck.utils.http_session.head')
+    def test_simple_index_answers(self, mock_head, mock_get, mock_playwright):
+        """Test that a decisive simple index status needs no page and no browser."""
+        mock_head.side_effect = lambda url, **kwargs: Mock(status_code=200 if 'test.pypi' in url else 404,
+                                                           headers={'Content-Type': JSON_INDEX_CONTENT_TYPE})
+
+        checks = get_direct_checks('test-package')
+
+        assert checks == {'PyPI': DirectCheck('PyPI', False, 'simple'),
+                          'TestPyPI': DirectCheck('TestPyPI', True, 'simple')}
+        mock_get.assert_not_called()
+        mock_playwright.assert_not_called()
+
+    @patch('namecheck.utils.get_content_with_playwright')
+    @patch('namecheck.utils.http_session.get')
+    @patch('namecheck.utils.http_session.head')
+    def test_escalates_to_html(self, mock_head, mock_get, mock_playwright):
+        """Test that an inconclusive status escalates to the project page."""
+        mock_head.return_value = Mock(status_code=429)
+        mock_get.return_value = Mock(status_code=200)
+        mock_get.return_value.iter_content.return_value = [b'<div class="package-header"></div>']
+
+        check = check_project_url('test-package', 'PyPI', SOURCES['PyPI'])
+
+        assert check == DirectCheck('PyPI', True, 'html')
+        mock_get.assert_called_once_with('https://pypi.org/project/test-package/', timeout=30, stream=True)
+        mock_playwright.assert_not_called()
+
+    @patch('namecheck.utils.get_content_with_playwright')
+    @patch('namecheck.utils.http_session.get')
+    @patch('namecheck.utils.http_session.head')
+    def test_escalates_to_browser(self, mock_head, mock_get, mock_playwright):
+        """Test that a page without markers (e.g. a js challenge) escalates to the browser."""
+        mock_head.side_effect = requests.ConnectionError("blocked")
+        mock_get.return_value = Mock(status_code=200)
+        mock_get.return_value.iter_content.return_value = [b'<html><script>challenge()</script></html>']
+        mock_playwright.return_value = '<div class="project-description"></div>'
+
+        check = check_project_url('test-package', 'TestPyPI', SOURCES['TestPyPI'])
+
+        assert check == DirectCheck('TestPyPI', True, 'browser')
+        mock_playwright.assert_called_once_with('https://test.pypi.org/project/test-package/')
+
+    @patch('namecheck.utils.get_content_with_playwright')
+    @patch('namecheck.utils.http_session.get')
+    @patch('namecheck.utils.http_session.head')
+    def test_browser_without_markers_is_available(self, mock_head, mock_get, mock_playwright):
+        """Test that the last tier always gives an answer."""
+        mock_head.return_value = Mock(status_code=403)
+        mock_get.return_value = Mock(status_code=403)
+        mock_playwright.return_value = '<html></html>'
+
+        check = check_project_url('test-package', 'TestPyPI', SOURCES['TestPyPI'])
+
+        assert check == DirectCheck('TestPyPI', False, 'browser')
+
+    @patch('namecheck.utils.http_session.get')
+    @patch('namecheck.utils.http_session.head')
+    def test_project_page_404(self, mock_head, mock_get):
+        """Test that a missing project page settles it."""
+        mock_head.return_value = Mock(status_code=503)
+        mock_get.return_value = Mock(status_code=404)
+
+        check = check_project_url('test-package', 'PyPI', SOURCES['PyPI'])
+
+        assert check == DirectCheck('PyPI', False, 'html')
+
+    def test_simple_index_against_stand_in(self, stand_in_server):
+        """Test the simple index tier against a local stand-in server."""
+        stand_in_server.routes['/simple/flask/'] = (200, {'Content-Type': JSON_INDEX_CONTENT_TYPE}, b'{}')
+
+        assert probe_simple_index('flask', stand_in_server.url) is True
+        assert probe_simple_index('not-a-project', stand_in_server.url) is False
+        assert stand_in_server.requests[0][0] == 'HEAD'
+        assert stand_in_server.requests[0][2]['Accept'] == JSON_INDEX_CONTENT_TYPE
+
+    def test_simple_index_challenge_page(self, stand_in_server):
+        """Test that a 200 page that isn't the simple index leaves it to the next tier."""
+        stand_in_server.routes['/simple/flask/'] = (200, {'Content-Type': 'text/html; charset=utf-8'},
+                                                    b'<script>challenge()</script>')
+
+        assert probe_simple_index('flask', stand_in_server.url) is None
+
+    def test_project_page_against_stand_in(self, stand_in_server):
+        """Test that the project page tier stops reading a large page at the first marker."""
+        page = b'<html><div class="package-header"></div>' + b'<p>filler</p>' * 1_000_000 + b'</html>'
+        stand_in_server.routes['/project/flask/'] = (200, {'Content-Type': 'text/html'}, page)
+        stand_in_server.routes['/project/challenge/'] = (200, {'Content-Type': 'text/html'}, b'<script></script>')
+
+        assert probe_project_page('flask', stand_in_server.url) is True
+        assert probe_project_page('challenge', stand_in_server.url) is None
+        assert probe_project_page('not-a-project', stand_in_server.url) is False
+
+
+class TestPhaseTimings:
+    """Tests for the --timings instrumentation of the hot paths."""
+
+    @pytest.fixture
+    def enabled_timings(self, monkeypatch):
+        from namecheck.timings import timings
+        monkeypatch.setattr(timings, 'enabled', True)
+        timings.clear()
+        yield timings
+        timings.clear()
+
+    def test_index_fetch_phases(self, stand_in_server, enabled_timings):
+        """Test that the download and the parse of a streamed index are timed apart."""
+        stand_in_server.routes['/simple/'] = (200, {'Content-Type': 'application/vnd.pypi.simple.v1+json'},
+                                              json_index('flask', 'django'))
+
+        fetch_source_index(stand_in_server.url + 'simple/')
+
+        phases = [phase for phase, *_ in enabled_timings.summary()]
+        assert phases == ['index download', 'index parse']
+
+    @patch('namecheck.utils.http_session.get')
+    @patch('namecheck.utils.http_session.head')
+    def test_direct_check_phases(self, mock_head, mock_get, enabled_timings):
+        """Test that every tier a direct check goes through is timed per source."""
+        mock_head.return_value = Mock(status_code=429)
+        mock_get.return_value = Mock(status_code=404)
+
+        check_project_url('test-package', 'PyPI', SOURCES['PyPI'])
+
+        phases = [phase for phase, *_ in enabled_timings.summary()]
+        assert phases == ['direct check: PyPI (simple)', 'direct check: PyPI (html)']
+
+    @patch('namecheck.utils.is_name_taken_project_url')
+    def test_availability_phases(self, mock_direct, enabled_timings):
+        """Test that the exact lookup and the close match search are timed."""
+        mock_direct.return_value = []
+
+        get_name_availability('flask', {'flask': PYPI, 'flasks': PYPI})
+
+        phases = [phase for phase, *_ in enabled_timings.summary()]
+        assert phases == ['exact lookup', 'n-gram index build', 'close matches']
+
+
 class TestGetCloseMatches:
     """Tests for the get_close_matches function."""
 
     def test_get_close_matches_found(self):
         """Test finding close matches."""
         all_names = {
-            'requests': {'PyPI'},
-            'request': {'PyPI'},
-            'requestor': {'PyPI'},
-            'completely-different': {'PyPI'}
+            'requests': PYPI,
+            'request': PYPI,
+            'requestor': PYPI,
+            'completely-different': PYPI
         }
         
         result = get_close_matches('requester', all_names)
@@ -421,9 +1301,9 @@ class TestGetCloseMatches:
     def test_get_close_matches_exact_removed(self):
         """Test that exact match is removed from close matches."""
         all_names = {
-            'mypackage': {'PyPI'},
-            'mypackages': {'PyPI'},
-            'my-package': {'PyPI'}
+            'mypackage': PYPI,
+            'mypackages': PYPI,
+            'my-package': PYPI
         }
         
         result = get_close_matches('mypackage', all_names)
@@ -433,9 +1313,9 @@ class TestGetCloseMatches:
     def test_get_close_matches_none_found(self):
         """Test when no close matches are found."""
         all_names = {
-            'completely': {'PyPI'},
-            'different': {'PyPI'},
-            'words': {'PyPI'}
+            'completely': PYPI,
+            'different': PYPI,
+            'words': PYPI
         }
         
         result = get_close_matches('xyz123unique', all_names)
@@ -445,8 +1325,8 @@ class TestGetCloseMatches:
     def test_get_close_matches_case_insensitive(self):
         """Test case-insensitive matching."""
         all_names = {
-            'mypackage': {'PyPI'},
-            'mypackages': {'PyPI'}
+            'mypackage': PYPI,
+            'mypackages': PYPI
         }
         
         result = get_close_matches('MyPackage', all_names)
@@ -455,13 +1335,43 @@ class TestGetCloseMatches:
         assert len(result) >= 0  # May or may not have other matches
 
 
+class TestGetCloseMatchesEdit:
+    """Tests for the edit distance matcher of get_close_matches."""
+
+    def test_typos_found(self):
+        """Test finding names a few typos away."""
+        all_names = {'requests': PYPI, 'requets': PYPI, 'flask': PYPI}
+
+        result = get_close_matches('Reqeusts', all_names, matcher='edit', max_distance=2)
+
+        assert result == ['requests', 'requets']
+
+    def test_exact_removed(self):
+        """Test that the exact name isn't reported as its own match."""
+        all_names = {'requests': PYPI, 'requestz': PYPI}
+
+        result = get_close_matches('requests', all_names, matcher='edit', max_distance=1)
+
+        assert result == ['requestz']
+
+    @patch('namecheck.utils.is_name_taken_project_url')
+    def test_get_name_availability_with_edit_matcher(self, mock_project_url):
+        """Test that the matcher is passed through the availability check."""
+        all_names = {'requests': PYPI}
+        mock_project_url.return_value = []
+
+        _, _, close_matches = get_name_availability('reqeusts', all_names, matcher='edit', max_distance=1)
+
+        assert close_matches == ['requests']
+
+
 class TestGetNameAvailability:
     """Tests for the get_name_availability function."""
 
     @patch('namecheck.utils.is_name_taken_project_url')
     def test_get_name_availability_taken_in_index(self, mock_project_url):
         """Test when name is taken (found in global index)."""
-        all_names = {'existing-package': {'PyPI'}}
+        all_names = {'existing-package': PYPI}
         
         is_available, taken_sources, close_matches = get_name_availability('existing-package', all_names)
         
@@ -471,7 +1381,7 @@ class TestGetNameAvailability:
     @patch('namecheck.utils.is_name_taken_project_url')
     def test_get_name_availability_available(self, mock_project_url):
         """Test when name is available."""
-        all_names = {'other-package': {'PyPI'}}
+        all_names = {'other-package': PYPI}
         mock_project_url.return_value = []
         
         is_available, taken_sources, close_matches = get_name_availability('new-package', all_names)
@@ -482,7 +1392,7 @@ class TestGetNameAvailability:
     @patch('namecheck.utils.is_name_taken_project_url')
     def test_get_name_availability_not_in_index_but_exists(self, mock_project_url):
         """Test when name is not in cached index but exists via URL check."""
-        all_names = {'other-package': {'PyPI'}}
+        all_names = {'other-package': PYPI}
         mock_project_url.return_value = ['PyPI']
         
         is_available, taken_sources, close_matches = get_name_availability('new-package', all_names)
@@ -490,13 +1400,25 @@ class TestGetNameAvailability:
         assert is_available is False
         assert taken_sources == ['PyPI']
 
+    @patch('namecheck.utils.is_name_taken_project_url')
+    def test_get_name_availability_too_similar(self, mock_project_url):
+        """Test that a name PyPI would reject is taken without a network check."""
+        all_names = {'foo-bar': PYPI, 'foobar': TESTPYPI}
+
+        is_available, taken_sources, close_matches = get_name_availability('f00bar', all_names)
+
+        assert is_available is False
+        assert taken_sources == ['PyPI', 'TestPyPI']
+        assert close_matches[:2] == ['foo-bar', 'foobar']
+        mock_project_url.assert_not_called()
+
     @patch('namecheck.utils.is_name_taken_project_url')
     def test_get_name_availability_with_close_matches(self, mock_project_url):
         """Test that close matches are returned."""
         all_names = {
-            'mypackage': {'PyPI'},
-            'mypackages': {'PyPI'},
-            'my-package': {'PyPI'}
+            'mypackage': PYPI,
+            'mypackages': PYPI,
+            'my-package': PYPI
         }
         mock_project_url.return_value = []
         
@@ -545,8 +1467,8 @@ class TestRenderFunctions:
         """Test printing close matches."""
         console = Console(file=StringIO())
         all_names = {
-            'flask': {'PyPI'},
-            'flasks': {'TestPyPI'}
+            'flask': PYPI,
+            'flasks': TESTPYPI
         }
         matches = ['flask', 'flasks']
         
@@ -556,6 +1478,18 @@ class TestRenderFunctions:
         assert 'matching' in output.lower()
         assert 'flask' in output
 
+    def test_print_matches_with_sound_alikes(self):
+        """Test that sound-alikes are shown as a group of their own."""
+        console = Console(file=StringIO())
+        all_names = {'numpy': PYPI, 'numpie': TESTPYPI}
+
+        print_matches([], all_names, console, sound_alikes=['numpy', 'numpie'])
+
+        output = console.file.getvalue()
+        assert 'matching' not in output.lower()
+        assert 'sound alike' in output
+        assert 'numpie' in output
+
     def test_render_name_availability_available(self):
         """Test rendering when name is available."""
         console = Console(file=StringIO())
@@ -579,7 +1513,7 @@ class TestRenderFunctions:
     def test_render_name_availability_with_matches(self):
         """Test rendering with close matches."""
         console = Console(file=StringIO())
-        all_names = {'test1': {'PyPI'}}
+        all_names = {'test1': PYPI}
         
         render_name_availability('test', True, [], ['test1'], all_names, console)
         
@@ -608,7 +1542,7 @@ class TestIntegration:
 
     @patch('namecheck.utils.load_package_names_from_cache')
     @patch('namecheck.utils.save_package_names_to_cache')
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     @patch('namecheck.utils.is_name_taken_project_url')
     def test_full_workflow_available(self, mock_project_url, mock_get, mock_save, mock_load):
         """Test full workflow for an available name."""
@@ -618,6 +1552,9 @@ class TestIntegration:
         mock_response = Mock()
         mock_response.content = b'<html><body><a>flask</a><a>django</a></body></html>'
         mock_response.raise_for_status = Mock()
+        mock_response.iter_content.return_value = [mock_response.content]
+        mock_response.status_code = 200
+        mock_response.headers = {'Content-Type': 'text/html'}
         mock_get.return_value = mock_response
         
         all_names = get_all_package_names()
@@ -628,7 +1565,7 @@ class TestIntegration:
 
     @patch('namecheck.utils.load_package_names_from_cache')
     @patch('namecheck.utils.save_package_names_to_cache')
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     def test_full_workflow_taken(self, mock_get, mock_save, mock_load):
         """Test full workflow for a taken name."""
         mock_load.return_value = None
@@ -636,6 +1573,9 @@ class TestIntegration:
         mock_response = Mock()
         mock_response.content = b'<html><body><a>flask</a><a>django</a></body></html>'
         mock_response.raise_for_status = Mock()
+        mock_response.iter_content.return_value = [mock_response.content]
+        mock_response.status_code = 200
+        mock_response.headers = {'Content-Type': 'text/html'}
         mock_get.return_value = mock_response
         
         all_names = get_all_package_names()
@@ -646,7 +1586,7 @@ class TestIntegration:
 
     @patch('namecheck.utils.load_package_names_from_cache')
     @patch('namecheck.utils.save_package_names_to_cache')
-    @patch('namecheck.utils.requests.get')
+    @patch('namecheck.utils.http_session.get')
     def test_full_workflow_with_render(self, mock_get, mock_save, mock_load):
         """Test full workflow including rendering."""
         mock_load.return_value = None
@@ -654,6 +1594,9 @@ class TestIntegration:
         mock_response = Mock()
         mock_response.content = b'<html><body><a>flask</a></body></html>'
         mock_response.raise_for_status = Mock()
+        mock_response.iter_content.return_value = [mock_response.content]
+        mock_response.status_code = 200
+        mock_response.headers = {'Content-Type': 'text/html'}
         mock_get.return_value = mock_response
         
         all_names = get_all_package_names()